@@ -15,7 +15,9 @@ This demonstrates:
 """
 import os
 from typing import Dict, Any
-from templates.phaser_templates import get_template, generate_game_html
+from templates.phaser_templates import render_game
+from services.render_cache import get_render_cache, render_key
+from services.game_store import get_game_store
 from schemas.game_schema import GameDesign
 
 
@@ -35,13 +37,26 @@ class CodeGeneratorAgent:
         """
         Generate a complete game from the design specification.
         
+        The game is written to the game store (with its compressed
+        variants) and returned by hash. Identical designs are rendered once
+        and then found in the render cache.
+        
         Args:
             game_design: Complete game design from Game Designer
         
         Returns:
-            dict: Generated game code and HTML
+            dict: success, game_title, config, hash (in the game store),
+                  cached and error
         """
         try:
+            store = get_game_store()
+            key = render_key(game_design)
+            cache = get_render_cache()
+            cached = cache.get(key) if cache else None
+            if cached is not None and store.exists(cached["hash"]):
+                store.touch(cached["hash"], force=True)
+                return {"success": True, **cached, "cached": True}
+            
             # Extract design details
             game_title = game_design.get('game_title', 'My Game')
             game_type = game_design.get('game_type', 'platformer')
@@ -52,37 +67,34 @@ class CodeGeneratorAgent:
             collectibles = game_design.get('collectibles', [])
             obstacles = game_design.get('obstacles', [])
             
-            # Get template
-            template = get_template(game_type)
-            
             # Customize based on game type
-            if game_type == 'platformer':
-                customized_code = self._customize_platformer(
-                    template, game_title, player, collectibles, obstacles, game_design
-                )
-            elif game_type == 'top-down':
-                customized_code = self._customize_top_down(
-                    template, game_title, player, collectibles, obstacles, game_design
+            if game_type == 'top-down':
+                values = self._customize_top_down(
+                    game_title, player, collectibles, obstacles, game_design
                 )
             elif game_type == 'obstacle-avoider':
-                customized_code = self._customize_avoider(
-                    template, game_title, player, collectibles, obstacles, game_design
+                values = self._customize_avoider(
+                    game_title, player, collectibles, obstacles, game_design
                 )
             else:
-                # Default to platformer
-                customized_code = self._customize_platformer(
-                    template, game_title, player, collectibles, obstacles, game_design
+                # Platformer, and the default for unknown types
+                game_type = 'platformer'
+                values = self._customize_platformer(
+                    game_title, player, collectibles, obstacles, game_design
                 )
             
-            # Generate complete HTML
-            game_html = generate_game_html(game_title, customized_code)
+            # Render the game page - its config for the shared runtime and the complete HTML
+            config, game_html = render_game(game_type, values)
             
-            return {
-                "success": True,
-                "code": customized_code,
-                "html": game_html,
+            rendered = {
+                "config": config,
+                "hash": store.put(game_html),
                 "game_title": game_title
             }
+            if cache:
+                cache.put(key, rendered)
+            
+            return {"success": True, **rendered, "cached": False}
         
         except Exception as e:
             return {
@@ -90,44 +102,41 @@ class CodeGeneratorAgent:
                 "error": str(e)
             }
     
-    def _customize_platformer(self, template: str, game_title: str, 
-                            player: Dict, collectibles: list, obstacles: list,
-                            game_design: Dict) -> str:
-        """Customize platformer template with story elements."""
+    def _customize_platformer(self, game_title: str, player: Dict,
+                            collectibles: list, obstacles: list,
+                            game_design: Dict) -> Dict[str, Any]:
+        """Template values for the platformer, from the story elements."""
         
         # Extract names
         player_name = player.get('name', 'Hero') if player else 'Hero'
         collectible_name = collectibles[0].get('name', 'Items') if collectibles else 'Items'
         obstacle_name = obstacles[0].get('name', 'Danger') if obstacles else 'Obstacles'
         
-        # Customize template
-        customized = template.format(
+        return dict(
             game_title=game_title,
             player_name=player_name,
             collectible_name=collectible_name,
             obstacle_name=obstacle_name,
             collectible_count=8,
             obstacle_count=3,
-            # Colors (using hex without 0x prefix for format string)
+            # Colors (0x hex, sent to the game as numbers)
             bg_color='0x87CEEB',  # Sky blue
             platform_color='0x8B4513',  # Brown
             player_color='0x00FF00',  # Green
             collectible_color='0xFFD700',  # Gold
             obstacle_color='0xFF0000'  # Red
         )
-        
-        return customized
     
-    def _customize_top_down(self, template: str, game_title: str,
-                          player: Dict, collectibles: list, obstacles: list,
-                          game_design: Dict) -> str:
-        """Customize top-down template with story elements."""
+    def _customize_top_down(self, game_title: str, player: Dict,
+                          collectibles: list, obstacles: list,
+                          game_design: Dict) -> Dict[str, Any]:
+        """Template values for the top-down game, from the story elements."""
         
         player_name = player.get('name', 'Hero') if player else 'Hero'
         collectible_name = collectibles[0].get('name', 'Items') if collectibles else 'Items'
         obstacle_name = obstacles[0].get('name', 'Danger') if obstacles else 'Obstacles'
         
-        customized = template.format(
+        return dict(
             game_title=game_title,
             player_name=player_name,
             collectible_name=collectible_name,
@@ -141,19 +150,17 @@ class CodeGeneratorAgent:
             collectible_color='0xFFD700',  # Gold
             obstacle_color='0x800080'  # Purple
         )
-        
-        return customized
     
-    def _customize_avoider(self, template: str, game_title: str,
-                         player: Dict, collectibles: list, obstacles: list,
-                         game_design: Dict) -> str:
-        """Customize obstacle avoider template with story elements."""
+    def _customize_avoider(self, game_title: str, player: Dict,
+                         collectibles: list, obstacles: list,
+                         game_design: Dict) -> Dict[str, Any]:
+        """Template values for the obstacle avoider, from the story elements."""
         
         player_name = player.get('name', 'Hero') if player else 'Hero'
         collectible_name = collectibles[0].get('name', 'Items') if collectibles else 'Items'
         obstacle_name = obstacles[0].get('name', 'Danger') if obstacles else 'Obstacles'
         
-        customized = template.format(
+        return dict(
             game_title=game_title,
             player_name=player_name,
             collectible_name=collectible_name,
@@ -165,8 +172,6 @@ class CodeGeneratorAgent:
             collectible_color='0xFFD700',  # Gold
             obstacle_color='0xFF0000'  # Red
         )
-        
-        return customized
 
 
 # Singleton instance
@@ -15,14 +15,16 @@ This demonstrates:
 """
 import os
 from typing import List, Dict, Any, Optional
-from langchain_anthropic import ChatAnthropic
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
 
-from tools.game_tools import GAME_TOOLS
+from tools.game_tools import GAME_TOOLS, LEAN_GAME_TOOLS, GAME_TOOL_GUIDANCE
 from schemas.book_schema import BookAnalysis
 from schemas.game_schema import GameDesign, GameMechanics, GameObject
+from services.model_router import get_model_router
+from services.prompt_cache import cached_system_message, with_cached_history
+from services.structured_output import StructuredOutput
 
 
 class GameDesignerAgent:
@@ -36,13 +38,15 @@ class GameDesignerAgent:
     def __init__(self):
         """Initialize the Game Designer agent with Claude and tools."""
         
-        # Initialize Claude model
-        self.llm = ChatAnthropic(
-            model="claude-sonnet-4-20250514",
-            anthropic_api_key=os.getenv('ANTHROPIC_API_KEY'),
-            temperature=0.8,  # More creative for game design
-            max_tokens=4096
+        # Initialize Claude models (on the shared, pooled client): the strong
+        # model for chat turns, a faster one for the final structured design
+        router = get_model_router()
+        self.llm = router.chat_model(
+            "conversation",
+            "game_designer",
+            temperature=0.8  # More creative for game design
         )
+        self.extraction_llm = router.chat_model("extraction", "game_designer", temperature=0.8)
         
         # Define the agent's personality and instructions
         self.system_prompt = """You are a friendly Game Designer AI helping create games from books.
@@ -70,28 +74,55 @@ GAME TYPES:
 
 Keep responses SHORT and actionable. Ask one clear question at a time."""
         
-        # Create the prompt template
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", self.system_prompt),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
-        
-        # Create the agent with tools
-        self.agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=GAME_TOOLS,
-            prompt=self.prompt
-        )
+        # The system prompt and book context are sent as cached blocks (see
+        # _inputs) so repeat calls read them from Anthropic's prompt cache
+        
+        # Lean mode drops the no-op tools (each one costs a Claude round-trip)
+        # and gives the model their guidance in the system prompt instead
+        self.lean = os.getenv('LEAN_AGENTS', 'true').lower() not in ('0', 'false', 'no')
+        self.tools = LEAN_GAME_TOOLS if self.lean else GAME_TOOLS
+        if self.lean:
+            self.system_prompt += "\n\n" + GAME_TOOL_GUIDANCE
         
-        # Create the executor
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=GAME_TOOLS,
-            verbose=True,
-            max_iterations=15,  # Increased to allow more conversation
-            handle_parsing_errors=True
+        if self.tools:
+            # Create the prompt template
+            self.prompt = ChatPromptTemplate.from_messages([
+                MessagesPlaceholder(variable_name="system"),
+                MessagesPlaceholder(variable_name="chat_history"),
+                ("human", "{input}"),
+                MessagesPlaceholder(variable_name="agent_scratchpad"),
+            ])
+            
+            # Create the agent with tools
+            self.agent = create_tool_calling_agent(
+                llm=self.llm,
+                tools=self.tools,
+                prompt=self.prompt
+            )
+            
+            # Create the executor
+            self.agent_executor = AgentExecutor(
+                agent=self.agent,
+                tools=self.tools,
+                verbose=True,
+                max_iterations=15,  # Increased to allow more conversation
+                handle_parsing_errors=True
+            )
+            self.chain = None
+        else:
+            # No tools to run - a single prompt -> model call per turn
+            self.prompt = ChatPromptTemplate.from_messages([
+                MessagesPlaceholder(variable_name="system"),
+                MessagesPlaceholder(variable_name="chat_history"),
+                ("human", "{input}"),
+            ])
+            self.chain = self.prompt | self.llm
+            self.agent_executor = None
+        
+        # Final designs come back as a forced GameDesign tool call
+        self.design_output = StructuredOutput(
+            GameDesign,
+            description="Record the complete game design specification."
         )
     
     def get_initial_greeting(self, book_analysis: BookAnalysis) -> str:
@@ -109,14 +140,20 @@ Keep responses SHORT and actionable. Ask one clear question at a time."""
                f"Which type: **platformer** (jump & collect), **top-down** (explore), or **obstacle-avoider** (dodge)?"
     
     def process_message(self, user_message: str, chat_history: List[Any] = None, 
-                       book_analysis: Optional[BookAnalysis] = None) -> Dict[str, Any]:
+                       book_analysis: Optional[BookAnalysis] = None,
+                       callbacks: Optional[List[Any]] = None,
+                       history_summary: Optional[str] = None,
+                       discussion: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user message during game design.
         
         Args:
             user_message: What the user said
-            chat_history: Previous conversation messages
+            chat_history: Previous conversation messages (recent ones, verbatim)
             book_analysis: The book analysis (for context)
+            callbacks: Optional LangChain callback handlers (e.g. token streaming)
+            history_summary: Rolling summary of older messages left out of chat_history
+            discussion: Transcript of the book discussion before design began
         
         Returns:
             dict: Agent response with message and any extracted data
@@ -124,59 +161,142 @@ Keep responses SHORT and actionable. Ask one clear question at a time."""
         if chat_history is None:
             chat_history = []
         
-        # Add book context to the input if available
-        enhanced_input = user_message
-        if book_analysis and len(chat_history) == 0:
-            # First message - include book context
-            enhanced_input = f"""Book: "{book_analysis.book.title}" by {book_analysis.book.author}
-Themes: {', '.join(book_analysis.themes[:3])}
-Main elements: {', '.join([e.name for e in book_analysis.game_elements[:5]])}
-
-User says: {user_message}"""
-        
         try:
             # Invoke the agent
-            result = self.agent_executor.invoke({
-                "input": enhanced_input,
-                "chat_history": chat_history
-            })
-            
-            # Extract text from the output (handle both string and list formats)
-            output = result.get("output", "")
-            
-            # Handle list of content blocks (Claude's format)
-            if isinstance(output, list):
-                text_parts = []
-                for block in output:
-                    if isinstance(block, dict) and block.get('type') == 'text':
-                        text_parts.append(block.get('text', ''))
-                response_text = ''.join(text_parts)
-            # Handle simple string output
-            elif isinstance(output, str):
-                response_text = output
-            else:
-                response_text = str(output)
-            
-            # Check if game type has been chosen
-            game_type_chosen = self._check_for_game_type(response_text, chat_history)
-            
-            # Check if design is complete
-            is_complete = self._check_if_complete(response_text, chat_history)
-            
-            return {
-                "success": True,
-                "message": response_text,
-                "game_type_chosen": game_type_chosen,
-                "is_complete": is_complete,
-                "agent": "game_designer"
-            }
+            result = self._run(self._inputs(user_message, chat_history, book_analysis, history_summary, discussion), callbacks)
+            return self._parse_result(result, chat_history)
         
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "message": "Hmm, I had a little trouble there. Could you say that again?"
-            }
+            return self._error_result(e)
+    
+    async def aprocess_message(self, user_message: str, chat_history: List[Any] = None,
+                               book_analysis: Optional[BookAnalysis] = None,
+                               callbacks: Optional[List[Any]] = None,
+                               history_summary: Optional[str] = None,
+                               discussion: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async version of process_message() - awaits the agent with ainvoke.
+        
+        Args:
+            user_message: What the user said
+            chat_history: Previous conversation messages (recent ones, verbatim)
+            book_analysis: The book analysis (for context)
+            callbacks: Optional LangChain callback handlers (e.g. token streaming)
+            history_summary: Rolling summary of older messages left out of chat_history
+            discussion: Transcript of the book discussion before design began
+        
+        Returns:
+            dict: Agent response with message and any extracted data
+        """
+        if chat_history is None:
+            chat_history = []
+        
+        try:
+            result = await self._arun(self._inputs(user_message, chat_history, book_analysis, history_summary, discussion), callbacks)
+            return self._parse_result(result, chat_history)
+        
+        except Exception as e:
+            return self._error_result(e)
+    
+    def _run(self, inputs: Dict[str, Any], callbacks: Optional[List[Any]]) -> Dict[str, Any]:
+        """Run one turn through the executor, or the single-call chain in lean mode."""
+        config = {"callbacks": callbacks} if callbacks else None
+        if self.agent_executor is not None:
+            return self.agent_executor.invoke(inputs, config=config)
+        
+        # Stream so token callbacks fire; the chunks add up to the full reply
+        message = None
+        for chunk in self.chain.stream(inputs, config=config):
+            message = chunk if message is None else message + chunk
+        return {"output": message.content if message is not None else ""}
+    
+    async def _arun(self, inputs: Dict[str, Any], callbacks: Optional[List[Any]]) -> Dict[str, Any]:
+        """Async version of _run()."""
+        config = {"callbacks": callbacks} if callbacks else None
+        if self.agent_executor is not None:
+            return await self.agent_executor.ainvoke(inputs, config=config)
+        
+        message = None
+        async for chunk in self.chain.astream(inputs, config=config):
+            message = chunk if message is None else message + chunk
+        return {"output": message.content if message is not None else ""}
+    
+    def _inputs(self, user_message: str, chat_history: List[Any],
+                book_analysis: Optional[BookAnalysis],
+                history_summary: Optional[str] = None,
+                discussion: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build prompt inputs with cache breakpoints.
+        
+        The book context (including what the reader said about the book)
+        rides in the system message as its own cached block on every turn,
+        after the system prompt and before the history. A summary of older
+        messages, if any, follows it without a breakpoint - it changes on
+        every fold.
+        """
+        return {
+            "system": [cached_system_message(
+                self.system_prompt,
+                self._book_context(book_analysis, discussion),
+                volatile=[f"EARLIER IN THIS CONVERSATION (summary):\n{history_summary}" if history_summary else None]
+            )],
+            "chat_history": with_cached_history(chat_history),
+            "input": user_message
+        }
+    
+    def _book_context(self, book_analysis: Optional[BookAnalysis],
+                      discussion: Optional[str] = None) -> Optional[str]:
+        """Summarize the book analysis (and the reader's discussion) for the system prompt."""
+        if not book_analysis:
+            return None
+        
+        context = f"""BOOK CONTEXT:
+Book: "{book_analysis.book.title}" by {book_analysis.book.author}
+Themes: {', '.join(book_analysis.themes[:3])}
+Main elements: {', '.join([e.name for e in book_analysis.game_elements[:5]])}"""
+        if discussion:
+            context += f"\n\nWHAT THIS READER TALKED ABOUT:\n{discussion}"
+        return context
+    
+    def _parse_result(self, result: Dict[str, Any], chat_history: List[Any]) -> Dict[str, Any]:
+        """Turn AgentExecutor output into the agent's response dict."""
+        # Extract text from the output (handle both string and list formats)
+        output = result.get("output", "")
+        
+        # Handle list of content blocks (Claude's format)
+        if isinstance(output, list):
+            text_parts = []
+            for block in output:
+                if isinstance(block, dict) and block.get('type') == 'text':
+                    text_parts.append(block.get('text', ''))
+            response_text = ''.join(text_parts)
+        # Handle simple string output
+        elif isinstance(output, str):
+            response_text = output
+        else:
+            response_text = str(output)
+        
+        # Check if game type has been chosen
+        game_type_chosen = self._check_for_game_type(response_text, chat_history)
+        
+        # Check if design is complete
+        is_complete = self._check_if_complete(response_text, chat_history)
+        
+        return {
+            "success": True,
+            "message": response_text,
+            "game_type_chosen": game_type_chosen,
+            "is_complete": is_complete,
+            "agent": "game_designer"
+        }
+    
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Build the response returned when the agent call fails."""
+        return {
+            "success": False,
+            "error": str(error),
+            "message": "Hmm, I had a little trouble there. Could you say that again?"
+        }
     
     def _check_for_game_type(self, response: str, history: List[Any]) -> Optional[str]:
         """Check if a game type has been chosen."""
@@ -210,19 +330,79 @@ User says: {user_message}"""
         return any(phrase in response_lower for phrase in completion_phrases)
     
     def create_game_design(self, conversation_history: List[Any], 
-                          book_analysis: BookAnalysis) -> Dict[str, Any]:
+                          book_analysis: BookAnalysis,
+                          callbacks: Optional[List[Any]] = None,
+                          history_summary: Optional[str] = None,
+                          discussion: Optional[str] = None) -> Dict[str, Any]:
         """
         Create a structured game design from the conversation.
         
         Args:
-            conversation_history: All design discussion messages
+            conversation_history: Design discussion messages (recent ones, verbatim)
+            book_analysis: The book analysis for context
+            callbacks: Optional LangChain callback handlers (e.g. call counting)
+            history_summary: Rolling summary of older messages left out of the history
+            discussion: Transcript of the book discussion before design began
+        
+        Returns:
+            dict: Structured game design
+        """
+        try:
+            # Ask the LLM to fill in the GameDesign schema
+            game_design = self.design_output.invoke(
+                self.extraction_llm,
+                [HumanMessage(content=self._design_prompt(conversation_history, book_analysis, history_summary, discussion))],
+                callbacks=callbacks
+            )
+            return {
+                "success": True,
+                "design": game_design.dict()
+            }
+        
+        except Exception as e:
+            # Log the error for debugging
+            print(f"ERROR in create_game_design: {str(e)}")
+            return self._fallback_design(book_analysis)
+    
+    async def acreate_game_design(self, conversation_history: List[Any],
+                                  book_analysis: BookAnalysis,
+                                  callbacks: Optional[List[Any]] = None,
+                                  history_summary: Optional[str] = None,
+                                  discussion: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async version of create_game_design() - awaits the LLM with ainvoke.
+        
+        Args:
+            conversation_history: Design discussion messages (recent ones, verbatim)
             book_analysis: The book analysis for context
+            callbacks: Optional LangChain callback handlers (e.g. call counting)
+            history_summary: Rolling summary of older messages left out of the history
+            discussion: Transcript of the book discussion before design began
         
         Returns:
             dict: Structured game design
         """
-        # Create a summary prompt with clear JSON structure
-        summary_prompt = f"""Based on our game design conversation for "{book_analysis.book.title}", 
+        try:
+            game_design = await self.design_output.ainvoke(
+                self.extraction_llm,
+                [HumanMessage(content=self._design_prompt(conversation_history, book_analysis, history_summary, discussion))],
+                callbacks=callbacks
+            )
+            return {
+                "success": True,
+                "design": game_design.dict()
+            }
+        
+        except Exception as e:
+            print(f"ERROR in acreate_game_design: {str(e)}")
+            return self._fallback_design(book_analysis)
+    
+    def _design_prompt(self, conversation_history: List[Any], book_analysis: BookAnalysis,
+                       history_summary: Optional[str] = None,
+                       discussion: Optional[str] = None) -> str:
+        """Build the prompt that asks for a structured game design."""
+        reader = f"\nWhat the Reader Said About the Book:\n{discussion}\n" if discussion else ""
+        return f"""Based on our game design conversation for "{book_analysis.book.title}", 
 create a complete game design specification.
 
 Book Context:
@@ -230,182 +410,107 @@ Book Context:
 - Author: {book_analysis.book.author}
 - Themes: {', '.join(book_analysis.themes)}
 - Characters: {', '.join([c.name for c in book_analysis.characters[:3]])}
-
+{reader}
 Design Conversation Summary:
-{self._summarize_conversation(conversation_history)}
-
-IMPORTANT: Return ONLY a valid JSON object with no other text, markdown, or explanations. Use this exact structure:
+{self._summarize_conversation(conversation_history, history_summary)}
 
-{{
-    "game_title": "string - creative game name",
-    "game_type": "platformer or top-down or obstacle-avoider",
-    "book_title": "{book_analysis.book.title}",
-    "theme": "string - visual theme",
-    "story_premise": "string - 1-2 sentence game story",
-    "mechanics": {{
-        "player_movement": "string - how to control",
-        "primary_action": "string - main gameplay action",
-        "win_condition": "string - how to win",
-        "difficulty": "easy or medium or hard"
-    }},
-    "player_character": {{
-        "name": "string - character name from book",
-        "type": "player",
-        "appearance": "string - how they look",
-        "behavior": "string - how they move/act",
-        "story_connection": "string - connection to book"
-    }},
-    "collectibles": [
-        {{
-            "name": "string - item name from book",
-            "type": "collectible",
-            "appearance": "string - visual description",
-            "behavior": "string - what happens when collected",
-            "story_connection": "string - importance in book"
-        }}
-    ],
-    "obstacles": [
-        {{
-            "name": "string - obstacle name from book",
-            "type": "obstacle",
-            "appearance": "string - visual description",
-            "behavior": "string - what it does to player",
-            "story_connection": "string - role in book story"
-        }}
-    ],
-    "level_design": "string - description of level layout",
-    "visual_style": "string - art style",
-    "scoring": {{"item_collected": 10, "level_complete": 100}}
-}}
+Record the design by calling the GameDesign tool. Use "{book_analysis.book.title}" as book_title,
+one of platformer, top-down or obstacle-avoider as game_type, and names from the book for the
+player character, collectibles and obstacles. scoring maps actions to points,
+e.g. {{"item_collected": 10, "level_complete": 100}}.
 
 Make sure collectibles and obstacles arrays have at least one item each based on the book's story."""
-
-        try:
-            # Ask the LLM to create structured design
-            response = self.llm.invoke([HumanMessage(content=summary_prompt)])
-            
-            # Extract JSON from response (handle markdown code blocks and extra text)
-            import json
-            import re
-            
-            content = response.content
-            
-            # Try to extract JSON from markdown code block first
-            json_match = re.search(r'```(?:json)?\s*(\{{.*?\}})\s*```', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_match = re.search(r'\{{.*\}}', content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    json_str = content
-            
-            design_data = json.loads(json_str)
-            
-            # Validate with Pydantic
-            game_design = GameDesign(**design_data)
-            
-            return {
-                "success": True,
-                "design": game_design.dict()
-            }
+    
+    def _fallback_design(self, book_analysis: BookAnalysis) -> Dict[str, Any]:
+        """Build a playable design from the book analysis when the LLM output can't be used."""
+        # Improved fallback with actual collectibles and obstacles
+        # Extract useful info from book analysis
+        character_name = book_analysis.characters[0].name if book_analysis.characters else "Hero"
+        theme = book_analysis.themes[0] if book_analysis.themes else "adventure"
         
-        except Exception as e:
-            # Log the error for debugging
-            print(f"ERROR in create_game_design: {str(e)}")
-            if 'response' in locals():
-                print(f"LLM Response: {response.content[:500]}...")
-            
-            # Improved fallback with actual collectibles and obstacles
-            # Extract useful info from book analysis
-            character_name = book_analysis.characters[0].name if book_analysis.characters else "Hero"
-            theme = book_analysis.themes[0] if book_analysis.themes else "adventure"
-            
-            # Try to find collectibles and obstacles from game_elements
-            collectible_items = []
-            obstacle_items = []
-            
-            for element in book_analysis.game_elements[:5]:
-                if any(word in element.description.lower() for word in ['collect', 'find', 'get', 'treasure', 'food', 'item']):
-                    collectible_items.append(element)
-                elif any(word in element.description.lower() for word in ['danger', 'avoid', 'enemy', 'bad', 'scary']):
-                    obstacle_items.append(element)
-            
-            # Build fallback collectibles
-            fallback_collectibles = []
-            if collectible_items:
-                for item in collectible_items[:2]:
-                    fallback_collectibles.append({
-                        "name": item.name,
-                        "type": "collectible",
-                        "appearance": f"Golden {item.name.lower()}",
-                        "behavior": "Give points when collected",
-                        "story_connection": item.description
-                    })
-            else:
+        # Try to find collectibles and obstacles from game_elements
+        collectible_items = []
+        obstacle_items = []
+        
+        for element in book_analysis.game_elements[:5]:
+            if any(word in element.description.lower() for word in ['collect', 'find', 'get', 'treasure', 'food', 'item']):
+                collectible_items.append(element)
+            elif any(word in element.description.lower() for word in ['danger', 'avoid', 'enemy', 'bad', 'scary']):
+                obstacle_items.append(element)
+        
+        # Build fallback collectibles
+        fallback_collectibles = []
+        if collectible_items:
+            for item in collectible_items[:2]:
                 fallback_collectibles.append({
-                    "name": "Story Items",
+                    "name": item.name,
                     "type": "collectible",
-                    "appearance": "Glowing golden objects",
+                    "appearance": f"Golden {item.name.lower()}",
                     "behavior": "Give points when collected",
-                    "story_connection": f"Important items from {book_analysis.book.title}"
+                    "story_connection": item.description
                 })
-            
-            # Build fallback obstacles
-            fallback_obstacles = []
-            if obstacle_items:
-                for item in obstacle_items[:2]:
-                    fallback_obstacles.append({
-                        "name": item.name,
-                        "type": "obstacle",
-                        "appearance": f"Red {item.name.lower()}",
-                        "behavior": "End game on contact",
-                        "story_connection": item.description
-                    })
-            else:
+        else:
+            fallback_collectibles.append({
+                "name": "Story Items",
+                "type": "collectible",
+                "appearance": "Glowing golden objects",
+                "behavior": "Give points when collected",
+                "story_connection": f"Important items from {book_analysis.book.title}"
+            })
+        
+        # Build fallback obstacles
+        fallback_obstacles = []
+        if obstacle_items:
+            for item in obstacle_items[:2]:
                 fallback_obstacles.append({
-                    "name": "Hazards",
+                    "name": item.name,
                     "type": "obstacle",
-                    "appearance": "Red dangerous objects",
+                    "appearance": f"Red {item.name.lower()}",
                     "behavior": "End game on contact",
-                    "story_connection": f"Challenges from {book_analysis.book.title}"
+                    "story_connection": item.description
                 })
-            
-            return {
-                "success": True,
-                "design": {
-                    "game_title": f"{book_analysis.book.title} Adventure",
-                    "game_type": "platformer",
-                    "book_title": book_analysis.book.title,
-                    "theme": f"{theme.capitalize()} themed adventure",
-                    "story_premise": f"Help {character_name} collect items and avoid obstacles in this {theme} adventure!",
-                    "mechanics": {
-                        "player_movement": "Arrow keys to move left/right, UP to jump",
-                        "primary_action": "Jump and collect items",
-                        "win_condition": "Collect all items without hitting obstacles",
-                        "difficulty": "medium"
-                    },
-                    "player_character": {
-                        "name": character_name,
-                        "type": "player",
-                        "appearance": f"Friendly {character_name}",
-                        "behavior": "Runs and jumps through the level",
-                        "story_connection": f"The main character from {book_analysis.book.title}"
-                    },
-                    "collectibles": fallback_collectibles,
-                    "obstacles": fallback_obstacles,
-                    "level_design": "Multi-level platforms with items scattered throughout",
-                    "visual_style": "Colorful and playful",
-                    "scoring": {"item": 10, "complete": 100}
-                }
+        else:
+            fallback_obstacles.append({
+                "name": "Hazards",
+                "type": "obstacle",
+                "appearance": "Red dangerous objects",
+                "behavior": "End game on contact",
+                "story_connection": f"Challenges from {book_analysis.book.title}"
+            })
+        
+        return {
+            "success": True,
+            "design": {
+                "game_title": f"{book_analysis.book.title} Adventure",
+                "game_type": "platformer",
+                "book_title": book_analysis.book.title,
+                "theme": f"{theme.capitalize()} themed adventure",
+                "story_premise": f"Help {character_name} collect items and avoid obstacles in this {theme} adventure!",
+                "mechanics": {
+                    "player_movement": "Arrow keys to move left/right, UP to jump",
+                    "primary_action": "Jump and collect items",
+                    "win_condition": "Collect all items without hitting obstacles",
+                    "difficulty": "medium"
+                },
+                "player_character": {
+                    "name": character_name,
+                    "type": "player",
+                    "appearance": f"Friendly {character_name}",
+                    "behavior": "Runs and jumps through the level",
+                    "story_connection": f"The main character from {book_analysis.book.title}"
+                },
+                "collectibles": fallback_collectibles,
+                "obstacles": fallback_obstacles,
+                "level_design": "Multi-level platforms with items scattered throughout",
+                "visual_style": "Colorful and playful",
+                "scoring": {"item": 10, "complete": 100}
             }
+        }
     
-    def _summarize_conversation(self, history: List[Any]) -> str:
+    def _summarize_conversation(self, history: List[Any], history_summary: Optional[str] = None) -> str:
         """Create a summary of the design conversation."""
-        messages = []
-        for msg in history[-10:]:  # Last 10 messages
+        messages = [f"Earlier (summary):\n{history_summary}\n"] if history_summary else []
+        for msg in history:
             if isinstance(msg, HumanMessage):
                 messages.append(f"User: {msg.content}")
             elif isinstance(msg, AIMessage):
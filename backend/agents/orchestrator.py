@@ -14,15 +14,35 @@ This demonstrates:
 - Phase transitions
 - Data passing between agents
 """
+import os
+import time
+import uuid
 from typing import Dict, Any, List, Optional
 from enum import Enum
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, messages_from_dict, messages_to_dict
 
 from agents.story_analyst import get_story_analyst
 from agents.game_designer import get_game_designer
 from agents.code_generator import get_code_generator
 from schemas.book_schema import BookInfo, BookAnalysis
 from schemas.game_schema import GameDesign
+from services.llm_metrics import LLMCallCounter, record_turn
+from services.conversation_recorder import get_conversation_recorder
+from services.game_store import get_game_store
+from services.context_builder import get_context_builder
+from services.analysis_cache import get_analysis_cache
+from services.book_catalog import get_book_catalog
+from services.speculative import get_speculative_analyzer
+
+
+# Longest wait for a still-running background analysis at the end of discussion
+SPECULATIVE_WAIT_SECONDS = float(os.getenv("SPECULATIVE_WAIT_SECONDS", "30"))
+
+# Build games on the background build queue instead of inside the request
+BUILD_IN_BACKGROUND = os.getenv("BUILD_QUEUE", "true").lower() == "true"
+
+# A build not reported back after this long is assumed lost and requested again
+BUILD_STALE_SECONDS = float(os.getenv("BUILD_STALE_SECONDS", "600"))
 
 
 class Phase(Enum):
@@ -50,8 +70,26 @@ class GameOrchestrator:
         # Data collected through the workflow
         self.book_info: Optional[BookInfo] = None
         self.book_analysis: Optional[BookAnalysis] = None
+        # What the child said about the book, carried into game design
+        self.discussion: Optional[str] = None
         self.game_design: Optional[Dict] = None
-        self.game_html: Optional[str] = None
+        # The finished game, by its hash in the game store
+        self.game_hash: Optional[str] = None
+        
+        # Background build job for this session: job_id, status, requested_at
+        self.build_job: Optional[Dict[str, Any]] = None
+        
+        # Whether a background book analysis was started for this session
+        self.speculative_pending = False
+        
+        # Rolling summaries of older messages, per history stream ("story", "design")
+        self.context_state: Dict[str, Dict[str, Any]] = {}
+        
+        # Counts the LLM calls made by the turn in progress
+        self._call_counter = LLMCallCounter()
+        
+        # Anonymous id for conversation recordings (not the session id)
+        self.recording_id = uuid.uuid4().hex
         
         # Initialize agents (lazy loading)
         self._story_analyst = None
@@ -94,7 +132,7 @@ class GameOrchestrator:
             "agent": "story_analyst"
         }
     
-    def process_message(self, user_message: str) -> Dict[str, Any]:
+    def process_message(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Process a user message through the appropriate agent.
         
@@ -106,58 +144,245 @@ class GameOrchestrator:
         
         Args:
             user_message: What the user said/typed
+            callbacks: Optional LangChain callback handlers for the conversational
+                agent call (e.g. to stream tokens)
         
         Returns:
             dict: Agent response, current phase, and any generated data
         """
+        callbacks = self._start_turn(callbacks, user_message)
+        
         # Add user message to history
         self.conversation_history.append(HumanMessage(content=user_message))
         
         # Route to appropriate agent based on phase
         if self.phase in [Phase.IDENTIFYING, Phase.DISCUSSING]:
-            response = self._handle_story_phase(user_message)
+            response = self._handle_story_phase(user_message, callbacks)
         
         elif self.phase == Phase.DESIGNING:
-            response = self._handle_design_phase(user_message)
+            response = self._handle_design_phase(user_message, callbacks)
         
         elif self.phase == Phase.GENERATING:
             response = self._handle_generation_phase(user_message)
         
-        elif self.phase == Phase.COMPLETE:
-            response = {
+        else:
+            response = self._handle_other_phase()
+        
+        return self._record_response(response)
+    
+    async def aprocess_message(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Async version of process_message().
+        
+        Awaits the LLM calls instead of blocking on them, so one event loop
+        can keep many conversations in flight at once.
+        
+        Args:
+            user_message: What the user said/typed
+            callbacks: Optional LangChain callback handlers for the conversational
+                agent call (e.g. to stream tokens)
+        
+        Returns:
+            dict: Agent response, current phase, and any generated data
+        """
+        callbacks = self._start_turn(callbacks, user_message)
+        self.conversation_history.append(HumanMessage(content=user_message))
+        
+        if self.phase in [Phase.IDENTIFYING, Phase.DISCUSSING]:
+            response = await self._ahandle_story_phase(user_message, callbacks)
+        
+        elif self.phase == Phase.DESIGNING:
+            response = await self._ahandle_design_phase(user_message, callbacks)
+        
+        elif self.phase == Phase.GENERATING:
+            # Template rendering only - no LLM wait to offload
+            response = self._handle_generation_phase(user_message)
+        
+        else:
+            response = self._handle_other_phase()
+        
+        return self._record_response(response)
+    
+    def _handle_other_phase(self) -> Dict[str, Any]:
+        """Respond when no agent needs to run (game complete or unknown phase)."""
+        if self.phase == Phase.COMPLETE:
+            return {
                 "message": "Your game is ready! Would you like to play it or create another one?",
                 "phase": self.phase.value,
                 "is_complete": True
             }
         
-        else:
-            response = {
-                "message": "Something went wrong. Let's start over!",
-                "phase": Phase.IDENTIFYING.value
-            }
-        
-        # Add agent response to history
+        return {
+            "message": "Something went wrong. Let's start over!",
+            "phase": Phase.IDENTIFYING.value
+        }
+    
+    def _start_turn(self, callbacks: Optional[List[Any]], user_message: str) -> List[Any]:
+        """Reset the LLM call counter (recording the turn if sampled) and add it to the callbacks."""
+        self._call_counter = get_conversation_recorder().call_counter(
+            self.recording_id, user_message, self.phase.value
+        )
+        return list(callbacks or []) + [self._call_counter]
+    
+    def _record_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the agent's response to the conversation history and return it."""
         if response.get("message"):
             self.conversation_history.append(AIMessage(content=response["message"]))
         
+        # Report how many Claude calls (and tokens) this turn cost
+        response["llm_calls"] = self._call_counter.calls
+        response["llm_usage"] = self._call_counter.totals()
+        record_turn(self._call_counter.calls)
+        get_conversation_recorder().record_turn(self.recording_id, self._call_counter, response)
+        
         return response
     
-    def _handle_story_phase(self, user_message: str) -> Dict[str, Any]:
+    def _handle_story_phase(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Handle messages during book identification and discussion phase.
         
         Args:
             user_message: User's message
+            callbacks: Optional callback handlers for the agent call
         
         Returns:
             dict: Story Analyst's response
         """
-        # Process through Story Analyst
+        # A confident catalog match identifies the book without a model call
+        response, book_candidates = self._identify_from_catalog(user_message)
+        if response is not None:
+            return response
+        
+        # Process through Story Analyst with the history fitted to its budget
+        context = self._build_context(
+            "story",
+            self.conversation_history[:-1],  # Exclude the message we just added
+            "story_analyst",
+            "conversation"
+        )
         result = self.story_analyst.process_message(
             user_message,
-            self.conversation_history[:-1]  # Exclude the message we just added
+            context["messages"],
+            callbacks=callbacks,
+            history_summary=context["summary"],
+            book_candidates=book_candidates
+        )
+        
+        if self._needs_book_info(result):
+            result["book_info"] = self._book_info_from_reply(result["message"])
+            if result["book_info"] is None:
+                # A quoted title in a phrasing the patterns miss - ask the classification model
+                result["book_info"] = self._canonical_book_info(self.story_analyst.extract_book_info(
+                    result["message"], callbacks=[self._call_counter]))
+        
+        response, needs_analysis = self._apply_story_result(result)
+        
+        if needs_analysis:
+            # Use the background analysis, or another session's, if there is one
+            analysis_result, seed = self._prepared_analysis_result()
+            shareable = False
+            if analysis_result is None:
+                context = self._analysis_context(seed)
+                analysis_result = self.story_analyst.create_book_analysis(
+                    context["messages"],
+                    self.book_info,
+                    callbacks=[self._call_counter],
+                    history_summary=context["summary"],
+                    seed=seed
+                )
+                shareable = context["shareable"]
+            self._apply_book_analysis(response, analysis_result, shareable)
+        
+        return response
+    
+    async def _ahandle_story_phase(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Async version of _handle_story_phase()."""
+        response, book_candidates = self._identify_from_catalog(user_message)
+        if response is not None:
+            return response
+        
+        context = self._build_context("story", self.conversation_history[:-1], "story_analyst", "conversation")
+        result = await self.story_analyst.aprocess_message(
+            user_message,
+            context["messages"],
+            callbacks=callbacks,
+            history_summary=context["summary"],
+            book_candidates=book_candidates
         )
         
+        if self._needs_book_info(result):
+            result["book_info"] = self._book_info_from_reply(result["message"])
+            if result["book_info"] is None:
+                result["book_info"] = self._canonical_book_info(await self.story_analyst.aextract_book_info(
+                    result["message"], callbacks=[self._call_counter]))
+        
+        response, needs_analysis = self._apply_story_result(result)
+        
+        if needs_analysis:
+            analysis_result, seed = await self._aprepared_analysis_result()
+            shareable = False
+            if analysis_result is None:
+                context = self._analysis_context(seed)
+                analysis_result = await self.story_analyst.acreate_book_analysis(
+                    context["messages"],
+                    self.book_info,
+                    callbacks=[self._call_counter],
+                    history_summary=context["summary"],
+                    seed=seed
+                )
+                shareable = context["shareable"]
+            self._apply_book_analysis(response, analysis_result, shareable)
+        
+        return response
+    
+    def _identify_from_catalog(self, user_message: str):
+        """
+        Try to identify the book from the bundled catalog.
+        
+        Only used in the IDENTIFYING phase. On a match the book is confirmed
+        with the same question the Story Analyst asks, and the conversation
+        moves on to discussion. A message that could be several books (a
+        series or an author) stays with the Story Analyst, which is given
+        the candidates so it can ask which one.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            tuple: (confirmation response, or None to fall back to the Story
+                    Analyst; candidate books for an ambiguous message, or None)
+        """
+        if self.phase != Phase.IDENTIFYING:
+            return None, None
+        
+        catalog = get_book_catalog()
+        match = catalog.lookup(user_message) if catalog else None
+        if match is None:
+            return None, None
+        if "candidates" in match:
+            return None, [catalog.book_info(candidate) for candidate in match["candidates"]]
+        
+        book_info = catalog.book_info(match)
+        self.book_info = book_info
+        self.phase = Phase.DISCUSSING
+        self._start_speculative_analysis()
+        return {
+            "message": f"Ooh, I know that one! 📚 Is that '{book_info.title}' by {book_info.author}?",
+            "phase": self.phase.value,
+            "agent": "story_analyst",
+            "book_info": book_info.dict()
+        }, None
+    
+    def _apply_story_result(self, result: Dict[str, Any]):
+        """
+        Turn a Story Analyst result into a response and handle identification.
+        
+        Args:
+            result: Result from StoryAnalystAgent.process_message()
+        
+        Returns:
+            tuple: (response dict, whether a book analysis should be created now)
+        """
         if not result.get("success"):
             # Log the actual error for debugging
             error_msg = result.get("error", "Unknown error")
@@ -167,7 +392,7 @@ class GameOrchestrator:
                 "phase": self.phase.value,
                 "agent": "story_analyst",
                 "error": error_msg  # Include error in response for debugging
-            }
+            }, False
         
         response = {
             "message": result["message"],
@@ -176,78 +401,299 @@ class GameOrchestrator:
         }
         
         # Check if we've moved from identifying to discussing
-        if self.phase == Phase.IDENTIFYING and result.get("book_identified"):
-            # Extract book info from the conversation
-            self.book_info = self._extract_book_info(result["message"])
+        if self._needs_book_info(result):
+            # Book info extracted from the agent's confirmation message
+            self.book_info = result.get("book_info")
             self.phase = Phase.DISCUSSING
             response["phase"] = self.phase.value
             response["book_info"] = self.book_info.dict() if self.book_info else None
+            self._start_speculative_analysis()
         
         # Check if discussion is complete
-        if result.get("is_complete"):
-            # Create book analysis
-            if self.book_info:
-                analysis_result = self.story_analyst.create_book_analysis(
-                    self.conversation_history,
-                    self.book_info
-                )
-                
-                if analysis_result.get("success"):
-                    self.book_analysis = BookAnalysis(**analysis_result["analysis"])
-                    
-                    # Transition to game design phase
-                    self.phase = Phase.DESIGNING
-                    response["phase"] = self.phase.value
-                    
-                    # Create a friendly transition message
-                    book_title = self.book_info.title
-                    transition_msg = (
-                        f"\n\n✨ Awesome! I've learned so much about '{book_title}'!\n\n"
-                        f"Now let's switch gears and design your game! 🎮"
-                    )
-                    
-                    # Get Game Designer's initial greeting
-                    design_greeting = self.game_designer.get_initial_greeting(self.book_analysis)
-                    response["message"] += transition_msg + "\n\n" + design_greeting
-                    response["is_complete"] = False  # Not fully complete, just transitioning
-            else:
-                # No book info - shouldn't happen, but handle gracefully
-                response["message"] += "\n\nHmm, I need to know which book we're discussing first. What book did you read?"
-                self.phase = Phase.IDENTIFYING
-                response["phase"] = self.phase.value
+        if not result.get("is_complete"):
+            return response, False
         
-        return response
+        if not self.book_info:
+            # No book info - shouldn't happen, but handle gracefully
+            response["message"] += "\n\nHmm, I need to know which book we're discussing first. What book did you read?"
+            self.phase = Phase.IDENTIFYING
+            response["phase"] = self.phase.value
+            return response, False
+        
+        return response, True
+    
+    def _needs_book_info(self, result: Dict[str, Any]) -> bool:
+        """
+        Whether a Story Analyst result identifies the book we're still looking for.
+        
+        book_identified is only set for a reply with a quoted title followed
+        by "by", so the classification call behind it never runs for replies
+        that don't name a book.
+        """
+        return bool(result.get("success")) and self.phase == Phase.IDENTIFYING and bool(result.get("book_identified"))
     
-    def _handle_design_phase(self, user_message: str) -> Dict[str, Any]:
+    def _start_speculative_analysis(self) -> None:
+        """Start analyzing the just-identified book in the background."""
+        analyzer = get_speculative_analyzer()
+        if analyzer and self.book_info:
+            self.speculative_pending = analyzer.start(self.book_info, self.conversation_history)
+    
+    def cancel_speculative_analysis(self) -> None:
+        """Withdraw from this session's background analysis (e.g. when the session is abandoned)."""
+        analyzer = get_speculative_analyzer()
+        if analyzer and self.speculative_pending and self.book_info:
+            analyzer.cancel(self.book_info)
+        self.speculative_pending = False
+    
+    def _prepared_analysis_result(self):
+        """
+        Find an analysis that is already done (or underway) for the identified book.
+        
+        Returns:
+            tuple: (analysis result to use as-is or None, seed analysis to refine or None)
+        """
+        speculative = None
+        analyzer = get_speculative_analyzer()
+        if analyzer and self.speculative_pending:
+            self.speculative_pending = False
+            speculative = analyzer.claim(self.book_info, timeout=SPECULATIVE_WAIT_SECONDS)
+        return self._reuse_or_seed(speculative)
+    
+    async def _aprepared_analysis_result(self):
+        """Async version of _prepared_analysis_result()."""
+        speculative = None
+        analyzer = get_speculative_analyzer()
+        if analyzer and self.speculative_pending:
+            self.speculative_pending = False
+            speculative = await analyzer.aclaim(self.book_info, timeout=SPECULATIVE_WAIT_SECONDS)
+        return self._reuse_or_seed(speculative)
+    
+    def _reuse_or_seed(self, speculative: Optional[Dict[str, Any]]):
+        """
+        Decide how to use a prepared analysis (speculative, else cached).
+        
+        With ANALYSIS_CACHE_MODE=reuse (the default) it is used as-is and
+        no LLM call is made - the discussion reaches the Game Designer
+        through self.discussion instead. With refine it seeds an LLM call
+        that folds the discussion into the analysis, which puts that call
+        back in front of the transition.
+        
+        Args:
+            speculative: Claimed speculative analysis result, if any
+        
+        Returns:
+            tuple: (analysis result to use as-is or None, seed analysis to refine or None)
+        """
+        if speculative is not None:
+            cached = BookAnalysis(**speculative["analysis"])
+        else:
+            cache = get_analysis_cache()
+            cached = cache.get(self.book_info) if cache else None
+        if cached is None:
+            return None, None
+        get_conversation_recorder().record_prepared_analysis(
+            self._call_counter, "speculative" if speculative is not None else "cache", cached.dict()
+        )
+        
+        if self._refine_analyses():
+            return None, cached
+        
+        analysis = cached.copy(update={"book": self.book_info})
+        return {"success": True, "cached": True, "analysis": analysis.dict()}, None
+    
+    @staticmethod
+    def _refine_analyses() -> bool:
+        """Whether book analyses fold in the discussion (ANALYSIS_CACHE_MODE=refine)."""
+        return os.getenv("ANALYSIS_CACHE_MODE", "reuse").lower() == "refine"
+    
+    def _analysis_context(self, seed: Optional[BookAnalysis]) -> Dict[str, Any]:
+        """
+        Pick the history for a book analysis made at the transition.
+        
+        Unless analyses are refined, the analysis is made from the book
+        alone - the discussion reaches the Game Designer separately - so
+        it is the same for every session and can go in the shared cache.
+        An analysis made from the discussion describes one child's
+        conversation and must never be shared.
+        
+        Args:
+            seed: Prepared analysis to refine, if any
+        
+        Returns:
+            dict: summary and messages for create_book_analysis(), and
+                  whether the result may be shared across sessions
+        """
+        if seed is None and not self._refine_analyses():
+            return {"summary": None, "messages": [], "shareable": True}
+        context = self._build_context("story", self.conversation_history, "story_analyst", "analysis")
+        return {**context, "shareable": False}
+    
+    def _apply_book_analysis(self, response: Dict[str, Any], analysis_result: Dict[str, Any],
+                             shareable: bool = False) -> None:
+        """
+        Store a finished book analysis and transition to game design.
+        
+        The discussion so far is kept as a budgeted transcript for the Game
+        Designer, so a prepared analysis that never saw it can be used as-is.
+        
+        Args:
+            response: Response being built for this turn (updated in place)
+            analysis_result: Result from StoryAnalystAgent.create_book_analysis()
+            shareable: Whether the analysis is session-neutral and may be
+                cached for other sessions
+        """
+        if not analysis_result.get("success"):
+            return
+        
+        self.book_analysis = BookAnalysis(**analysis_result["analysis"])
+        self.discussion = get_context_builder().transcript(
+            self.conversation_history,
+            self.context_state.setdefault("story", {}),
+            "game_designer",
+            "discussion"
+        ) or None
+        
+        # Share session-neutral analyses with future sessions (not placeholders)
+        cache = get_analysis_cache()
+        if cache and shareable and not analysis_result.get("fallback"):
+            cache.put(self.book_info, self.book_analysis)
+        
+        # Transition to game design phase
+        self.phase = Phase.DESIGNING
+        response["phase"] = self.phase.value
+        
+        # Create a friendly transition message
+        book_title = self.book_info.title
+        transition_msg = (
+            f"\n\n✨ Awesome! I've learned so much about '{book_title}'!\n\n"
+            f"Now let's switch gears and design your game! 🎮"
+        )
+        
+        # Get Game Designer's initial greeting
+        design_greeting = self.game_designer.get_initial_greeting(self.book_analysis)
+        response["message"] += transition_msg + "\n\n" + design_greeting
+        response["is_complete"] = False  # Not fully complete, just transitioning
+    
+    def _handle_design_phase(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Handle messages during game design phase using Game Designer agent.
         
         Args:
             user_message: User's message
+            callbacks: Optional callback handlers for the agent call
         
         Returns:
             dict: Game Designer's response
         """
-        # Get the design conversation history (exclude earlier phases)
+        # Process through Game Designer agent with the history fitted to its budget
+        design_history = self._design_history()
+        context = self._build_context(
+            "design",
+            design_history[:-1],  # Exclude the message we just added
+            "game_designer",
+            "conversation"
+        )
+        result = self.game_designer.process_message(
+            user_message,
+            context["messages"],
+            self.book_analysis,
+            callbacks=callbacks,
+            history_summary=context["summary"],
+            discussion=self.discussion
+        )
+        
+        response, needs_design = self._apply_design_result(result)
+        
+        if needs_design and BUILD_IN_BACKGROUND:
+            # The caller queues the build (see build_inputs() and build_game())
+            self._request_build(response)
+        
+        elif needs_design:
+            context = self._build_context("design", design_history, "game_designer", "design")
+            design_result = self.game_designer.create_game_design(
+                context["messages"],
+                self.book_analysis,
+                callbacks=[self._call_counter],
+                history_summary=context["summary"],
+                discussion=self.discussion
+            )
+            self._apply_game_design(response, design_result)
+        
+        return response
+    
+    async def _ahandle_design_phase(self, user_message: str, callbacks: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Async version of _handle_design_phase()."""
+        design_history = self._design_history()
+        context = self._build_context("design", design_history[:-1], "game_designer", "conversation")
+        result = await self.game_designer.aprocess_message(
+            user_message,
+            context["messages"],
+            self.book_analysis,
+            callbacks=callbacks,
+            history_summary=context["summary"],
+            discussion=self.discussion
+        )
+        
+        response, needs_design = self._apply_design_result(result)
+        
+        if needs_design and BUILD_IN_BACKGROUND:
+            self._request_build(response)
+        
+        elif needs_design:
+            context = self._build_context("design", design_history, "game_designer", "design")
+            design_result = await self.game_designer.acreate_game_design(
+                context["messages"],
+                self.book_analysis,
+                callbacks=[self._call_counter],
+                history_summary=context["summary"],
+                discussion=self.discussion
+            )
+            self._apply_game_design(response, design_result)
+        
+        return response
+    
+    def _build_context(self, stream: str, messages: List[Any], agent: str, call_type: str) -> Dict[str, Any]:
+        """
+        Fit a history into the token budget for one agent call.
+        
+        Args:
+            stream: Which history this is ("story" or "design") - each keeps
+                its own rolling summary
+            messages: The full history for the call
+            agent: Agent making the call
+            call_type: Kind of call ("conversation", "analysis" or "design")
+        
+        Returns:
+            dict: Rolling summary of older messages and the recent messages to send
+        """
+        state = self.context_state.setdefault(stream, {})
+        return get_context_builder().build(messages, state, agent, call_type)
+    
+    def _design_history(self) -> List[Any]:
+        """Get the design conversation history (exclude earlier phases)."""
         design_history = []
         for msg in self.conversation_history:
             # Only include messages from the design phase
             if len(design_history) > 0 or isinstance(msg, AIMessage) and "game" in msg.content.lower():
                 design_history.append(msg)
+        return design_history
+    
+    def _apply_design_result(self, result: Dict[str, Any]):
+        """
+        Turn a Game Designer result into a response.
         
-        # Process through Game Designer agent
-        result = self.game_designer.process_message(
-            user_message,
-            design_history[:-1],  # Exclude the message we just added
-            self.book_analysis
-        )
+        Args:
+            result: Result from GameDesignerAgent.process_message()
         
+        Returns:
+            tuple: (response dict, whether a game design should be created now)
+        """
         if not result.get("success"):
             return {
                 "message": result.get("message", "Sorry, I had trouble with that. Could you try again?"),
                 "phase": self.phase.value,
                 "agent": "game_designer"
-            }
+            }, False
         
         response = {
             "message": result["message"],
@@ -256,48 +702,207 @@ class GameOrchestrator:
         }
         
         # Check if design is complete
-        if result.get("is_complete"):
-            # Create game design
-            if self.book_analysis:
-                design_result = self.game_designer.create_game_design(
-                    self.conversation_history,
-                    self.book_analysis
-                )
-                
-                if design_result.get("success"):
-                    self.game_design = design_result["design"]
-                    
-                    # Transition to generation phase and build immediately
-                    self.phase = Phase.GENERATING
-                    response["message"] += "\n\n🔨 Awesome! Now I'm going to build your game. This will take just a minute..."
-                    
-                    # Generate the game immediately (don't wait for another user message)
-                    generation_result = self.code_generator.generate_game(self.game_design)
-                    
-                    if generation_result.get("success"):
-                        # Store the generated HTML
-                        self.game_html = generation_result["html"]
-                        self.phase = Phase.COMPLETE
-                        
-                        game_title = generation_result.get("game_title", "Your Game")
-                        
-                        # Add completion message
-                        response["message"] += f"\n\n🎉 '{game_title}' is ready! Your game has been generated and is ready to play!"
-                        response["phase"] = self.phase.value
-                        response["is_complete"] = True
-                        response["game_data"] = {
-                            "ready": True,
-                            "game_title": game_title,
-                            "game_html": self.game_html
-                        }
-                    else:
-                        # Generation failed
-                        error_message = generation_result.get("error", "Unknown error")
-                        response["message"] += f"\n\n❌ Sorry, there was an error generating the game: {error_message}"
-                        response["phase"] = self.phase.value
+        return response, bool(result.get("is_complete") and self.book_analysis)
+    
+    def _request_build(self, response: Dict[str, Any]) -> None:
+        """
+        Move to the generation phase and ask the caller to queue a build.
         
+        Args:
+            response: Response being built for this turn (updated in place)
+        """
+        self.phase = Phase.GENERATING
+        self.build_job = {"job_id": None, "status": "queued", "requested_at": time.time()}
+        response["phase"] = self.phase.value
+        response["message"] += "\n\n🔨 Awesome! Now I'm going to build your game. This will take just a minute..."
+        response["build_requested"] = True
+    
+    def build_inputs(self) -> Dict[str, Any]:
+        """
+        Snapshot everything a background build needs.
+        
+        Returns:
+            dict: Budgeted design conversation, its summary, the book analysis,
+                  the book discussion and the conversation's recording id
+        """
+        context = self._build_context("design", self._design_history(), "game_designer", "design")
+        return {
+            "messages": context["messages"],
+            "history_summary": context["summary"],
+            "book_analysis": self.book_analysis,
+            "discussion": self.discussion,
+            "recording_id": self.recording_id
+        }
+    
+    @staticmethod
+    def build_game(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create the game design and generate the game (runs on a build worker).
+        
+        Args:
+            inputs: Snapshot from build_inputs()
+        
+        Returns:
+            dict: success, design, hash, game_title, llm_calls and error
+        """
+        recorder = get_conversation_recorder()
+        counter = recorder.call_counter(inputs.get("recording_id"), "", Phase.GENERATING.value, kind="build")
+        design_result = get_game_designer().create_game_design(
+            inputs["messages"],
+            inputs["book_analysis"],
+            callbacks=[counter],
+            history_summary=inputs["history_summary"],
+            discussion=inputs.get("discussion")
+        )
+        recorder.record_turn(inputs.get("recording_id"), counter, {"phase": Phase.GENERATING.value})
+        if not design_result.get("success"):
+            return {"success": False, "error": design_result.get("error", "Could not design the game"),
+                    "llm_calls": counter.calls}
+        
+        generation_result = get_code_generator().generate_game(design_result["design"])
+        return {
+            **generation_result,
+            "design": design_result["design"],
+            "llm_calls": counter.calls
+        }
+    
+    def start_build_job(self, job_id: str) -> None:
+        """Record the ID of the build job queued for this session."""
+        self.build_job = {"job_id": job_id, "status": "queued", "requested_at": time.time()}
+    
+    def build_pending(self) -> bool:
+        """Whether a background build has been requested and not yet reported back."""
+        return bool(self.build_job) and self.build_job.get("status") == "queued"
+    
+    def finish_build(self, job_id: str, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Apply the outcome of a background build.
+        
+        Args:
+            job_id: The finished job
+            result: Result from build_game() (None if the build crashed)
+        
+        Returns:
+            dict: Completion response (as from process_message), or None if
+                  the job is not this session's current build
+        """
+        if not self.build_pending() or self.build_job.get("job_id") != job_id:
+            return None
+        
+        result = result or {"success": False, "error": "The build stopped unexpectedly"}
+        if result.get("design"):
+            self.game_design = result["design"]
+        
+        if result.get("success"):
+            self.game_hash = result["hash"]
+            self.phase = Phase.COMPLETE
+            game_title = result.get("game_title", "Your Game")
+            self.build_job = {"job_id": job_id, "status": "done", "game_title": game_title}
+            response = {
+                "message": f"🎉 '{game_title}' is ready! Your game has been generated and is ready to play!",
+                "phase": self.phase.value,
+                "agent": "code_generator",
+                "is_complete": True,
+                "game_data": self.game_data(game_title)
+            }
+        else:
+            error_message = result.get("error", "Unknown error")
+            self.build_job = {"job_id": job_id, "status": "failed", "error": error_message}
+            if not self.game_design:
+                # Nothing to retry from - let the designer wrap up again
+                self.phase = Phase.DESIGNING
+            response = {
+                "message": f"❌ Sorry, there was an error generating the game: {error_message}",
+                "phase": self.phase.value,
+                "agent": "code_generator"
+            }
+        
+        self.conversation_history.append(AIMessage(content=response["message"]))
         return response
     
+    def game_data(self, game_title: str) -> Dict[str, Any]:
+        """
+        Game data sent to the client once the game is ready.
+        
+        Only a reference to the game - the HTML itself is fetched from
+        its url, which never changes and can be cached forever (or from
+        /api/game/<session_id>, which always has the session's latest game).
+        
+        Args:
+            game_title: Title shown with the game
+        
+        Returns:
+            dict: ready, game_title, hash, size (bytes) and url of the game
+        """
+        return {
+            "ready": True,
+            "game_title": game_title,
+            "hash": self.game_hash,
+            "size": get_game_store().size(self.game_hash),
+            "url": f"/g/{self.game_hash}"
+        }
+    
+    def restore_game(self) -> bool:
+        """
+        Make sure this session's game is in the game store.
+        
+        A game the store collected (or that was stored on another host) is
+        re-rendered from the saved design - the same design renders the
+        same bytes, so it comes back under the same hash.
+        
+        Returns:
+            bool: Whether the game is available
+        """
+        store = get_game_store()
+        if self.game_hash and store.exists(self.game_hash):
+            return True
+        if not self.game_design:
+            return False
+        
+        result = self.code_generator.generate_game(self.game_design)
+        if not result.get("success"):
+            return False
+        self.game_hash = result["hash"]
+        return True
+    
+    def _apply_game_design(self, response: Dict[str, Any], design_result: Dict[str, Any]) -> None:
+        """
+        Store a finished game design and build the game right away.
+        
+        Args:
+            response: Response being built for this turn (updated in place)
+            design_result: Result from GameDesignerAgent.create_game_design()
+        """
+        if not design_result.get("success"):
+            return
+        
+        self.game_design = design_result["design"]
+        
+        # Transition to generation phase and build immediately
+        self.phase = Phase.GENERATING
+        response["message"] += "\n\n🔨 Awesome! Now I'm going to build your game. This will take just a minute..."
+        
+        # Generate the game immediately (don't wait for another user message)
+        generation_result = self.code_generator.generate_game(self.game_design)
+        
+        if generation_result.get("success"):
+            # Store the generated HTML
+            self.game_hash = generation_result["hash"]
+            self.phase = Phase.COMPLETE
+            
+            game_title = generation_result.get("game_title", "Your Game")
+            
+            # Add completion message
+            response["message"] += f"\n\n🎉 '{game_title}' is ready! Your game has been generated and is ready to play!"
+            response["phase"] = self.phase.value
+            response["is_complete"] = True
+            response["game_data"] = self.game_data(game_title)
+        else:
+            # Generation failed
+            error_message = generation_result.get("error", "Unknown error")
+            response["message"] += f"\n\n❌ Sorry, there was an error generating the game: {error_message}"
+            response["phase"] = self.phase.value
+    
     def _handle_generation_phase(self, user_message: str) -> Dict[str, Any]:
         """
         Handle the game generation phase using Code Generator agent.
@@ -306,8 +911,22 @@ class GameOrchestrator:
             user_message: User's message (usually not needed, auto-generates)
         
         Returns:
-            dict: Generation status with game HTML
+            dict: Generation status with the game's data (see game_data())
         """
+        if self.build_pending():
+            if time.time() - self.build_job.get("requested_at", 0) < BUILD_STALE_SECONDS:
+                return {
+                    "message": "Your game is still being built! 🔨 It'll be ready in just a moment.",
+                    "phase": self.phase.value,
+                    "agent": "code_generator",
+                    "build_job": self.build_job
+                }
+            
+            # The build was lost (e.g. its worker restarted) - ask for another
+            response = {"message": "Hmm, that build is taking too long. Let me try again!", "agent": "code_generator"}
+            self._request_build(response)
+            return response
+        
         if not self.game_design:
             return {
                 "message": "Error: No game design available. Please start over.",
@@ -320,7 +939,7 @@ class GameOrchestrator:
         
         if result.get("success"):
             # Store the generated HTML
-            self.game_html = result["html"]
+            self.game_hash = result["hash"]
             self.phase = Phase.COMPLETE
             
             game_title = result.get("game_title", "Your Game")
@@ -330,11 +949,7 @@ class GameOrchestrator:
                 "phase": self.phase.value,
                 "agent": "code_generator",
                 "is_complete": True,
-                "game_data": {
-                    "ready": True,
-                    "game_title": game_title,
-                    "game_html": self.game_html
-                }
+                "game_data": self.game_data(game_title)
             }
         else:
             error_message = result.get("error", "Unknown error")
@@ -378,16 +993,42 @@ class GameOrchestrator:
                 invalid_titles = ["re talking about", "m so", "ve confirmed", "s that", "t that"]
                 if (len(title) > 2 and len(author) > 2 and 
                     not any(invalid in title.lower() for invalid in invalid_titles)):
-                    return BookInfo(
+                    return self._canonical_book_info(BookInfo(
                         title=title,
                         author=author,
                         summary=f"A wonderful book by {author}"
-                    )
+                    ))
         
         # No valid match found - return None instead of fallback
         # This will be handled by the orchestrator
         return None
     
+    def _book_info_from_reply(self, agent_message: str) -> Optional[BookInfo]:
+        """
+        Find the book a confirmation names without a model call.
+        
+        Tries the usual confirmation patterns, then the catalog.
+        
+        Args:
+            agent_message: The agent's response
+        
+        Returns:
+            BookInfo: The named book, or None if neither recognizes it
+        """
+        book_info = self._extract_book_info(agent_message)
+        if book_info is None:
+            catalog = get_book_catalog()
+            book_info = catalog.identify(agent_message) if catalog else None
+        return book_info
+    
+    def _canonical_book_info(self, book_info: Optional[BookInfo]) -> Optional[BookInfo]:
+        """Prefer the catalog's canonical title and author when it knows the book."""
+        if book_info is None:
+            return None
+        catalog = get_book_catalog()
+        known = catalog.identify(f"{book_info.title} by {book_info.author}") if catalog else None
+        return known or book_info
+    
     def get_state(self) -> Dict[str, Any]:
         """
         Get the current state of the orchestrator.
@@ -400,7 +1041,7 @@ class GameOrchestrator:
             "book_info": self.book_info.dict() if self.book_info else None,
             "book_analysis": self.book_analysis.dict() if self.book_analysis else None,
             "game_design": self.game_design,
-            "game_html": self.game_html,
+            "game_hash": self.game_hash,
             "conversation_history": [
                 {
                     "role": "user" if isinstance(msg, HumanMessage) else "agent",
@@ -410,4 +1051,86 @@ class GameOrchestrator:
             ],
             "message_count": len(self.conversation_history)
         }
+    
+    def estimate_size(self) -> int:
+        """
+        Estimate the memory held by this session, in bytes.
+        
+        Counts the text that dominates a session (message history and
+        game design - the game itself lives in the game store) plus a fixed
+        overhead per message. Used by the session registry to enforce its
+        memory budget.
+        
+        Returns:
+            int: Approximate resident size in bytes
+        """
+        size = 1024  # Orchestrator and agent bookkeeping
+        for msg in self.conversation_history:
+            content = msg.content if isinstance(msg.content, str) else str(msg.content)
+            size += len(content.encode("utf-8")) + 512
+        if self.book_analysis:
+            size += len(self.book_analysis.json())
+        if self.discussion:
+            size += len(self.discussion)
+        if self.game_design:
+            size += len(str(self.game_design))
+        for state in self.context_state.values():
+            size += sum(len(line) for line in state.get("lines", []))
+        return size
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the orchestrator so it can be stored outside this process.
+        
+        Agents are not included - they are stateless singletons that are
+        lazily re-created in whichever worker loads the session.
+        
+        Returns:
+            dict: JSON-serializable snapshot of the workflow state
+        """
+        return {
+            "phase": self.phase.value,
+            "conversation_history": messages_to_dict(self.conversation_history),
+            "book_info": self.book_info.dict() if self.book_info else None,
+            "book_analysis": self.book_analysis.dict() if self.book_analysis else None,
+            "discussion": self.discussion,
+            "game_design": self.game_design,
+            "game_hash": self.game_hash,
+            "context_state": self.context_state,
+            "speculative_pending": self.speculative_pending,
+            "build_job": self.build_job,
+            "recording_id": self.recording_id
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GameOrchestrator":
+        """
+        Rebuild an orchestrator from a snapshot produced by to_dict().
+        
+        Args:
+            data: Serialized orchestrator state
+        
+        Returns:
+            GameOrchestrator: Orchestrator positioned at the saved phase
+        """
+        orchestrator = cls()
+        orchestrator.phase = Phase(data.get("phase", Phase.IDENTIFYING.value))
+        orchestrator.conversation_history = messages_from_dict(data.get("conversation_history", []))
+        
+        if data.get("book_info"):
+            orchestrator.book_info = BookInfo(**data["book_info"])
+        if data.get("book_analysis"):
+            orchestrator.book_analysis = BookAnalysis(**data["book_analysis"])
+        
+        orchestrator.discussion = data.get("discussion")
+        orchestrator.game_design = data.get("game_design")
+        orchestrator.game_hash = data.get("game_hash")
+        if orchestrator.game_hash is None and data.get("game_html"):
+            # Saved before games moved to the game store
+            orchestrator.game_hash = get_game_store().put(data["game_html"])
+        orchestrator.context_state = data.get("context_state", {})
+        orchestrator.speculative_pending = data.get("speculative_pending", False)
+        orchestrator.build_job = data.get("build_job")
+        orchestrator.recording_id = data.get("recording_id", orchestrator.recording_id)
+        return orchestrator
 
@@ -2,12 +2,33 @@
 The Game Maker - Flask Backend
 A web application that transforms children's books into playable arcade games using AI agents.
 """
+import mimetypes
 import os
+import time
 from datetime import timedelta
-from flask import Flask, jsonify, request, session, render_template
+from flask import (Flask, Response, jsonify, request, session, render_template, send_file, send_from_directory,
+                   stream_with_context)
 from flask_cors import CORS
 from flask_session import Session
 from dotenv import load_dotenv
+from werkzeug.security import safe_join
+
+from services.session_store import create_session_store
+from services.streaming import stream_turn, format_sse
+from services.llm_metrics import turn_stats, usage_stats
+from services.structured_output import structured_output_stats
+from services.llm_client import get_llm_pool
+from services.model_router import get_model_router
+from services.context_builder import get_context_builder
+from services.analysis_cache import get_analysis_cache
+from services.compression import ENCODINGS
+from services.render_cache import get_render_cache
+from services.game_store import get_game_store, is_game_hash
+from services.static_assets import IMMUTABLE_CACHE_CONTROL, STATIC_DIR, fingerprint
+from services.book_catalog import get_book_catalog
+from services.speculative import get_speculative_analyzer
+from services.build_jobs import BuildQueueFull, get_build_queue
+from services.conversation_recorder import get_conversation_recorder
 
 # Load environment variables
 # Load from project root (parent directory of backend/)
@@ -25,6 +46,7 @@ app = Flask(__name__,
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SESSION_TYPE'] = 'filesystem'
+app.config['SESSION_FILE_DIR'] = os.getenv('SESSION_FILE_DIR', os.path.join(os.getcwd(), 'flask_session'))
 app.config['SESSION_PERMANENT'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
 
@@ -32,8 +54,11 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
 CORS(app)
 Session(app)
 
-# Store active sessions (in production, use Redis or database)
-active_sessions = {}
+# Store active sessions - shared across workers unless SESSION_STORE=memory.
+# Sessions idle longer than the Flask session lifetime are expired.
+session_store = create_session_store(
+    ttl_seconds=app.config['PERMANENT_SESSION_LIFETIME'].total_seconds()
+)
 
 
 @app.route('/')
@@ -48,6 +73,43 @@ def game():
     return render_template('game.html')
 
 
+@app.route('/assets/<asset_fingerprint>/<path:filename>')
+def fingerprinted_asset(asset_fingerprint, filename):
+    """
+    Serve a static file linked by content fingerprint (see services.static_assets).
+    
+    Files with precompressed siblings (<file>.br, <file>.gz - the vendored
+    Phaser builds) are sent in the best encoding the client accepts.
+    
+    Args:
+        asset_fingerprint: Fingerprint from the URL
+        filename: Path relative to the static folder
+    
+    Returns:
+        The file - cacheable forever if the fingerprint is current
+    """
+    suffixes = {'br': '.br', 'gzip': '.gz'}
+    path = safe_join(STATIC_DIR, filename)
+    available = [encoding for encoding in ENCODINGS
+                 if path and os.path.isfile(path + suffixes[encoding])]
+    encoding = request.accept_encodings.best_match(available + ['identity'], default='identity')
+    if encoding == 'identity':
+        response = send_from_directory(STATIC_DIR, filename)
+    else:
+        response = send_from_directory(STATIC_DIR, filename + suffixes[encoding],
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['Content-Encoding'] = encoding
+    if available:
+        response.vary.add('Accept-Encoding')
+    try:
+        current = fingerprint(filename) == asset_fingerprint
+    except OSError:
+        current = False
+    # A page from before the last deploy gets today's file, revalidated
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if current else 'no-cache'
+    return response
+
+
 @app.route('/api/start_session', methods=['POST'])
 def start_session():
     """
@@ -58,15 +120,21 @@ def start_session():
     """
     from agents.orchestrator import GameOrchestrator
     
+    # Starting over abandons the previous session's background work
+    previous = session_store.get(session['session_id']) if session.get('session_id') else None
+    if previous is not None and previous.speculative_pending:
+        previous.cancel_speculative_analysis()
+        session_store.save(session['session_id'], previous)
+    
     # Create new session
     session_id = os.urandom(16).hex()
     
     # Initialize orchestrator
     orchestrator = GameOrchestrator()
-    active_sessions[session_id] = orchestrator
     
     # Get initial greeting
     greeting = orchestrator.get_initial_greeting()
+    session_store.save(session_id, orchestrator)
     
     # Store session ID
     session['session_id'] = session_id
@@ -103,33 +171,26 @@ def send_message():
     
     # Get session
     session_id = data.get('session_id') or session.get('session_id')
+    orchestrator = session_store.get(session_id) if session_id else None
     
-    if not session_id or session_id not in active_sessions:
+    if orchestrator is None:
         return jsonify({
             'success': False,
             'error': 'Invalid or expired session. Please start a new session.'
         }), 400
     
-    orchestrator = active_sessions[session_id]
-    
     try:
         # Process message through orchestrator
+        _sync_build(orchestrator)
         response = orchestrator.process_message(data['message'])
+        _after_turn(session_id, orchestrator, response)
         
         # Log any errors from the agent
         if response.get('error'):
             app.logger.error(f"Agent error: {response.get('error')}")
             print(f"Agent error: {response.get('error')}")  # Also print to console
         
-        return jsonify({
-            'success': True,
-            'message': response['message'],
-            'phase': response['phase'],
-            'agent': response.get('agent'),
-            'is_complete': response.get('is_complete', False),
-            'game_data': response.get('game_data'),
-            'error': response.get('error')  # Include error in response for debugging
-        })
+        return jsonify(_message_payload(response))
     
     except Exception as e:
         app.logger.error(f"Error processing message: {str(e)}")
@@ -141,6 +202,271 @@ def send_message():
         }), 500
 
 
+@app.route('/api/message/stream', methods=['POST'])
+def stream_message():
+    """
+    Send a message to the agent and stream the response as Server-Sent Events.
+    
+    Takes the same JSON body as /api/message. Emits:
+        event: token  - {"text": "..."} for each piece of text as Claude writes it
+        event: done   - the same payload /api/message returns, sent once at the end
+        event: error  - {"success": false, "error": "..."} if the turn failed
+    
+    Returns:
+        text/event-stream response
+    """
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return jsonify({
+            'success': False,
+            'error': 'Message is required'
+        }), 400
+    
+    session_id = data.get('session_id') or session.get('session_id')
+    orchestrator = session_store.get(session_id) if session_id else None
+    
+    if orchestrator is None:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid or expired session. Please start a new session.'
+        }), 400
+    
+    _sync_build(orchestrator)
+    
+    def generate():
+        for event, payload in stream_turn(orchestrator, data['message']):
+            if event == 'token':
+                yield format_sse('token', payload)
+            elif event == 'done':
+                _after_turn(session_id, orchestrator, payload)
+                if payload.get('error'):
+                    app.logger.error(f"Agent error: {payload.get('error')}")
+                yield format_sse('done', _message_payload(payload))
+            else:
+                app.logger.error(f"Error processing message: {payload['error']}")
+                yield format_sse('error', {
+                    'success': False,
+                    'error': f"An error occurred: {payload['error']}"
+                })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop proxies from buffering the stream
+        }
+    )
+
+
+def _message_payload(response):
+    """Build the client-facing JSON for an orchestrator response."""
+    return {
+        'success': True,
+        'message': response['message'],
+        'phase': response['phase'],
+        'agent': response.get('agent'),
+        'is_complete': response.get('is_complete', False),
+        'game_data': response.get('game_data'),
+        'llm_calls': response.get('llm_calls'),
+        'llm_usage': response.get('llm_usage'),
+        'build_job': response.get('build_job'),
+        'error': response.get('error')  # Include error in response for debugging
+    }
+
+
+def _after_turn(session_id, orchestrator, response):
+    """Queue the game build a turn asked for, then persist the session."""
+    if response.pop('build_requested', False):
+        _queue_build(session_id, orchestrator, response)
+    session_store.save(session_id, orchestrator)
+
+
+def _queue_build(session_id, orchestrator, response):
+    """
+    Submit a game build to the build queue.
+    
+    Falls back to building inside the request when the queue is full.
+    
+    Args:
+        session_id: The session identifier
+        orchestrator: The session's GameOrchestrator (in the GENERATING phase)
+        response: The turn's response (updated in place with the job status)
+    """
+    from agents.orchestrator import GameOrchestrator
+    
+    inputs = orchestrator.build_inputs()
+    try:
+        job = get_build_queue().submit(
+            session_id,
+            lambda: GameOrchestrator.build_game(inputs),
+            on_finished=_finish_build
+        )
+    except BuildQueueFull as e:
+        app.logger.warning(f"Build queue full, building inline: {e}")
+        job_id = f"inline-{os.urandom(8).hex()}"
+        orchestrator.start_build_job(job_id)
+        finished = orchestrator.finish_build(job_id, GameOrchestrator.build_game(inputs))
+        response['message'] += "\n\n" + finished['message']
+        response.update({key: finished.get(key) for key in ('phase', 'is_complete', 'game_data')})
+        return
+    
+    orchestrator.start_build_job(job.id)
+    response['build_job'] = job.to_dict()
+
+
+def _finish_build(job):
+    """Write a finished build back to its session (runs on the build worker)."""
+    orchestrator = session_store.get(job.session_id)
+    if orchestrator is not None and orchestrator.finish_build(job.id, job.result) is not None:
+        session_store.save(job.session_id, orchestrator)
+
+
+def _sync_build(orchestrator):
+    """
+    Apply a finished build the session has not seen yet.
+    
+    The build worker saves the result itself, but a request that loaded
+    the session before then could save over it; this puts it back.
+    
+    Returns:
+        dict: The completion response if a build was applied, else None
+    """
+    if not orchestrator.build_pending():
+        return None
+    job = get_build_queue().get(orchestrator.build_job.get('job_id') or '')
+    if job is None or not job.finished:
+        return None
+    return orchestrator.finish_build(job.id, job.result)
+
+
+def _build_status(job_id, session_id):
+    """
+    Get a build's status, applying its result to the session if it finished.
+    
+    Works for jobs queued by another worker too, via the session's saved state.
+    
+    Returns:
+        dict: Status payload, or None if the job is unknown
+    """
+    build_queue = get_build_queue()
+    job = build_queue.get(job_id)
+    session_id = session_id or (job.session_id if job else None)
+    orchestrator = session_store.get(session_id) if session_id else None
+    
+    if orchestrator is not None and _sync_build(orchestrator) is not None:
+        session_store.save(session_id, orchestrator)
+    
+    session_job = orchestrator.build_job if orchestrator is not None else None
+    if session_job and session_job.get('job_id') == job_id and session_job['status'] != 'queued':
+        status = session_job['status']
+    elif job is not None:
+        status = job.status
+    elif session_job and session_job.get('job_id') == job_id:
+        status = 'queued'
+    else:
+        return None
+    
+    payload = {
+        'success': True,
+        'job_id': job_id,
+        'status': status,
+        'queue_position': build_queue.queue_position(job_id),
+        'error': session_job.get('error') if session_job else None
+    }
+    if status == 'done' and orchestrator is not None:
+        game_title = session_job.get('game_title', 'Your Game')
+        payload.update({
+            'message': f"🎉 '{game_title}' is ready! Your game has been generated and is ready to play!",
+            'phase': orchestrator.phase.value,
+            'agent': 'code_generator',
+            'is_complete': True,
+            'game_data': orchestrator.game_data(game_title)
+        })
+    elif status == 'failed' and orchestrator is not None:
+        payload.update({
+            'message': orchestrator.conversation_history[-1].content,
+            'phase': orchestrator.phase.value,
+            'agent': 'code_generator',
+            'is_complete': False
+        })
+    return payload
+
+
+@app.route('/api/build/<job_id>', methods=['GET'])
+def get_build(job_id):
+    """
+    Poll a game build.
+    
+    Query parameters:
+        session_id: The session the build belongs to (needed when the build
+                    was queued by another worker)
+    
+    Returns:
+        dict: job_id, status (queued/running/done/failed), queue_position and,
+              once finished, the same message/phase/game_data fields as /api/message
+    """
+    payload = _build_status(job_id, request.args.get('session_id') or session.get('session_id'))
+    if payload is None:
+        return jsonify({
+            'success': False,
+            'error': 'Build job not found'
+        }), 404
+    return jsonify(payload)
+
+
+@app.route('/api/build/<job_id>/events', methods=['GET'])
+def build_events(job_id):
+    """
+    Stream a game build's progress as Server-Sent Events.
+    
+    Emits:
+        event: status - the /api/build/<job_id> payload whenever the status changes
+        event: done   - the final payload once the build is done or failed
+    
+    Returns:
+        text/event-stream response
+    """
+    session_id = request.args.get('session_id') or session.get('session_id')
+    if _build_status(job_id, session_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Build job not found'
+        }), 404
+    
+    def generate():
+        deadline = time.time() + float(os.getenv('BUILD_STREAM_TIMEOUT', '600'))
+        last_status = None
+        while time.time() < deadline:
+            payload = _build_status(job_id, session_id)
+            if payload is None:
+                break
+            if payload['status'] in ('done', 'failed'):
+                yield format_sse('done', payload)
+                return
+            if payload['status'] != last_status:
+                last_status = payload['status']
+                yield format_sse('status', payload)
+            else:
+                yield ": keep-alive\n\n"
+            
+            # Wake as soon as a local job changes state; poll for remote ones
+            if get_build_queue().get(job_id) is not None:
+                get_build_queue().wait(job_id, timeout=10)
+            else:
+                time.sleep(1)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @app.route('/api/session/<session_id>', methods=['GET'])
 def get_session(session_id):
     """
@@ -152,13 +478,14 @@ def get_session(session_id):
     Returns:
         dict: Current session state including phase, conversation history, etc.
     """
-    if session_id not in active_sessions:
+    orchestrator = session_store.get(session_id)
+    
+    if orchestrator is None:
         return jsonify({
             'success': False,
             'error': 'Session not found'
         }), 404
     
-    orchestrator = active_sessions[session_id]
     state = orchestrator.get_state()
     
     return jsonify({
@@ -175,28 +502,106 @@ def get_game(session_id):
     """
     Get the generated game HTML for a session.
     
+    Always the session's latest game, so it must be revalidated; the
+    game's content hash is its ETag, so a browser that already has it
+    gets a 304 instead of the HTML again. /g/<game_hash> serves the same
+    bytes under a URL that never changes.
+    
     Args:
         session_id: The session identifier
     
     Returns:
         HTML string of the complete game
     """
-    if session_id not in active_sessions:
+    orchestrator = session_store.get(session_id)
+    
+    if orchestrator is None:
         return jsonify({
             'success': False,
             'error': 'Session not found'
         }), 404
     
-    orchestrator = active_sessions[session_id]
-    state = orchestrator.get_state()
+    game_hash = orchestrator.game_hash
     
-    if not state.get('game_html'):
+    if not game_hash:
         return jsonify({
             'success': False,
             'error': 'Game not yet generated'
         }), 400
     
-    return state['game_html'], 200, {'Content-Type': 'text/html'}
+    if not orchestrator.restore_game():
+        return jsonify({
+            'success': False,
+            'error': 'Game is no longer available'
+        }), 404
+    if orchestrator.game_hash != game_hash:
+        session_store.save(session_id, orchestrator)
+    
+    response = _game_response(orchestrator.game_hash)
+    if response is None:
+        return jsonify({
+            'success': False,
+            'error': 'Game is no longer available'
+        }), 404
+    # The session's game can be rebuilt, so revalidate on every load
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/g/<game_hash>', methods=['GET'])
+def get_game_by_hash(game_hash):
+    """
+    Get a generated game by its content hash.
+    
+    The URL names exact bytes, so the response can be cached forever by
+    the browser, proxies and CDNs - and shared after the session is gone.
+    
+    Args:
+        game_hash: The game's hash (from game_data["hash"])
+    
+    Returns:
+        HTML string of the complete game
+    """
+    response = _game_response(game_hash) if is_game_hash(game_hash) else None
+    if response is None:
+        return jsonify({
+            'success': False,
+            'error': 'Game not found'
+        }), 404
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def _game_response(game_hash):
+    """
+    Serve a stored game in the best encoding the client accepts.
+    
+    The compressed variants were made when the game was stored - nothing
+    is compressed per request - and the file is sent with send_file, so
+    the server can hand it to sendfile() without copying it through
+    Python. Conditional requests get a 304.
+    
+    Args:
+        game_hash: The game's hash in the game store
+    
+    Returns:
+        Response: The game with a strong ETag per encoding, or None if it
+                  is not stored
+    """
+    store = get_game_store()
+    encoding = request.accept_encodings.best_match(store.encodings(game_hash) + ['identity'], default='identity')
+    path = store.path(game_hash, encoding)
+    if path is None:
+        return None
+    
+    # Each encoding is different bytes, so it needs its own strong ETag
+    etag = game_hash if encoding == 'identity' else f"{game_hash}-{encoding}"
+    response = send_file(path, mimetype='text/html', etag=etag, conditional=True)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    store.touch(game_hash)
+    return response
 
 
 @app.route('/api/health', methods=['GET'])
@@ -214,6 +619,36 @@ def health_check():
     }), 200
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """
+    Runtime counters for monitoring.
+    
+    Returns:
+        JSON response with per-subsystem statistics
+    """
+    analysis_cache = get_analysis_cache()
+    render_cache = get_render_cache()
+    book_catalog = get_book_catalog()
+    speculative_analyzer = get_speculative_analyzer()
+    return jsonify({
+        'sessions': session_store.stats(),
+        'llm_turns': turn_stats(),
+        'llm_usage': usage_stats(),
+        'llm_pool': get_llm_pool().stats(),
+        'model_routes': get_model_router().stats(),
+        'structured_output': structured_output_stats(),
+        'context': get_context_builder().stats(),
+        'analysis_cache': analysis_cache.stats() if analysis_cache else None,
+        'render_cache': render_cache.stats() if render_cache else None,
+        'game_store': get_game_store().stats(),
+        'book_catalog': book_catalog.stats() if book_catalog else None,
+        'speculative_analysis': speculative_analyzer.stats() if speculative_analyzer else None,
+        'build_queue': get_build_queue().stats(),
+        'conversation_recorder': get_conversation_recorder().stats()
+    }), 200
+
+
 if __name__ == '__main__':
     # Development server
     app.run(host='0.0.0.0', port=5001, debug=True)
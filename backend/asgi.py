@@ -0,0 +1,234 @@
+"""
+The Game Maker - ASGI entry point
+
+Serves the conversation endpoints natively on asyncio so a worker is not
+pinned while Claude thinks: /api/message and /api/message/stream await
+GameOrchestrator.aprocess_message(), and one process can keep hundreds of
+conversations in flight. /api/build/<job_id>/events, open for the whole
+of every build, is served natively too, polling the build on the event
+loop instead of holding a thread. Every other route is served by the Flask app
+on a pool of WSGI_THREADS threads (a2wsgi), so a slow Flask request holds
+one thread and the rest of the app keeps answering.
+
+Run with:
+    uvicorn asgi:application --app-dir backend --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import json
+import os
+import re
+import traceback
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import session
+
+from app import app as flask_app, session_store, _message_payload, _after_turn, _sync_build, _build_status
+from services.streaming import astream_turn, format_sse
+
+
+# Not asgiref's WsgiToAsgi: it runs every request on one thread per process
+wsgi_application = WSGIMiddleware(flask_app, workers=int(os.getenv('WSGI_THREADS', '32')))
+
+_BUILD_EVENTS_PATH = re.compile(r"/api/build/([^/]+)/events")
+
+# Seconds between build status checks on an event stream
+BUILD_POLL_SECONDS = 0.5
+
+
+async def application(scope, receive, send):
+    """ASGI application - async conversation routes, Flask for everything else."""
+    if scope["type"] == "http" and scope["method"] == "POST":
+        if scope["path"] == "/api/message":
+            return await send_message(scope, receive, send)
+        if scope["path"] == "/api/message/stream":
+            return await stream_message(scope, receive, send)
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        match = _BUILD_EVENTS_PATH.fullmatch(scope["path"])
+        session_id = parse_qs(scope["query_string"].decode("latin-1")).get("session_id")
+        # Builds named only by the Flask session cookie go to the Flask route
+        if match and session_id:
+            return await build_events(scope, receive, send, match.group(1), session_id[0])
+
+    return await wsgi_application(scope, receive, send)
+
+
+async def send_message(scope, receive, send):
+    """
+    Async /api/message - same request and response contract as the Flask route.
+
+    The session ID is read from the JSON body, else from the Flask session cookie.
+    """
+    data = await _read_json(receive)
+    orchestrator, session_id, error = await _load_session(scope, data)
+    if error:
+        return await _send_json(send, 400, error)
+
+    try:
+        response = await orchestrator.aprocess_message(data['message'])
+        await asyncio.to_thread(_after_turn, session_id, orchestrator, response)
+
+        if response.get('error'):
+            flask_app.logger.error(f"Agent error: {response.get('error')}")
+
+        return await _send_json(send, 200, _message_payload(response))
+
+    except Exception as e:
+        flask_app.logger.error(f"Error processing message: {str(e)}")
+        traceback.print_exc()
+        return await _send_json(send, 500, {
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+
+async def stream_message(scope, receive, send):
+    """Async /api/message/stream - same Server-Sent Events as the Flask route."""
+    data = await _read_json(receive)
+    orchestrator, session_id, error = await _load_session(scope, data)
+    if error:
+        return await _send_json(send, 400, error)
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ],
+    })
+
+    async for event, payload in astream_turn(orchestrator, data['message']):
+        if event == 'token':
+            chunk = format_sse('token', payload)
+        elif event == 'done':
+            await asyncio.to_thread(_after_turn, session_id, orchestrator, payload)
+            chunk = format_sse('done', _message_payload(payload))
+        else:
+            flask_app.logger.error(f"Error processing message: {payload['error']}")
+            chunk = format_sse('error', {
+                'success': False,
+                'error': f"An error occurred: {payload['error']}"
+            })
+        await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def build_events(scope, receive, send, job_id, session_id):
+    """Async /api/build/<job_id>/events - same Server-Sent Events as the Flask route."""
+    payload = await asyncio.to_thread(_build_status, job_id, session_id)
+    if payload is None:
+        return await _send_json(send, 404, {
+            'success': False,
+            'error': 'Build job not found'
+        })
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ],
+    })
+
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + float(os.getenv('BUILD_STREAM_TIMEOUT', '600'))
+    last_status = None
+    try:
+        while payload is not None and not disconnected.done() and loop.time() < deadline:
+            if payload['status'] in ('done', 'failed'):
+                chunk = format_sse('done', payload)
+            elif payload['status'] != last_status:
+                last_status = payload['status']
+                chunk = format_sse('status', payload)
+            else:
+                chunk = ": keep-alive\n\n"
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+            if payload['status'] in ('done', 'failed'):
+                break
+
+            # Sleep until the next check, waking early if the client goes away
+            await asyncio.wait([disconnected], timeout=BUILD_POLL_SECONDS)
+            payload = await asyncio.to_thread(_build_status, job_id, session_id)
+    finally:
+        disconnected.cancel()
+
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def _wait_for_disconnect(receive):
+    """Return once the client has disconnected."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _load_session(scope, data):
+    """
+    Validate the request body and load its orchestrator.
+
+    Like the Flask routes, the session ID comes from the body, else from
+    the Flask session cookie.
+
+    Returns:
+        tuple: (orchestrator, session ID, None) on success, or
+               (None, None, error payload)
+    """
+    if not data or 'message' not in data:
+        return None, None, {'success': False, 'error': 'Message is required'}
+
+    session_id = data.get('session_id') or await asyncio.to_thread(_cookie_session_id, scope)
+    orchestrator = await asyncio.to_thread(session_store.get, session_id) if session_id else None
+
+    if orchestrator is None:
+        return None, None, {
+            'success': False,
+            'error': 'Invalid or expired session. Please start a new session.'
+        }
+
+    await asyncio.to_thread(_sync_build, orchestrator)
+    return orchestrator, session_id, None
+
+
+def _cookie_session_id(scope):
+    """Read the session ID from the Flask session named by the request's cookies (None if absent)."""
+    cookies = "; ".join(value.decode("latin-1") for name, value in scope.get("headers", [])
+                        if name.lower() == b"cookie")
+    if not cookies:
+        return None
+    with flask_app.test_request_context(headers={"Cookie": cookies}):
+        return session.get('session_id')
+
+
+async def _read_json(receive):
+    """Read the full request body and decode it as JSON (None if invalid)."""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+async def _send_json(send, status, payload):
+    """Send a complete JSON response."""
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,7 @@
+"""
+Offline benchmarking tools.
+
+mock_anthropic serves a local stand-in for the Anthropic Messages API and
+benchmark drives full conversations against the app, so latency and
+throughput can be measured without spending API credits.
+"""
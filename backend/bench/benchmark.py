@@ -0,0 +1,366 @@
+"""
+Benchmark - Drive full conversations through the app and report latency.
+
+Each simulated user starts a session, talks through the IDENTIFYING ->
+DISCUSSING -> DESIGNING phases with a fixed conversation, waits for the
+game build and downloads the game:
+
+    POST /api/start_session -> POST /api/message (xN) -> GET /api/build/<id>
+    -> GET /api/game/<session_id>
+
+Users run concurrently, and the report covers throughput, p50/p90/p99
+latency per endpoint, time to a playable game, LLM calls and tokens per
+session and memory per session.
+
+By default the app runs in this process (Flask test client) against a
+mock Anthropic API started on a background thread, so no credits are
+spent and nothing else needs to be running:
+
+    cd backend
+    python -m bench.benchmark --users 20 --sessions 100 --latency lognormal:600,0.4
+
+To benchmark a deployed server, point --target at it and start the app
+with ANTHROPIC_API_URL set to a mock (python -m bench.mock_anthropic).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from bench.mock_anthropic import MockAnthropic, start_mock_server
+
+# Matches the built-in mock script (bench.mock_anthropic.DEFAULT_SCRIPT)
+DEFAULT_CONVERSATION = [
+    "I read a book about a robot who wanted to bake a cake",
+    "Yes!",
+    "When the robot covered the whole kitchen in flour",
+    "The robot and the little mouse helper",
+    "A platformer please",
+    "Collect cupcakes",
+    "Avoid the flour clouds",
+]
+
+BUILD_POLL_SECONDS = 0.1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class InProcessClient:
+    """Calls the Flask app in this process through its test client."""
+
+    def __init__(self, app: Any):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None):
+        response = self._client.open(path, method=method, json=body)
+        payload = response.get_json(silent=True) if response.is_json else None
+        return response.status_code, payload, len(response.get_data())
+
+
+class HttpClient:
+    """Calls a running server over HTTP."""
+
+    def __init__(self, target: str):
+        self.target = target.rstrip("/")
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.target + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                raw = response.read()
+                status = response.status
+                is_json = response.headers.get_content_type() == "application/json"
+        except urllib.error.HTTPError as e:
+            raw, status, is_json = e.read(), e.code, True
+        try:
+            payload = json.loads(raw) if is_json else None
+        except ValueError:
+            payload = None
+        return status, payload, len(raw)
+
+
+class Recorder:
+    """Thread-safe collection of request latencies per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def timed(self, client: Any, endpoint: str, method: str, path: str,
+              body: Optional[Dict[str, Any]] = None):
+        """Make a request and record its latency under an endpoint name."""
+        started = time.perf_counter()
+        status, payload, size = client.request(method, path, body)
+        elapsed = time.perf_counter() - started
+        failed = status >= 400 or (payload is not None and payload.get("success") is False)
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            if failed:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return status, payload, size
+
+
+def run_session(client: Any, recorder: Recorder, conversation: List[str],
+                session_sizer: Any = None) -> Dict[str, Any]:
+    """
+    Take one simulated user from a new session to a downloaded game.
+
+    Returns:
+        dict: completed, turns, time_to_game, llm_calls, tokens, game_bytes,
+              session_bytes and error
+    """
+    result = {"completed": False, "turns": 0, "llm_calls": 0, "tokens": 0,
+              "game_bytes": 0, "session_bytes": None, "error": None}
+    started = time.perf_counter()
+
+    status, payload, _ = recorder.timed(client, "start_session", "POST", "/api/start_session")
+    if status != 200 or not payload:
+        result["error"] = f"start_session failed ({status})"
+        return result
+    session_id = payload["session_id"]
+
+    data: Dict[str, Any] = {}
+    for message in conversation:
+        status, data, _ = recorder.timed(client, "message", "POST", "/api/message",
+                                         {"message": message, "session_id": session_id})
+        result["turns"] += 1
+        if status != 200 or not data:
+            result["error"] = f"message failed ({status}): {(data or {}).get('error')}"
+            return result
+        result["llm_calls"] += data.get("llm_calls") or 0
+        usage = data.get("llm_usage") or {}
+        result["tokens"] += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        if data.get("is_complete") or data.get("build_job"):
+            break
+
+    # Wait for a background build
+    job = data.get("build_job") if data else None
+    while job and job.get("status") in ("queued", "running"):
+        time.sleep(BUILD_POLL_SECONDS)
+        status, job, _ = recorder.timed(client, "build_status", "GET",
+                                        f"/api/build/{job['job_id']}?session_id={session_id}")
+        if status != 200 or not job:
+            result["error"] = f"build status failed ({status})"
+            return result
+        if job.get("status") == "failed":
+            result["error"] = f"build failed: {job.get('error')}"
+            return result
+
+    status, _, size = recorder.timed(client, "game", "GET", f"/api/game/{session_id}")
+    if status != 200:
+        result["error"] = f"game not ready after {result['turns']} turns ({status})"
+        return result
+
+    result["completed"] = True
+    result["game_bytes"] = size
+    result["time_to_game"] = time.perf_counter() - started
+    if session_sizer is not None:
+        result["session_bytes"] = session_sizer(session_id)
+    return result
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident memory of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _summary(values: List[float], scale: float = 1.0, digits: int = 1) -> Dict[str, float]:
+    """Mean and percentiles of a list, scaled (e.g. seconds -> ms)."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * scale, digits),
+        "p50": round(percentile(values, 50) * scale, digits),
+        "p90": round(percentile(values, 90) * scale, digits),
+        "p99": round(percentile(values, 99) * scale, digits),
+        "max": round(max(values) * scale, digits)
+    }
+
+
+def start_in_process_app(mock: Optional[MockAnthropic] = None):
+    """
+    Start a mock API and import the app configured to call it.
+
+    Must run before anything else imports app, since the Claude clients
+    read ANTHROPIC_API_URL when they are created. Flask-Session's files and
+    every persistent cache (analyses, renders, stored games) go to a fresh
+    temp directory, so a run never reuses an earlier run's results and the
+    LLM calls it reports are the ones a new deployment would make.
+
+    Args:
+        mock: Mock API to serve (default: the built-in script)
+
+    Returns:
+        tuple: The app module and the running mock server
+    """
+    server = start_mock_server(mock)
+    os.environ["ANTHROPIC_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "mock-key")
+
+    data_dir = tempfile.mkdtemp(prefix="bench_game_maker_")
+    os.environ["SESSION_FILE_DIR"] = os.path.join(data_dir, "flask_session")
+    os.environ["ANALYSIS_CACHE_PATH"] = os.path.join(data_dir, "analyses.db")
+    os.environ["RENDER_CACHE_DIR"] = os.path.join(data_dir, "renders")
+    os.environ["GAME_STORE_DIR"] = os.path.join(data_dir, "games")
+
+    import app as app_module
+    return app_module, server
+
+
+def _session_sizer(app_module):
+    """Measure a session's serialized size in the in-process app."""
+    def session_sizer(session_id: str) -> Optional[int]:
+        orchestrator = app_module.session_store.get(session_id)
+        return orchestrator.estimate_size() if orchestrator is not None else None
+    return session_sizer
+
+
+def run_benchmark(users: int, sessions: int, conversation: List[str], target: Optional[str] = None,
+                  mock: Optional[MockAnthropic] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        users: Concurrent users
+        sessions: Total sessions to run
+        conversation: User messages for each session
+        target: URL of a running server (default: the app in this process)
+        mock: Mock API for the in-process app (default: the built-in script)
+
+    Returns:
+        dict: The benchmark report
+    """
+    server = None
+    if target:
+        make_client = lambda: HttpClient(target)  # noqa: E731
+        session_sizer = None
+    else:
+        app_module, server = start_in_process_app(mock)
+        make_client = lambda: InProcessClient(app_module.app)  # noqa: E731
+        session_sizer = _session_sizer(app_module)
+
+    recorder = Recorder()
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        futures = [pool.submit(run_session, make_client(), recorder, conversation, session_sizer)
+                   for _ in range(sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    rss_after = _rss_bytes()
+
+    completed = [r for r in results if r["completed"]]
+    requests = sum(len(values) for values in recorder.latencies.values())
+    session_sizes = [r["session_bytes"] for r in completed if r["session_bytes"] is not None]
+    report = {
+        "users": users,
+        "sessions": sessions,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "errors": sorted({r["error"] for r in results if r["error"]})[:10],
+        "wall_seconds": round(elapsed, 2),
+        "throughput": {
+            "sessions_per_second": round(len(completed) / elapsed, 3),
+            "requests_per_second": round(requests / elapsed, 2)
+        },
+        "latency_ms": {endpoint: _summary(values, 1000) for endpoint, values in recorder.latencies.items()},
+        "request_errors": recorder.errors,
+        "time_to_game_s": _summary([r["time_to_game"] for r in completed], 1, 2),
+        "per_session": {
+            "turns": round(sum(r["turns"] for r in completed) / len(completed), 2) if completed else 0,
+            "llm_calls": round(sum(r["llm_calls"] for r in completed) / len(completed), 2) if completed else 0,
+            "tokens": round(sum(r["tokens"] for r in completed) / len(completed)) if completed else 0,
+            "game_bytes": round(sum(r["game_bytes"] for r in completed) / len(completed)) if completed else 0,
+            "session_bytes": round(sum(session_sizes) / len(session_sizes)) if session_sizes else None,
+            "rss_growth_bytes": round((rss_after - rss_before) / sessions)
+            if rss_before is not None and rss_after is not None else None
+        }
+    }
+    if server is not None:
+        report["mock_api"] = server.mock.stats()
+        server.shutdown()
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a benchmark report as a readable table."""
+    print(f"\n{report['completed']}/{report['sessions']} sessions completed with {report['users']} "
+          f"concurrent users in {report['wall_seconds']}s")
+    print(f"Throughput: {report['throughput']['sessions_per_second']} sessions/s, "
+          f"{report['throughput']['requests_per_second']} requests/s\n")
+    print(f"{'endpoint':<16}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for endpoint, stats in report["latency_ms"].items():
+        if stats["count"]:
+            print(f"{endpoint:<16}{stats['count']:>7}{stats['mean']:>9}{stats['p50']:>9}"
+                  f"{stats['p90']:>9}{stats['p99']:>9}{stats['max']:>9}")
+    ttg = report["time_to_game_s"]
+    if ttg["count"]:
+        print(f"\nTime to game: p50 {ttg['p50']}s, p99 {ttg['p99']}s")
+    per_session = report["per_session"]
+    print(f"Per session: {per_session['turns']} turns, {per_session['llm_calls']} LLM calls, "
+          f"{per_session['tokens']} tokens, session ~{per_session['session_bytes']} bytes, "
+          f"RSS growth ~{per_session['rss_growth_bytes']} bytes")
+    if report.get("mock_api"):
+        print(f"Mock API: {report['mock_api']}")
+    if report["errors"]:
+        print("\nErrors:")
+        for error in report["errors"]:
+            print(f"  - {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark full Game Maker conversations")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent users")
+    parser.add_argument("--sessions", type=int, help="Total sessions (default: one per user)")
+    parser.add_argument("--target", help="URL of a running server (default: the app in this process)")
+    parser.add_argument("--script", help="Mock reply script (JSON)")
+    parser.add_argument("--conversation", help="User messages to send (JSON list)")
+    parser.add_argument("--latency", help="Mock first-token latency, e.g. lognormal:600,0.4")
+    parser.add_argument("--per-token-ms", type=float, help="Mock delay per output token")
+    parser.add_argument("--seed", type=int, help="Random seed for mock latencies")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    conversation = DEFAULT_CONVERSATION
+    if args.conversation:
+        with open(args.conversation) as f:
+            conversation = json.load(f)
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    mock = MockAnthropic(script, latency=args.latency, per_token_ms=args.per_token_ms, seed=args.seed)
+    report = run_benchmark(args.users, args.sessions or args.users, conversation,
+                           target=args.target, mock=mock)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+Mock Anthropic - A local stand-in for the Anthropic Messages API.
+
+Serves POST /v1/messages (plain and streamed) with replies chosen by a
+script and delays drawn from configurable latency distributions, so the
+whole app can be load-tested offline. Point the app at it with
+ANTHROPIC_API_URL=http://127.0.0.1:<port>.
+
+Replies:
+    - Forced tool calls (tool_choice {"type": "tool"}) get a tool_use block
+      whose input is synthesized from the tool's input_schema, so it
+      validates against the pydantic model the schema came from. Script
+      rules can override fields with "tool_input".
+    - Everything else gets the text of the first script rule whose
+      conditions match the request.
+
+A script is a JSON file:
+
+    {
+        "latency": {"first_token": "lognormal:600,0.4", "per_token_ms": 10},
+        "rules": [
+            {"when": {"system": "Story Analyst", "last_user": "robot"},
+             "text": "Ooh, is that 'The Baking Robot' by Pat Example?"},
+            {"when": {"tool": "GameDesign"}, "tool_input": {"game_type": "platformer"}}
+        ]
+    }
+
+"system" and "last_user" are case-insensitive regexes over the system
+prompt and the latest user message; "tool" matches the forced tool name;
+"min_user_turns" requires that many user messages in the request.
+
+Latency specs: "fixed:MS", "uniform:LOW-HIGH" or "lognormal:MEDIAN,SIGMA"
+(milliseconds). first_token is the delay before the first byte of the
+reply; per_token_ms is added for every output token.
+
+Run standalone:
+    python -m bench.mock_anthropic --port 8765 --latency lognormal:600,0.4
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Replies for the benchmark's default conversation (see bench.benchmark)
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "latency": {"first_token": "lognormal:600,0.4", "per_token_ms": 8},
+    "rules": [
+        {"when": {"tool": "GameDesign"},
+         "tool_input": {"game_type": "platformer", "book_title": "The Baking Robot",
+                        "scoring": {"item_collected": 10, "level_complete": 100}}},
+        {"when": {"tool": "BookMention"},
+         "tool_input": {"names_book": True, "title": "The Baking Robot", "author": "Pat Example"}},
+        {"when": {"system": "Story Analyst", "last_user": "robot who"},
+         "text": "Ooh, a baking robot! 🤖\n\nIs that 'The Baking Robot' by Pat Example?"},
+        {"when": {"system": "Story Analyst", "last_user": "^yes"},
+         "text": "Yay, I love that one! 🎂\n\nWhat was your favorite part of the story?"},
+        {"when": {"system": "Story Analyst", "last_user": "flour"},
+         "text": "Ha, what a mess! 😄\n\nWho was your favorite character?"},
+        {"when": {"system": "Story Analyst", "last_user": "mouse"},
+         "text": "The mouse helper is so clever!\n\nI have enough information - let's design your game! 🎮"},
+        {"when": {"system": "Game Designer", "last_user": "platformer"},
+         "text": "A platformer it is! 🏃\n\nWhat should the robot collect?"},
+        {"when": {"system": "Game Designer", "last_user": "collect"},
+         "text": "Yum, cupcakes! 🧁\n\nWhat should the robot avoid?"},
+        {"when": {"system": "Game Designer", "last_user": "avoid"},
+         "text": "Perfect - I'm ready to build your game! 🔨"},
+        {"when": {}, "text": "That sounds fun! Tell me more."}
+    ]
+}
+
+
+class Latency:
+    """A delay distribution parsed from a spec string."""
+
+    def __init__(self, spec: str):
+        """
+        Parse a latency spec.
+
+        Args:
+            spec: "fixed:MS", "uniform:LOW-HIGH" or "lognormal:MEDIAN,SIGMA"
+        """
+        kind, _, params = spec.partition(":")
+        self.spec = spec
+        self.kind = kind
+        if kind == "fixed":
+            self.params = (float(params),)
+        elif kind == "uniform":
+            low, high = params.split("-")
+            self.params = (float(low), float(high))
+        elif kind == "lognormal":
+            median, sigma = params.split(",")
+            self.params = (float(median), float(sigma))
+        else:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        """Draw one delay, in seconds."""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = random.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            ms = random.lognormvariate(math.log(median), sigma)
+        return ms / 1000
+
+
+def synthesize(schema: Dict[str, Any], name: str = "value") -> Any:
+    """
+    Build a value that satisfies a JSON schema.
+
+    Args:
+        schema: JSON schema (as produced from a pydantic model)
+        name: Field name, used to make strings readable
+
+    Returns:
+        A value of the schema's type
+    """
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return synthesize(options[0] if options else {}, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    kind = schema.get("type", "string")
+    if kind == "object":
+        properties = schema.get("properties")
+        if properties is None:
+            # A mapping (e.g. Dict[str, int])
+            return {f"mock_{name}": synthesize(schema.get("additionalProperties") or {}, name)}
+        return {key: synthesize(value, key) for key, value in properties.items()}
+    if kind == "array":
+        return [synthesize(schema.get("items", {}), name) for _ in range(2)]
+    if kind == "integer":
+        return 10
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    return f"Mock {name.replace('_', ' ')}"
+
+
+class MockAnthropic:
+    """Script, latency model and counters shared by the request handlers."""
+
+    def __init__(self, script: Optional[Dict[str, Any]] = None, latency: Optional[str] = None,
+                 per_token_ms: Optional[float] = None, seed: Optional[int] = None):
+        """
+        Initialize the mock.
+
+        Args:
+            script: Reply script (default: DEFAULT_SCRIPT)
+            latency: First-token latency spec, overriding the script's
+            per_token_ms: Delay per output token, overriding the script's
+            seed: Random seed for reproducible latencies
+        """
+        self.script = script or DEFAULT_SCRIPT
+        script_latency = self.script.get("latency", {})
+        self.first_token = Latency(latency or script_latency.get("first_token", "fixed:0"))
+        self.per_token_seconds = (per_token_ms if per_token_ms is not None
+                                  else script_latency.get("per_token_ms", 0)) / 1000
+        if seed is not None:
+            random.seed(seed)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._streamed = 0
+        self._tool_calls = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._by_model: Dict[str, int] = {}
+
+    def reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Choose the reply for a Messages API request.
+
+        Returns:
+            dict: A complete Messages API response
+        """
+        tool_choice = body.get("tool_choice") or {}
+        forced_tool = tool_choice.get("name") if tool_choice.get("type") == "tool" else None
+        rule = self._match(body, forced_tool)
+
+        if forced_tool:
+            tool = next(t for t in body.get("tools", []) if t.get("name") == forced_tool)
+            tool_input = synthesize(tool.get("input_schema", {"type": "object", "properties": {}}))
+            tool_input.update(rule.get("tool_input", {}))
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                        "name": forced_tool, "input": tool_input}]
+            output_text = json.dumps(tool_input)
+            stop_reason = "tool_use"
+        else:
+            output_text = rule.get("text", "OK")
+            content = [{"type": "text", "text": output_text}]
+            stop_reason = "end_turn"
+
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": len(json.dumps(body.get("messages", [])) + str(body.get("system", ""))) // 4,
+                "output_tokens": max(1, len(output_text) // 4),
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 0
+            }
+        }
+
+    def timing(self, message: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        Delays for sending a reply.
+
+        Returns:
+            tuple: Seconds before the first token, seconds per output token
+        """
+        return self.first_token.sample(), self.per_token_seconds
+
+    def _match(self, body: Dict[str, Any], forced_tool: Optional[str]) -> Dict[str, Any]:
+        """First script rule whose conditions all hold for the request."""
+        system = body.get("system", "")
+        if isinstance(system, list):
+            system = "".join(block.get("text", "") for block in system if isinstance(block, dict))
+        user_messages = [m for m in body.get("messages", []) if m.get("role") == "user"
+                         and not _is_tool_result(m)]
+        last_user = _text(user_messages[-1]["content"]) if user_messages else ""
+
+        for rule in self.script.get("rules", []):
+            when = rule.get("when", {})
+            if "tool" in when and when["tool"] != forced_tool:
+                continue
+            if "tool" not in when and forced_tool and "text" in rule:
+                continue
+            if "system" in when and not re.search(when["system"], system, re.IGNORECASE):
+                continue
+            if "last_user" in when and not re.search(when["last_user"], last_user.strip(), re.IGNORECASE):
+                continue
+            if len(user_messages) < when.get("min_user_turns", 0):
+                continue
+            return rule
+        return {}
+
+    def record(self, body: Dict[str, Any], delta: int) -> None:
+        """Count a request starting (delta=1) or finishing (delta=-1)."""
+        with self._lock:
+            self._in_flight += delta
+            if delta > 0:
+                self._requests += 1
+                self._streamed += bool(body.get("stream"))
+                self._tool_calls += bool((body.get("tool_choice") or {}).get("type") == "tool")
+                model = body.get("model", "mock")
+                self._by_model[model] = self._by_model.get(model, 0) + 1
+                self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get request statistics.
+
+        Returns:
+            dict: Requests (total, streamed, forced tool calls, per model)
+                  and current/peak concurrency
+        """
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "streamed": self._streamed,
+                "tool_calls": self._tool_calls,
+                "by_model": dict(self._by_model),
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight
+            }
+
+
+def _text(content: Any) -> str:
+    """Plain text of a message's content (string or content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def _is_tool_result(message: Dict[str, Any]) -> bool:
+    """Whether a user message only carries tool results."""
+    content = message.get("content")
+    return isinstance(content, list) and any(
+        isinstance(block, dict) and block.get("type") == "tool_result" for block in content
+    )
+
+
+def _stream_events(message: Dict[str, Any]) -> List[tuple]:
+    """Split a complete response into Messages API stream events (name, data, tokens)."""
+    start = {**message, "content": [], "stop_reason": None,
+             "usage": {**message["usage"], "output_tokens": 1}}
+    events = [("message_start", {"type": "message_start", "message": start}, 0)]
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "text":
+            events.append(("content_block_start", {"type": "content_block_start", "index": index,
+                                                   "content_block": {"type": "text", "text": ""}}, 0))
+            text = block["text"]
+            for i in range(0, len(text), 16):
+                events.append(("content_block_delta", {"type": "content_block_delta", "index": index,
+                                                       "delta": {"type": "text_delta", "text": text[i:i + 16]}},
+                               max(1, len(text[i:i + 16]) // 4)))
+        else:
+            events.append(("content_block_start", {"type": "content_block_start", "index": index,
+                                                   "content_block": {**block, "input": {}}}, 0))
+            partial = json.dumps(block["input"])
+            for i in range(0, len(partial), 64):
+                events.append(("content_block_delta", {"type": "content_block_delta", "index": index,
+                                                       "delta": {"type": "input_json_delta",
+                                                                 "partial_json": partial[i:i + 64]}},
+                               max(1, len(partial[i:i + 64]) // 4)))
+        events.append(("content_block_stop", {"type": "content_block_stop", "index": index}, 0))
+    events.append(("message_delta", {"type": "message_delta",
+                                     "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                     "usage": message["usage"]}, 0))
+    events.append(("message_stop", {"type": "message_stop"}, 0))
+    return events
+
+
+def make_handler(mock: MockAnthropic):
+    """Build the request handler class bound to a MockAnthropic."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/mock/stats":
+                self._send_json(200, mock.stats())
+            else:
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("content-length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.startswith("/v1/messages"):
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                return
+
+            if self.path.startswith("/v1/messages/count_tokens"):
+                self._send_json(200, {"input_tokens": len(json.dumps(body.get("messages", []))) // 4})
+                return
+
+            mock.record(body, 1)
+            try:
+                message = mock.reply(body)
+                first_token, per_token = mock.timing(message)
+                time.sleep(first_token)
+                if body.get("stream"):
+                    self._send_stream(message, per_token)
+                else:
+                    time.sleep(per_token * message["usage"]["output_tokens"])
+                    self._send_json(200, message)
+            finally:
+                mock.record(body, -1)
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, message: Dict[str, Any], per_token: float) -> None:
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("cache-control", "no-cache")
+            self.send_header("transfer-encoding", "chunked")
+            self.end_headers()
+            for name, data, tokens in _stream_events(message):
+                if tokens:
+                    time.sleep(per_token * tokens)
+                chunk = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_mock_server(mock: Optional[MockAnthropic] = None, host: str = "127.0.0.1",
+                      port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the mock server on a background thread.
+
+    Args:
+        mock: Configured mock (default: DEFAULT_SCRIPT)
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+
+    Returns:
+        ThreadingHTTPServer: The running server (its URL is
+            http://<host>:<server.server_port>); call shutdown() to stop it
+    """
+    mock = mock or MockAnthropic()
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, name="mock-anthropic", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a mock Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--script", help="JSON reply script (default: the built-in benchmark script)")
+    parser.add_argument("--latency", help="First-token latency, e.g. lognormal:600,0.4")
+    parser.add_argument("--per-token-ms", type=float, help="Delay per output token")
+    parser.add_argument("--seed", type=int, help="Random seed for latencies")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    mock = MockAnthropic(script, latency=args.latency, per_token_ms=args.per_token_ms, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    print(f"Mock Anthropic API on http://{args.host}:{server.server_port} "
+          f"(first token {mock.first_token.spec}, {mock.per_token_seconds * 1000:g} ms/token)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Render - Micro-benchmark of game rendering, per game type.
+
+Times rendering a game page (the HTML wrapper plus the game's JSON config)
+and reports what each game costs to send and store next to the shared
+runtime script, which browsers fetch once and cache across games. Also
+checks that a name which would end the script comes back intact from the
+page's config.
+
+    cd backend
+    python -m bench.render --iterations 5000
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import timeit
+from typing import Any, Dict
+
+from agents.code_generator import CodeGeneratorAgent
+from services.static_assets import STATIC_DIR
+from templates.phaser_templates import GAME_FIELDS, RUNTIME_ASSET, render_game
+
+DESIGN = {
+    "game_title": "Robot Bakery Dash",
+    "player_character": {"name": "Baking Robot"},
+    "collectibles": [{"name": "Cupcakes"}],
+    "obstacles": [{"name": "Flour Cloud"}],
+}
+
+# A name that would end the config's script element if pasted in as-is
+UNSAFE_NAME = "Pat's \"Cake\" </script><script>alert(1)</script>"
+
+_CONFIG = re.compile(r'<script type="application/json" id="game-config">(.*?)</script>', re.DOTALL)
+
+
+def template_values(game_type: str, design: Dict[str, Any]) -> Dict[str, Any]:
+    """Template values the code generator uses for a design."""
+    generator = CodeGeneratorAgent()
+    customize = {
+        "platformer": generator._customize_platformer,
+        "top-down": generator._customize_top_down,
+        "obstacle-avoider": generator._customize_avoider,
+    }[game_type]
+    return customize(design["game_title"], design["player_character"],
+                     design["collectibles"], design["obstacles"], design)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark game page rendering")
+    parser.add_argument("--iterations", type=int, default=5000, help="Renders per measurement")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with open(os.path.join(STATIC_DIR, RUNTIME_ASSET), "rb") as f:
+        runtime = f.read()
+    results = {"runtime": {"bytes": len(runtime), "gzip_bytes": len(gzip.compress(runtime))}}
+    print(f"Shared runtime: {results['runtime']['bytes']} bytes "
+          f"({results['runtime']['gzip_bytes']} gzipped), cached by the browser\n")
+
+    print(f"{'game type':<18}{'render':>12}{'html bytes':>12}{'gzipped':>10}{'config bytes':>14}")
+    for game_type in GAME_FIELDS:
+        values = template_values(game_type, DESIGN)
+        config, html = render_game(game_type, values)
+        seconds = min(timeit.repeat(lambda: render_game(game_type, values),
+                                    number=args.iterations, repeat=3)) / args.iterations
+        body = html.encode("utf-8")
+        results[game_type] = {
+            "render_us": round(seconds * 1e6, 2),
+            "html_bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body)),
+            "config_bytes": len(json.dumps(config, separators=(",", ":")))
+        }
+        r = results[game_type]
+        print(f"{game_type:<18}{r['render_us']:>10}us{r['html_bytes']:>12}{r['gzip_bytes']:>10}{r['config_bytes']:>14}")
+
+    unsafe = dict(DESIGN, player_character={"name": UNSAFE_NAME}, collectibles=[{"name": UNSAFE_NAME}])
+    _, html = render_game("platformer", template_values("platformer", unsafe))
+    # Only the page's own three </script> tags may remain, and the name must survive the round trip
+    match = _CONFIG.search(html)
+    escaped = (html.count("</script>") == 3 and match is not None
+               and json.loads(match.group(1))["player_name"] == UNSAFE_NAME)
+    print(f"\nUnsafe name escaped: {escaped}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
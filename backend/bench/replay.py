@@ -0,0 +1,353 @@
+"""
+Replay - Run recorded conversations against the current code.
+
+Plays each recording made by services.conversation_recorder back through
+the app, one conversation at a time: the recorded user inputs are sent in
+order, and a mock Anthropic API answers every Claude call with the output
+recorded for the same kind of call (the same forced tool, or plain text)
+in the same turn, after the recorded latency. A call the recording has no
+answer for - because the current code makes more or different calls - is
+answered by the mock's fallback and counted as unmatched; recorded calls
+the current code no longer makes are counted as unused.
+
+The report totals Claude calls, tokens and wall time per conversation,
+including the game build's calls (recorded as a "build" entry), with the
+Claude calls each turn made so per-turn changes show up.
+Save it as a baseline, then replay again after a change to diff them:
+
+    cd backend
+    python -m bench.replay recordings/ --save baseline.json
+    # ... change prompts or routing ...
+    python -m bench.replay recordings/ --baseline baseline.json
+
+The diff exits non-zero when calls, tokens or wall time grow by more than
+--tolerance. Speculative analysis is switched off and the analysis cache
+is replaced so that every replay makes the same calls: a turn that used
+an analysis prepared off the request (speculative or cached) while
+recording gets the same analysis back, from the recording, and one that
+did not gets none. Recordings made before prepared analyses were
+recorded answer the extra analysis call with the fallback.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from bench.benchmark import BUILD_POLL_SECONDS, InProcessClient, start_in_process_app
+from bench.mock_anthropic import MockAnthropic
+from schemas.book_schema import BookAnalysis, BookInfo
+from services import analysis_cache
+from services.conversation_recorder import load_recordings
+
+METRICS = ("llm_calls", "input_tokens", "output_tokens", "wall_seconds")
+
+
+class ReplayMock(MockAnthropic):
+    """Mock API that answers each call with the output recorded for it."""
+
+    def __init__(self, latency: str = "recorded", fallback_latency_ms: float = 0.0):
+        """
+        Initialize the mock.
+
+        Args:
+            latency: "recorded" to wait as long as the recorded call took,
+                     "none" to answer immediately
+            fallback_latency_ms: Delay for calls with no recorded answer
+        """
+        super().__init__(script={"rules": []})
+        self.latency = latency
+        self.fallback_latency = fallback_latency_ms / 1000 if latency == "recorded" else 0.0
+        self._pending: List[Dict[str, Any]] = []
+        self._background: List[Dict[str, Any]] = []
+        self._fallback_text = "OK"
+        self.conversation = {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0}
+        self._timings: Dict[str, Tuple[float, float]] = {}
+        self.matched = 0
+        self.unmatched = 0
+        self.unused = 0
+
+    def start_conversation(self, background: List[Dict[str, Any]]) -> None:
+        """Reset per-conversation counts and load the calls recorded off the request (builds)."""
+        with self._lock:
+            self._background = [call for call in background if not call.get("error")]
+            self.conversation = {"llm_calls": 0, "input_tokens": 0, "output_tokens": 0}
+
+    def start_turn(self, turn: Dict[str, Any]) -> None:
+        """Load the recorded calls for the next turn."""
+        with self._lock:
+            self.unused += len(self._pending)
+            self._pending = [call for call in turn.get("calls", []) if not call.get("error")]
+            self._fallback_text = turn.get("output") or "OK"
+
+    def finish(self) -> None:
+        """Count recorded calls left over at the end of a conversation."""
+        self.start_turn({})
+        with self._lock:
+            self.unused += len(self._background)
+            self._background = []
+
+    def reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        tool_choice = body.get("tool_choice") or {}
+        forced_tool = tool_choice.get("name") if tool_choice.get("type") == "tool" else None
+        with self._lock:
+            call = None
+            for calls in (self._pending, self._background):
+                call = next((c for c in calls if c.get("tool") == forced_tool), None)
+                if call is not None:
+                    calls.remove(call)
+                    break
+            if call is None:
+                self.unmatched += 1
+                fallback_text = self._fallback_text
+            else:
+                self.matched += 1
+
+        if call is None:
+            # Forced tools get schema-valid synthesized input; text gets the turn's recorded reply
+            message = super().reply(body)
+            if not forced_tool:
+                message["content"] = [{"type": "text", "text": fallback_text}]
+                message["usage"]["output_tokens"] = max(1, len(fallback_text) // 4)
+            return self._account(message, (self.fallback_latency, 0.0))
+
+        content = []
+        if call.get("text"):
+            content.append({"type": "text", "text": call["text"]})
+        for tool_call in call.get("tool_calls", []):
+            content.append({"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                            "name": tool_call["name"], "input": tool_call["args"]})
+        if not content:
+            content.append({"type": "text", "text": ""})
+        message = super().reply(body)
+        output_tokens = (call.get("usage") or {}).get("output_tokens") or message["usage"]["output_tokens"]
+        message.update({
+            "content": content,
+            "stop_reason": "tool_use" if call.get("tool_calls") else "end_turn"
+        })
+        message["usage"]["output_tokens"] = output_tokens
+
+        timing = (0.0, 0.0)
+        if self.latency == "recorded":
+            latency = call.get("latency_ms", 0) / 1000
+            first_token = min(latency, call.get("ttft_ms", call.get("latency_ms", 0)) / 1000)
+            timing = (first_token, (latency - first_token) / max(1, output_tokens))
+        return self._account(message, timing)
+
+    def _account(self, message: Dict[str, Any], timing: Tuple[float, float]) -> Dict[str, Any]:
+        """Add a reply to the conversation's totals and remember its delays."""
+        with self._lock:
+            self._timings[message["id"]] = timing
+            self.conversation["llm_calls"] += 1
+            self.conversation["input_tokens"] += message["usage"]["input_tokens"]
+            self.conversation["output_tokens"] += message["usage"]["output_tokens"]
+        return message
+
+    def timing(self, message: Dict[str, Any]) -> Tuple[float, float]:
+        with self._lock:
+            return self._timings.pop(message["id"], (0.0, 0.0))
+
+    def replay_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"matched": self.matched, "unmatched": self.unmatched, "unused": self.unused}
+
+
+class ReplayAnalysisCache:
+    """Analysis cache that holds, for each turn, only the analysis prepared for it while recording."""
+
+    def __init__(self):
+        self._analysis: Optional[Dict[str, Any]] = None
+
+    def start_turn(self, turn: Dict[str, Any]) -> None:
+        """Load the analysis the recorded turn used, if any."""
+        self._analysis = (turn.get("prepared_analysis") or {}).get("analysis")
+
+    def get(self, book_info: BookInfo) -> Optional[BookAnalysis]:
+        return BookAnalysis(**self._analysis) if self._analysis else None
+
+    def put(self, book_info: BookInfo, analysis: BookAnalysis) -> None:
+        pass
+
+
+def _recorded_totals(recordings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Calls, tokens and wall time of the recordings as they happened live."""
+    totals = {metric: 0 for metric in METRICS}
+    for recording in recordings:
+        for turn in recording["turns"]:
+            totals["llm_calls"] += len(turn.get("calls", []))
+            totals["wall_seconds"] += turn.get("wall_ms", 0) / 1000
+            for call in turn.get("calls", []):
+                usage = call.get("usage") or {}
+                totals["input_tokens"] += usage.get("input_tokens", 0)
+                totals["output_tokens"] += usage.get("output_tokens", 0)
+    totals["wall_seconds"] = round(totals["wall_seconds"], 2)
+    return totals
+
+
+def run_replay(recordings: List[Dict[str, Any]], latency: str = "recorded") -> Dict[str, Any]:
+    """
+    Replay recorded conversations through the app in this process.
+
+    Args:
+        recordings: Conversations from load_recordings()
+        latency: "recorded" or "none" (see ReplayMock)
+
+    Returns:
+        dict: Report with totals and per-conversation results
+    """
+    # Background work would make the calls each replay makes vary; prepared analyses come from the recording
+    os.environ["SPECULATIVE_ANALYSIS"] = "false"
+    os.environ["ANALYSIS_CACHE"] = "true"
+    prepared_analyses = ReplayAnalysisCache()
+    analysis_cache._analysis_cache_instance = prepared_analyses
+
+    recorded_latencies = [call["latency_ms"] for recording in recordings for turn in recording["turns"]
+                          for call in turn.get("calls", []) if call.get("latency_ms")]
+    mock = ReplayMock(latency, statistics.median(recorded_latencies) if recorded_latencies else 0.0)
+    app_module, server = start_in_process_app(mock)
+
+    conversations: Dict[str, Dict[str, Any]] = {}
+    try:
+        for recording in recordings:
+            turns = [turn for turn in recording["turns"] if turn.get("kind", "turn") == "turn"]
+            mock.start_conversation([call for turn in recording["turns"] if turn.get("kind", "turn") != "turn"
+                                     for call in turn.get("calls", [])])
+            client = InProcessClient(app_module.app)
+            _, payload, _ = client.request("POST", "/api/start_session")
+            session_id = payload["session_id"]
+            result = {"wall_seconds": 0.0, "turns": 0, "calls_per_turn": [], "phase_mismatches": 0,
+                      "final_phase": payload.get("phase"), "errors": 0}
+
+            data: Dict[str, Any] = {}
+            started = time.perf_counter()
+            for turn in turns:
+                mock.start_turn(turn)
+                prepared_analyses.start_turn(turn)
+                status, data, _ = client.request("POST", "/api/message",
+                                                 {"message": turn["input"], "session_id": session_id})
+                result["turns"] += 1
+                if status != 200 or not data:
+                    result["errors"] += 1
+                    result["calls_per_turn"].append(None)
+                    continue
+                result["calls_per_turn"].append(data.get("llm_calls"))
+                result["final_phase"] = data.get("phase")
+                if turn.get("next_phase") and data.get("phase") != turn["next_phase"]:
+                    result["phase_mismatches"] += 1
+
+            # Let the game build make its calls before the next conversation starts
+            job = (data or {}).get("build_job")
+            while job and job.get("status") in ("queued", "running"):
+                time.sleep(BUILD_POLL_SECONDS)
+                _, job, _ = client.request("GET", f"/api/build/{job['job_id']}?session_id={session_id}")
+            mock.finish()
+
+            result.update(mock.conversation)
+            result["wall_seconds"] = round(time.perf_counter() - started, 3)
+            conversations[recording["id"]] = result
+    finally:
+        server.shutdown()
+
+    totals = {metric: sum(c[metric] for c in conversations.values()) for metric in METRICS}
+    totals["wall_seconds"] = round(totals["wall_seconds"], 3)
+    return {
+        "recordings": len(recordings),
+        "turns": sum(c["turns"] for c in conversations.values()),
+        "latency": latency,
+        "totals": totals,
+        "recorded": _recorded_totals(recordings),
+        "replay": mock.replay_stats(),
+        "phase_mismatches": sum(c["phase_mismatches"] for c in conversations.values()),
+        "errors": sum(c["errors"] for c in conversations.values()),
+        "conversations": conversations
+    }
+
+
+def diff_reports(current: Dict[str, Any], baseline: Dict[str, Any],
+                 tolerance: float = 0.05) -> Tuple[List[str], bool]:
+    """
+    Compare a replay report with a baseline report.
+
+    Args:
+        current: Report from run_replay()
+        baseline: Earlier report for the same recordings
+        tolerance: Relative growth allowed before a metric counts as a regression
+
+    Returns:
+        tuple: Lines describing the differences, and whether anything regressed
+    """
+    lines = []
+    regressed = False
+    for metric in METRICS:
+        before = baseline["totals"].get(metric, 0)
+        after = current["totals"].get(metric, 0)
+        change = (after - before) / before if before else (1.0 if after else 0.0)
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressed = True
+        elif change < -tolerance:
+            flag = "  improved"
+        lines.append(f"{metric:<14}{before:>12}{after:>12}{change:>+10.1%}{flag}")
+
+    for conversation_id, result in current["conversations"].items():
+        previous = baseline["conversations"].get(conversation_id)
+        if previous is None:
+            lines.append(f"{conversation_id}: not in baseline")
+        elif result["calls_per_turn"] != previous["calls_per_turn"]:
+            lines.append(f"{conversation_id}: calls per turn {previous['calls_per_turn']} -> "
+                         f"{result['calls_per_turn']}")
+        elif result["final_phase"] != previous["final_phase"]:
+            lines.append(f"{conversation_id}: ends in {result['final_phase']} "
+                         f"(was {previous['final_phase']})")
+    return lines, regressed
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a replay report."""
+    totals, recorded = report["totals"], report["recorded"]
+    print(f"\nReplayed {report['recordings']} conversations, {report['turns']} turns "
+          f"({report['latency']} latency)")
+    print(f"{'':<14}{'recorded':>12}{'replayed':>12}")
+    for metric in METRICS:
+        print(f"{metric:<14}{recorded[metric]:>12}{totals[metric]:>12}")
+    print(f"Recorded answers: {report['replay']}, phase mismatches: {report['phase_mismatches']}, "
+          f"errors: {report['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded conversations and diff against a baseline")
+    parser.add_argument("recordings", help="Recording file or directory (CONVERSATION_RECORD_DIR)")
+    parser.add_argument("--latency", choices=("recorded", "none"), default="recorded",
+                        help="Wait the recorded time per call, or answer immediately")
+    parser.add_argument("--baseline", help="Report to diff against")
+    parser.add_argument("--save", help="Write this replay's report here (e.g. as the next baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Relative growth allowed before a metric counts as a regression")
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.recordings)
+    if not recordings:
+        sys.exit(f"No recordings found in {args.recordings}")
+
+    report = run_replay(recordings, latency=args.latency)
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        lines, regressed = diff_reports(report, baseline, args.tolerance)
+        print(f"\n{'vs baseline':<14}{'before':>12}{'after':>12}{'change':>10}")
+        for line in lines:
+            print(line)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -87,3 +87,10 @@ class BookAnalysis(BaseModel):
             }
         }
 
+
+
+class BookMention(BaseModel):
+    """The book an agent message asks the reader to confirm, if any."""
+    names_book: bool = Field(..., description="Whether the message names one specific book")
+    title: Optional[str] = Field(None, description="The book's title, exactly as named")
+    author: Optional[str] = Field(None, description="The book's author, if named")
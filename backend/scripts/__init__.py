@@ -0,0 +1,4 @@
+"""
+Build and maintenance scripts, run from the backend directory with
+python -m scripts.<name>.
+"""
@@ -0,0 +1,79 @@
+"""
+Vendor Phaser - Download the pinned Phaser builds into frontend/static.
+
+Games load Phaser from frontend/static/js/vendor/phaser-<version>/ under a
+content fingerprint (see templates.phaser_templates), so it is cached
+forever and games work on networks that block CDNs. This script fetches
+both official builds - the full one and the smaller arcade-physics one,
+without Matter.js - and writes precompressed .gz (and, with Brotli
+installed, .br) copies next to them for the asset route to send.
+
+    cd backend
+    python -m scripts.vendor_phaser            # skip builds already present
+    python -m scripts.vendor_phaser --force    # download again
+
+A custom build (e.g. made with Phaser's custom build config to include
+only arcade physics, graphics and text) can be placed in the same
+directory and selected with PHASER_BUILD=<file name>.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import urllib.request
+
+from services.compression import precompress
+from services.static_assets import STATIC_DIR
+from templates.phaser_templates import PHASER_BUILDS, PHASER_CDN, PHASER_VERSION, phaser_vendor_dir
+
+# Content coding -> suffix of the precompressed copy
+_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def vendor(file_name: str, force: bool = False) -> bool:
+    """
+    Download one build and write its precompressed copies.
+
+    Args:
+        file_name: Build file name in Phaser's dist directory
+        force: Download even if the file is already present
+
+    Returns:
+        bool: Whether the build is present afterwards
+    """
+    path = os.path.join(STATIC_DIR, phaser_vendor_dir(), file_name)
+    if os.path.exists(path) and not force:
+        print(f"{file_name}: already vendored")
+        return True
+
+    url = PHASER_CDN.format(version=PHASER_VERSION, file=file_name)
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            data = response.read()
+    except OSError as e:
+        print(f"{file_name}: could not download {url}: {e}")
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    for encoding, variant in precompress(data).items():
+        with open(path + _SUFFIXES[encoding], "wb") as f:
+            f.write(variant)
+    print(f"{file_name}: {len(data)} bytes, sha256 {hashlib.sha256(data).hexdigest()}")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"Vendor Phaser {PHASER_VERSION} into frontend/static")
+    parser.add_argument("--force", action="store_true", help="Download builds that are already present")
+    args = parser.parse_args()
+
+    results = [vendor(file_name, args.force) for file_name in PHASER_BUILDS.values()]
+    if not all(results):
+        print("Games will load Phaser from the CDN until it is vendored.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
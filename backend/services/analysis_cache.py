@@ -0,0 +1,252 @@
+"""
+Analysis Cache - Reuse BookAnalysis results across sessions.
+
+Most kids pick from the same few hundred books, so the structured
+analysis of "Dragons Love Tacos" is worth computing once and sharing.
+Analyses are keyed by a normalized title and author and stored in a
+SQLite database (WAL mode, so every worker process on the host shares
+it and it survives restarts), fronted by a small in-process LRU so
+repeat hits never touch the disk. Only session-neutral analyses belong
+here: one refined with a child's discussion describes that conversation,
+not the book, and is never stored.
+
+Entries expire after a TTL, the least recently used entries are evicted
+when the cache is full, and hit/miss counters are exposed for /api/metrics.
+"""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from schemas.book_schema import BookAnalysis, BookInfo
+
+_LEADING_ARTICLE = re.compile(r"^(the|a|an)\s+")
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _NON_WORD.sub(" ", text.lower().replace("'", "").replace("\u2019", ""))
+    return " ".join(text.split())
+
+
+def book_key(title: str, author: str) -> str:
+    """
+    Build the cache key for a book.
+
+    "The Very Hungry Caterpillar" / "Eric Carle." and "very hungry
+    caterpillar" / "eric carle" map to the same key.
+
+    Args:
+        title: Book title
+        author: Book author
+
+    Returns:
+        str: Normalized "title|author" key
+    """
+    title = _LEADING_ARTICLE.sub("", normalize_text(title))
+    return f"{title}|{normalize_text(author)}"
+
+
+class AnalysisCache:
+    """
+    Persistent, process-shared cache of validated BookAnalysis objects.
+
+    The SQLite table is the shared source of truth; the in-process LRU
+    only saves the disk read and JSON parse on repeat hits.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 30 * 24 * 3600,
+                 max_entries: int = 2000, memory_entries: int = 200):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Database file path (default: a file in the system temp dir)
+            ttl_seconds: Age after which an analysis is recomputed (0 = never)
+            max_entries: Analyses kept on disk before LRU eviction
+            memory_entries: Analyses also kept parsed in this process
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), "game_maker_analyses.db")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._expired = 0
+        self._evictions = 0
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "book_key TEXT PRIMARY KEY, "
+            "analysis TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, book_info: BookInfo) -> Optional[BookAnalysis]:
+        """
+        Look up the cached analysis for a book.
+
+        Args:
+            book_info: The identified book
+
+        Returns:
+            BookAnalysis: The cached analysis, or None on a miss
+        """
+        key = book_key(book_info.title, book_info.author)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                analysis, created_at = entry
+                if not self._expired_at(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return analysis
+                del self._memory[key]
+
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT analysis, created_at FROM analyses WHERE book_key = ?", (key,)
+        ).fetchone()
+
+        if row is None or self._expired_at(row[1], now):
+            if row is not None:
+                conn.execute("DELETE FROM analyses WHERE book_key = ?", (key,))
+                conn.commit()
+            with self._lock:
+                self._misses += 1
+                self._expired += row is not None
+            return None
+
+        conn.execute("UPDATE analyses SET last_access = ? WHERE book_key = ?", (now, key))
+        conn.commit()
+
+        analysis = BookAnalysis(**json.loads(row[0]))
+        with self._lock:
+            self._disk_hits += 1
+            self._remember(key, analysis, row[1])
+        return analysis
+
+    def put(self, book_info: BookInfo, analysis: BookAnalysis) -> None:
+        """
+        Store a validated analysis for a book.
+
+        Args:
+            book_info: The identified book
+            analysis: Analysis to share with future sessions
+        """
+        key = book_key(book_info.title, book_info.author)
+        now = time.time()
+
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO analyses (book_key, analysis, created_at, last_access) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(book_key) DO UPDATE SET analysis = excluded.analysis, "
+            "created_at = excluded.created_at, last_access = excluded.last_access",
+            (key, analysis.json(), now, now)
+        )
+
+        evicted = 0
+        if self.max_entries:
+            cursor = conn.execute(
+                "DELETE FROM analyses WHERE book_key IN ("
+                "SELECT book_key FROM analyses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            evicted = cursor.rowcount
+        conn.commit()
+
+        with self._lock:
+            self._stores += 1
+            self._evictions += evicted
+            self._remember(key, analysis, now)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for monitoring.
+
+        Returns:
+            dict: Entry count, hits by tier, misses, hit rate and evictions
+        """
+        count = self._connection().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "path": self.path,
+                "entries": count,
+                "memory_entries": len(self._memory),
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "expired": self._expired,
+                "lru_evictions": self._evictions
+            }
+
+    def _remember(self, key: str, analysis: BookAnalysis, created_at: float) -> None:
+        """Keep a parsed analysis in the in-process LRU (caller holds the lock)."""
+        self._memory[key] = (analysis, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _expired_at(self, created_at: float, now: float) -> bool:
+        """Whether an entry created at created_at has outlived the TTL."""
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+
+# Singleton instance
+_analysis_cache_instance = None
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """
+    Get or create the Analysis Cache singleton.
+
+    Configured with ANALYSIS_CACHE (true/false), ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_TTL_DAYS and ANALYSIS_CACHE_MAX_ENTRIES.
+
+    Returns:
+        AnalysisCache: The shared cache, or None if caching is disabled
+    """
+    global _analysis_cache_instance
+    if os.getenv("ANALYSIS_CACHE", "true").lower() != "true":
+        return None
+    if _analysis_cache_instance is None:
+        _analysis_cache_instance = AnalysisCache(
+            path=os.getenv("ANALYSIS_CACHE_PATH"),
+            ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "30")) * 24 * 3600,
+            max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "2000"))
+        )
+    return _analysis_cache_instance
@@ -0,0 +1,313 @@
+"""
+Book Catalog - Identify popular children's books without asking Claude.
+
+A bundled tab-separated catalog (title, author, series, aliases) is
+memory-mapped on first use and indexed by word trigrams, so "the taco
+dragon book" or "I read dragons love tacos!" resolves to a BookInfo in
+microseconds. The orchestrator tries the catalog first in the
+IDENTIFYING phase and only falls back to the Story Analyst when nothing
+matches confidently.
+
+A query that names a series or an author with several catalog books
+("harry potter", "mo willems"), or that matches several titles equally
+well, is ambiguous: instead of one arbitrary book the lookup returns the
+candidates, so the Story Analyst can ask which one it was.
+
+Matching works on normalized words (lowercase, no punctuation, filler
+words like "the" and "book" dropped, plural "s" stripped), each padded
+and split into trigrams, so word order and small typos don't matter.
+"""
+import mmap
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from schemas.book_schema import BookInfo
+from services.analysis_cache import normalize_text
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "children_books.tsv"
+)
+
+# Words that say nothing about which book it is
+STOP_WORDS = {
+    "a", "an", "the", "and", "of", "by", "i", "we", "my", "me", "it", "its", "is", "was",
+    "read", "just", "book", "books", "story", "about", "called", "one", "with", "this", "that",
+    "mom", "dad", "today", "yesterday", "really", "liked", "loved", "s"
+}
+
+# Names this short only match when the whole query is close to them
+MIN_CONTAINMENT_TRIGRAMS = 6
+
+# Share of a name's trigrams the query must contain, so "a dog book"
+# doesn't match "Go, Dog. Go!"
+MIN_NAME_COVERAGE = 0.75
+
+# Similarity a query needs to a series or author name to count as naming
+# it ("harry potter", not "the cat in the hat by dr seuss")
+MIN_GROUP_SCORE = 0.85
+
+# Candidates returned for an ambiguous query
+MAX_CANDIDATES = 5
+
+
+def _words(text: str) -> List[str]:
+    """Normalize text into the significant words used for matching."""
+    words = []
+    for word in normalize_text(text).split():
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Split text into padded word trigrams.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        set: Trigrams of every significant word, e.g. "taco" -> " ta", "tac", "aco", "co "
+    """
+    grams = set()
+    for word in _words(text):
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class BookCatalog:
+    """
+    Trigram index over the bundled children's-book catalog.
+
+    The file is only opened, mapped and indexed on the first lookup.
+    Records stay in the mapping and are decoded only when returned.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_score: float = 0.72):
+        """
+        Initialize the catalog.
+
+        Args:
+            path: Catalog TSV path (default: the bundled data/children_books.tsv)
+            min_score: Similarity (0-1) a match needs to be returned
+        """
+        self.path = path or DEFAULT_CATALOG_PATH
+        self.min_score = min_score
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._map: Optional[mmap.mmap] = None
+        self._records: List[tuple] = []       # (start, end) byte offsets per record
+        self._names: List[tuple] = []         # (record id, trigram count) per title/alias
+        self._index: Dict[str, List[int]] = {}
+        self._groups: List[tuple] = []        # (trigrams, record ids) per series/author with 2+ books
+
+        self._lookups = 0
+        self._matches = 0
+        self._ambiguous = 0
+        self._lookup_seconds = 0.0
+
+    def _load(self) -> None:
+        """Map the catalog file and build the trigram index (once)."""
+        with self._lock:
+            if self._loaded:
+                return
+
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            index = defaultdict(list)
+            groups: Dict[str, List[int]] = defaultdict(list)
+            offset = 0
+            size = len(self._map)
+            while offset < size:
+                end = self._map.find(b"\n", offset)
+                end = size if end == -1 else end
+                line = self._map[offset:end].decode("utf-8")
+                if line.strip() and not line.startswith("#"):
+                    record_id = len(self._records)
+                    self._records.append((offset, end))
+                    title, author, series, aliases = (line.split("\t") + ["", "", ""])[:4]
+                    for group in {normalize_text(series), normalize_text(author)} - {""}:
+                        groups[group].append(record_id)
+                    for name in [title] + [a for a in aliases.split("|") if a.strip()]:
+                        grams = trigrams(name)
+                        if not grams:
+                            continue
+                        name_id = len(self._names)
+                        self._names.append((record_id, len(grams)))
+                        for gram in grams:
+                            index[gram].append(name_id)
+                offset = end + 1
+
+            self._index = dict(index)
+            self._groups = [(trigrams(name), records) for name, records in groups.items()
+                            if len(records) > 1 and trigrams(name)]
+            self._loaded = True
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the catalog book a piece of text is talking about.
+
+        A name scores by Dice similarity with the query, or - for names
+        long enough to be distinctive - by how much of the name appears
+        in the query, so a title mentioned mid-sentence still matches.
+        Names the query covers less than MIN_NAME_COVERAGE of never match.
+
+        A series or author with several books that the query names more
+        closely than any title, or several books tied for the best score,
+        make the match ambiguous.
+
+        Args:
+            text: What the user said, e.g. "the taco dragon book"
+
+        Returns:
+            dict: title, author, series and score of the best match, or None
+                  if nothing scores at least min_score. An ambiguous match
+                  has candidates (title, author, series dicts) instead of a
+                  title, author and series.
+        """
+        self._load()
+        started = time.perf_counter()
+
+        query = trigrams(text)
+        scores: Dict[int, float] = {}
+        if query:
+            overlap: Dict[int, int] = defaultdict(int)
+            for gram in query:
+                for name_id in self._index.get(gram, ()):
+                    overlap[name_id] += 1
+
+            for name_id, common in overlap.items():
+                record_id, name_size = self._names[name_id]
+                coverage = common / name_size
+                if coverage < MIN_NAME_COVERAGE:
+                    continue
+                score = 2 * common / (len(query) + name_size)
+                if name_size >= MIN_CONTAINMENT_TRIGRAMS:
+                    score = max(score, 0.9 * coverage)
+                scores[record_id] = max(score, scores.get(record_id, 0.0))
+
+        best_score = round(max(scores.values(), default=0.0), 3)
+        best_records = [record_id for record_id, score in scores.items() if round(score, 3) == best_score]
+        group_score, group_records = self._best_group(query)
+
+        match = None
+        if group_score >= max(MIN_GROUP_SCORE, self.min_score) and group_score > best_score:
+            match = self._ambiguous_match(group_records, group_score)
+        elif best_score >= self.min_score and len(best_records) > 1:
+            match = self._ambiguous_match(best_records, best_score)
+        elif best_score >= self.min_score:
+            match = {**self._record(best_records[0]), "score": best_score}
+
+        with self._lock:
+            self._lookups += 1
+            self._matches += match is not None
+            self._ambiguous += match is not None and "candidates" in match
+            self._lookup_seconds += time.perf_counter() - started
+        return match
+
+    def _best_group(self, query: Set[str]) -> tuple:
+        """Score the query against every series and author name (Dice similarity)."""
+        best_score, best_records = 0.0, []
+        for grams, records in self._groups if query else ():
+            score = round(2 * len(query & grams) / (len(query) + len(grams)), 3)
+            if score > best_score:
+                best_score, best_records = score, records
+        return best_score, best_records
+
+    def _ambiguous_match(self, record_ids: List[int], score: float) -> Dict[str, Any]:
+        """Build the match for a query that could be any of several books."""
+        return {
+            "candidates": [self._record(record_id) for record_id in sorted(record_ids)[:MAX_CANDIDATES]],
+            "score": score
+        }
+
+    def identify(self, text: str) -> Optional[BookInfo]:
+        """
+        Resolve text to a BookInfo.
+
+        Args:
+            text: What the user said
+
+        Returns:
+            BookInfo: The matched book, or None if nothing matched confidently
+                      or the text could be several books
+        """
+        match = self.lookup(text)
+        if match is None or "candidates" in match:
+            return None
+        return self.book_info(match)
+
+    @staticmethod
+    def book_info(record: Dict[str, Any]) -> BookInfo:
+        """
+        Turn a catalog record (a match or a candidate) into a BookInfo.
+
+        Args:
+            record: Dict with title, author and series
+
+        Returns:
+            BookInfo: The book
+        """
+        summary = f"A wonderful book by {record['author']}"
+        if record["series"]:
+            summary += f" from the {record['series']} series"
+        return BookInfo(title=record["title"], author=record["author"], summary=summary)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get catalog statistics for monitoring.
+
+        Returns:
+            dict: Books loaded, lookups, matches (and how many were
+                  ambiguous) and mean lookup time
+        """
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "books": len(self._records),
+                "lookups": self._lookups,
+                "matches": self._matches,
+                "ambiguous": self._ambiguous,
+                "mean_lookup_us": round(self._lookup_seconds / self._lookups * 1e6, 1)
+                if self._lookups else 0.0
+            }
+
+    def _record(self, record_id: int) -> Dict[str, str]:
+        """Decode one catalog record from the mapped file."""
+        start, end = self._records[record_id]
+        title, author, series = (self._map[start:end].decode("utf-8").split("\t") + ["", ""])[:3]
+        return {"title": title, "author": author, "series": series}
+
+
+# Singleton instance
+_book_catalog_instance = None
+
+
+def get_book_catalog() -> Optional[BookCatalog]:
+    """
+    Get or create the Book Catalog singleton.
+
+    Configured with BOOK_CATALOG (true/false), BOOK_CATALOG_PATH and
+    BOOK_CATALOG_MIN_SCORE.
+
+    Returns:
+        BookCatalog: The shared catalog, or None if the catalog is disabled
+    """
+    global _book_catalog_instance
+    if os.getenv("BOOK_CATALOG", "true").lower() != "true":
+        return None
+    if _book_catalog_instance is None:
+        _book_catalog_instance = BookCatalog(
+            path=os.getenv("BOOK_CATALOG_PATH"),
+            min_score=float(os.getenv("BOOK_CATALOG_MIN_SCORE", "0.72"))
+        )
+    return _book_catalog_instance
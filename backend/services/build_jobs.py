@@ -0,0 +1,250 @@
+"""
+Build Jobs - Build games off the request path.
+
+Turning a finished design conversation into a game takes an LLM call
+(the structured game design) plus template rendering. Doing that inside
+the /api/message request made it the slowest request in the system and
+the one most likely to hit a worker timeout. Builds are now submitted
+to a bounded worker pool and tracked by job ID through the states
+
+    queued -> running -> done | failed
+
+Clients poll GET /api/build/<job_id> or subscribe to
+GET /api/build/<job_id>/events for a push when the build finishes.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BuildQueueFull(Exception):
+    """Raised when a build is submitted while the queue is at capacity."""
+
+
+class BuildJob:
+    """One game build and its progress."""
+
+    def __init__(self, session_id: str):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Client-facing job status.
+
+        Returns:
+            dict: Job ID, status, timings and (once finished) error
+        """
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "queued_seconds": round((self.started_at or time.time()) - self.created_at, 3),
+            "run_seconds": round((self.finished_at or time.time()) - self.started_at, 3)
+            if self.started_at else None,
+            "error": self.error
+        }
+
+
+class BuildQueue:
+    """
+    Bounded pool of game-build workers with job tracking.
+
+    Finished jobs are kept for retention_seconds so late pollers still
+    see the outcome.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 100,
+                 retention_seconds: float = 3600):
+        """
+        Initialize the queue.
+
+        Args:
+            max_workers: Builds that may run at once
+            max_pending: Queued plus running builds before submit() refuses more
+            retention_seconds: How long finished jobs stay visible
+        """
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="build")
+        self._max_workers = max_workers
+        self._condition = threading.Condition()
+        self._jobs: "OrderedDict[str, BuildJob]" = OrderedDict()
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    def submit(self, session_id: str, build: Callable[[], Dict[str, Any]],
+               on_finished: Optional[Callable[[BuildJob], None]] = None) -> BuildJob:
+        """
+        Queue a build.
+
+        Args:
+            session_id: Session the game belongs to
+            build: Does the work and returns the build result dict
+                (a result with success False marks the job failed)
+            on_finished: Called on the worker thread once the job is done or failed
+
+        Returns:
+            BuildJob: The queued job
+
+        Raises:
+            BuildQueueFull: If max_pending builds are already queued or running
+        """
+        job = BuildJob(session_id)
+        with self._condition:
+            self._prune()
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                self._rejected += 1
+                raise BuildQueueFull(f"{pending} builds already pending")
+            self._jobs[job.id] = job
+            self._submitted += 1
+
+        self._executor.submit(self._run, job, build, on_finished)
+        return job
+
+    def get(self, job_id: str) -> Optional[BuildJob]:
+        """Look up a job by ID (None if unknown or expired)."""
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[BuildJob]:
+        """
+        Wait until a job changes state or finishes.
+
+        Args:
+            job_id: Job to wait on
+            timeout: Longest time to wait, in seconds
+
+        Returns:
+            BuildJob: The job (possibly still queued/running on timeout), or None if unknown
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            status = job.status
+            self._condition.wait_for(lambda: job.status != status, timeout=timeout)
+            return job
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Number of queued jobs ahead of this one (None if it is not queued)."""
+        with self._condition:
+            ahead = 0
+            for job in self._jobs.values():
+                if job.id == job_id:
+                    return ahead if job.status == QUEUED else None
+                if job.status == QUEUED:
+                    ahead += 1
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics for monitoring.
+
+        Returns:
+            dict: Queued/running counts, totals and mean wait/run times
+        """
+        with self._condition:
+            finished = self._completed + self._failed
+            return {
+                "workers": self._max_workers,
+                "queued": sum(1 for j in self._jobs.values() if j.status == QUEUED),
+                "running": sum(1 for j in self._jobs.values() if j.status == RUNNING),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "mean_wait_seconds": round(self._total_wait / finished, 3) if finished else 0.0,
+                "mean_run_seconds": round(self._total_run / finished, 3) if finished else 0.0
+            }
+
+    def _run(self, job: BuildJob, build: Callable[[], Dict[str, Any]],
+             on_finished: Optional[Callable[[BuildJob], None]]) -> None:
+        """Run one build on a worker thread."""
+        self._set_status(job, RUNNING)
+
+        try:
+            job.result = build()
+            if not job.result.get("success"):
+                job.error = job.result.get("error", "Build failed")
+        except Exception as e:
+            job.error = str(e)
+
+        if on_finished is not None:
+            try:
+                on_finished(job)
+            except Exception as e:
+                print(f"Build job {job.id} completion handler failed: {e}")
+                job.error = job.error or str(e)
+
+        self._set_status(job, FAILED if job.error else DONE)
+
+    def _set_status(self, job: BuildJob, status: str) -> None:
+        """Move a job to a new state and wake anyone waiting on it."""
+        with self._condition:
+            now = time.time()
+            job.status = status
+            if status == RUNNING:
+                job.started_at = now
+                self._total_wait += now - job.created_at
+            else:
+                job.finished_at = now
+                self._total_run += now - job.started_at
+                if status == DONE:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+            self._condition.notify_all()
+
+    def _prune(self) -> None:
+        """Forget finished jobs past their retention (caller holds the lock)."""
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+
+# Singleton instance
+_build_queue_instance = None
+
+
+def get_build_queue() -> BuildQueue:
+    """
+    Get or create the Build Queue singleton.
+
+    Configured with BUILD_WORKERS and BUILD_MAX_PENDING.
+
+    Returns:
+        BuildQueue: The shared queue
+    """
+    global _build_queue_instance
+    if _build_queue_instance is None:
+        _build_queue_instance = BuildQueue(
+            max_workers=int(os.getenv("BUILD_WORKERS", "2")),
+            max_pending=int(os.getenv("BUILD_MAX_PENDING", "100"))
+        )
+    return _build_queue_instance
@@ -0,0 +1,39 @@
+"""
+Compression - Precompressed variants of generated games.
+
+Games are compressed once, when they are stored, at the highest levels
+(gzip 9, brotli 11) - far too slow to run per request, but a one-off cost
+per game. services.game_store writes the variants next to the game's HTML,
+and the game routes (/api/game/<session_id>, /g/<game_hash>) send the one
+the client's Accept-Encoding prefers. scripts.vendor_phaser precompresses
+the vendored Phaser builds the same way.
+
+Brotli needs the optional "Brotli" package; without it only gzip variants
+are made.
+"""
+import gzip
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings we precompress, in the order we prefer to send them
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """
+    Compress a game with every available content coding.
+
+    Args:
+        data: The game's HTML, encoded
+
+    Returns:
+        dict: Content coding ("br", "gzip") -> compressed bytes
+    """
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    return variants
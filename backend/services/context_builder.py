@@ -0,0 +1,281 @@
+"""
+Context Builder - Fit conversation history into a per-call token budget.
+
+GameOrchestrator.conversation_history only ever grows, so sending it raw
+makes every turn slower and more expensive than the last. The context
+builder keeps the most recent messages verbatim and folds older ones into
+a rolling summary, so prompt size stays flat however long a conversation
+runs.
+
+The summary is built incrementally: each message is compressed to one
+line exactly once, when it first falls out of the verbatim window, and
+the result is kept in a small JSON-serializable state dict that lives on
+the orchestrator (and so in the session store). Folding happens in
+chunks - the verbatim window is cut back to half its budget whenever it
+overflows - so the prompt prefix stays identical for several turns in a
+row and keeps hitting Anthropic's prompt cache.
+
+Budgets are set per agent and call type and can be overridden with
+environment variables named CONTEXT_BUDGET_<AGENT>_<CALL_TYPE>, e.g.
+CONTEXT_BUDGET_STORY_ANALYST_CONVERSATION=2000.
+"""
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Default token budgets for (agent, call type)
+DEFAULT_BUDGETS: Dict[Tuple[str, str], int] = {
+    ("story_analyst", "conversation"): 3000,
+    ("story_analyst", "analysis"): 4000,
+    ("game_designer", "conversation"): 3000,
+    ("game_designer", "design"): 3000,
+    ("game_designer", "discussion"): 1000,
+}
+
+FALLBACK_BUDGET = 3000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of Claude tokens in a piece of text.
+
+    Roughly four characters per token for English prose - close enough
+    to keep prompts inside a budget without a tokenizer round-trip.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    return (len(text) + 3) // 4
+
+
+def message_text(message: Any) -> str:
+    """Get the plain text of a message whose content is a string or content blocks."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content
+    )
+
+
+def message_tokens(message: Any) -> int:
+    """Estimate the tokens a message costs, including per-message overhead."""
+    return estimate_tokens(message_text(message)) + 4
+
+
+class ContextBuilder:
+    """
+    Builds token-budgeted context from a conversation history.
+
+    A budget is split between the rolling summary of older messages and
+    the verbatim recent messages. State for each history is passed in by
+    the caller, so one builder serves every session.
+    """
+
+    def __init__(self, budgets: Optional[Dict[Tuple[str, str], int]] = None,
+                 summary_share: float = 0.25, min_recent_messages: int = 2,
+                 summary_line_chars: int = 160):
+        """
+        Initialize the builder.
+
+        Args:
+            budgets: Token budget per (agent, call type)
+            summary_share: Fraction of a budget reserved for the rolling summary
+            min_recent_messages: Messages always kept verbatim, whatever their size
+            summary_line_chars: Longest summary line kept for a single message
+        """
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.summary_share = summary_share
+        self.min_recent_messages = min_recent_messages
+        self.summary_line_chars = summary_line_chars
+
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._folded_messages = 0
+        self._history_tokens = 0
+        self._context_tokens = 0
+
+    def budget(self, agent: str, call_type: str) -> int:
+        """
+        Get the token budget for an agent's call type.
+
+        Args:
+            agent: Agent name, e.g. "story_analyst"
+            call_type: Call type, e.g. "conversation" or "analysis"
+
+        Returns:
+            int: Token budget for the history part of the prompt
+        """
+        env_name = f"CONTEXT_BUDGET_{agent}_{call_type}".upper()
+        if os.getenv(env_name):
+            return int(os.getenv(env_name))
+        return self.budgets.get((agent, call_type), FALLBACK_BUDGET)
+
+    def build(self, messages: List[Any], state: Dict[str, Any], agent: str,
+              call_type: str) -> Dict[str, Any]:
+        """
+        Fit a conversation history into the budget for one call.
+
+        Args:
+            messages: The full history for this call, oldest first
+            state: Rolling summary state for this history (updated in place;
+                   start with an empty dict)
+            agent: Agent name
+            call_type: Call type
+
+        Returns:
+            dict: summary (text or None), messages (recent messages to send
+                  verbatim) and tokens (estimated size of both)
+        """
+        budget = self.budget(agent, call_type)
+        summary_budget = int(budget * self.summary_share)
+        recent_budget = budget - summary_budget
+
+        covered = state.setdefault("covered", {})
+        start = min(covered.get(call_type, 0), len(messages))
+
+        recent_tokens = sum(message_tokens(msg) for msg in messages[start:])
+        if recent_tokens > recent_budget:
+            # Fold down to half the window so the prefix stays stable for a while
+            start, recent_tokens = self._fold_point(messages, start, recent_tokens, recent_budget // 2)
+        covered[call_type] = start
+
+        lines = self._summary_lines(messages[:start], state)
+        summary = self._fit_summary(lines, summary_budget)
+        summary_tokens = estimate_tokens(summary) if summary else 0
+
+        with self._lock:
+            self._builds += 1
+            self._history_tokens += sum(message_tokens(msg) for msg in messages)
+            self._context_tokens += summary_tokens + recent_tokens
+
+        return {
+            "summary": summary,
+            "messages": list(messages[start:]),
+            "tokens": summary_tokens + recent_tokens
+        }
+
+    def transcript(self, messages: List[Any], state: Dict[str, Any], agent: str,
+                   call_type: str, agent_label: str = "Agent") -> str:
+        """
+        Build a budgeted plain-text transcript for a one-shot prompt.
+
+        Args:
+            messages: The full history, oldest first
+            state: Rolling summary state for this history
+            agent: Agent name
+            call_type: Call type
+            agent_label: Speaker label for the agent's messages
+
+        Returns:
+            str: Summary of earlier messages followed by the recent messages
+        """
+        context = self.build(messages, state, agent, call_type)
+        parts = []
+        if context["summary"]:
+            parts.append(f"Earlier in the conversation (summary):\n{context['summary']}\n")
+        for msg in context["messages"]:
+            if isinstance(msg, HumanMessage):
+                parts.append(f"User: {message_text(msg)}")
+            elif isinstance(msg, AIMessage):
+                parts.append(f"{agent_label}: {message_text(msg)}")
+        return "\n".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get builder statistics for monitoring.
+
+        Returns:
+            dict: Builds, messages folded into summaries, and history vs.
+                  context token totals
+        """
+        with self._lock:
+            return {
+                "builds": self._builds,
+                "folded_messages": self._folded_messages,
+                "history_tokens": self._history_tokens,
+                "context_tokens": self._context_tokens,
+                "compression_ratio": round(self._context_tokens / self._history_tokens, 3)
+                if self._history_tokens else 1.0
+            }
+
+    def _fold_point(self, messages: List[Any], start: int, recent_tokens: int,
+                    target: int) -> Tuple[int, int]:
+        """
+        Move the start of the verbatim window forward until it fits the target.
+
+        The window always keeps min_recent_messages and always starts on a
+        user message, since Claude requires the conversation to open with one.
+        """
+        latest_start = max(start, len(messages) - self.min_recent_messages)
+        while start < latest_start and recent_tokens > target:
+            recent_tokens -= message_tokens(messages[start])
+            start += 1
+        while start < latest_start and not isinstance(messages[start], HumanMessage):
+            recent_tokens -= message_tokens(messages[start])
+            start += 1
+        return start, recent_tokens
+
+    def _summary_lines(self, folded: List[Any], state: Dict[str, Any]) -> List[str]:
+        """Compress newly folded messages, reusing lines computed on earlier turns."""
+        lines = state.setdefault("lines", [])
+        new_lines = [self._compress(msg) for msg in folded[len(lines):]]
+        if new_lines:
+            lines.extend(new_lines)
+            with self._lock:
+                self._folded_messages += len(new_lines)
+        return lines[:len(folded)]
+
+    def _compress(self, message: Any) -> str:
+        """Reduce one message to a single short summary line."""
+        speaker = "User" if isinstance(message, HumanMessage) else "Agent"
+        text = " ".join(message_text(message).split())
+        if len(text) > self.summary_line_chars:
+            # Prefer cutting at the end of a sentence
+            cut = text[:self.summary_line_chars]
+            sentence_end = max((m.end() for m in re.finditer(r"[.!?](?=\s)", cut)), default=0)
+            text = cut[:sentence_end] if sentence_end > self.summary_line_chars // 3 else cut.rstrip() + "…"
+        return f"- {speaker}: {text}"
+
+    def _fit_summary(self, lines: List[str], budget: int) -> Optional[str]:
+        """Join summary lines, dropping the oldest until they fit the budget."""
+        if not lines:
+            return None
+
+        kept: List[str] = []
+        tokens = 0
+        for line in reversed(lines):
+            line_tokens = estimate_tokens(line) + 1
+            if tokens + line_tokens > budget:
+                break
+            kept.append(line)
+            tokens += line_tokens
+
+        kept.reverse()
+        if len(kept) < len(lines):
+            kept.insert(0, f"- ({len(lines) - len(kept)} earlier messages omitted)")
+        return "\n".join(kept)
+
+
+# Singleton instance
+_context_builder_instance = None
+
+
+def get_context_builder() -> ContextBuilder:
+    """
+    Get or create the Context Builder singleton.
+
+    Returns:
+        ContextBuilder: The shared builder instance
+    """
+    global _context_builder_instance
+    if _context_builder_instance is None:
+        _context_builder_instance = ContextBuilder()
+    return _context_builder_instance
@@ -0,0 +1,322 @@
+"""
+Conversation Recorder - Capture real conversations as a replayable corpus.
+
+To tell whether a change to orchestrator routing or an agent prompt costs
+more Claude calls, tokens or time, we need real conversations to run it
+against. When CONVERSATION_RECORD_DIR is set, every turn of a sampled
+conversation is appended to <dir>/<recording_id>.jsonl.gz: the user's
+input, the reply, the phase before and after, the turn's wall time and
+each Claude call it made (agent, route, model, forced tool, text and tool
+call outputs, token usage, latency and time to first token). The game
+build's calls are recorded as a "build" entry of the same conversation.
+An analysis prepared off the request (speculative, or from the analysis
+cache) is recorded with the turn that used it, so a replay can use the
+same one instead of making a call the recording has no answer for.
+
+Recordings are anonymized before they reach disk: e-mail addresses, URLs,
+phone numbers, long digit runs and self-introduced names are masked in
+inputs and outputs, and conversations are keyed by a random id that is not
+the session id. Each turn is one JSON line written as its own gzip member,
+so files are compact, can be appended to without rewriting and are read
+back with a plain gzip.open().
+
+bench.replay plays recordings back against the current code.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from services.llm_metrics import LLMCallCounter, extract_usage
+
+FORMAT_VERSION = 1
+
+_PII_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+"), "[email]"),
+    (re.compile(r"(https?://|www\.)\S+", re.IGNORECASE), "[url]"),
+    (re.compile(r"\+?\d[\d ().-]{7,}\d"), "[phone]"),
+    (re.compile(r"\b\d{5,}\b"), "[number]"),
+    (re.compile(r"\b(my name is|my name's|i am called|i'm called|call me)\s+[A-Za-z][\w'-]*", re.IGNORECASE),
+     r"\1 [name]"),
+    # "I'm Emma" / "I am Emma" - capitalized only, so "I'm done" is left alone
+    (re.compile(r"\b((?i:i'm|i’m|i am))\s+[A-Z][\w'-]*"), r"\1 [name]"),
+]
+
+
+def anonymize(value: Any) -> Any:
+    """
+    Mask personal details in a string, or in every string inside a list/dict.
+
+    Args:
+        value: Text or JSON-like value
+
+    Returns:
+        The same value with e-mails, URLs, phone numbers, long numbers and
+        self-introduced names replaced by placeholders
+    """
+    if isinstance(value, str):
+        for pattern, replacement in _PII_PATTERNS:
+            value = pattern.sub(replacement, value)
+        return value
+    if isinstance(value, list):
+        return [anonymize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: anonymize(item) for key, item in value.items()}
+    return value
+
+
+class RecordingCallCounter(LLMCallCounter):
+    """LLMCallCounter that also keeps each call's request shape, output and timing."""
+
+    def __init__(self, user_message: str, phase: str, kind: str = "turn"):
+        super().__init__()
+        self.user_message = user_message
+        self.phase = phase
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.call_log: List[Dict[str, Any]] = []
+        self.prepared_analysis: Optional[Dict[str, Any]] = None
+        self._runs: Dict[Any, Dict[str, Any]] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: Any = None,
+                            invocation_params: Optional[Dict[str, Any]] = None,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        super().on_chat_model_start(serialized, messages, **kwargs)
+        params = invocation_params or {}
+        metadata = metadata or {}
+        tool_choice = params.get("tool_choice")
+        call = {
+            "agent": metadata.get("agent"),
+            "route": metadata.get("route"),
+            "model": params.get("model") or params.get("model_name"),
+            "tool": tool_choice.get("name") if isinstance(tool_choice, dict) else None,
+            "_started": time.perf_counter()
+        }
+        self.call_log.append(call)
+        self._runs[run_id] = call
+
+    def on_llm_new_token(self, token: Any, *, run_id: Any = None, **kwargs: Any) -> None:
+        call = self._runs.get(run_id)
+        if call is not None and "ttft_ms" not in call:
+            call["ttft_ms"] = round((time.perf_counter() - call["_started"]) * 1000, 1)
+
+    def on_llm_end(self, response: Any, *, run_id: Any = None, **kwargs: Any) -> None:
+        super().on_llm_end(response, **kwargs)
+        call = self._runs.pop(run_id, None)
+        if call is None:
+            return
+        call["latency_ms"] = round((time.perf_counter() - call["_started"]) * 1000, 1)
+        try:
+            message = response.generations[0][0].message
+        except (AttributeError, IndexError):
+            message = None
+        if message is not None:
+            content = message.content
+            if isinstance(content, list):
+                content = "".join(block.get("text", "") for block in content
+                                  if isinstance(block, dict) and block.get("type") == "text")
+            call["text"] = content
+            call["tool_calls"] = [{"name": tc["name"], "args": tc["args"]}
+                                  for tc in getattr(message, "tool_calls", None) or []]
+        usage = extract_usage(response)
+        if usage is not None:
+            call["usage"] = {key: usage[key] for key in
+                             ("input_tokens", "output_tokens", "cache_read_tokens", "cache_creation_tokens")}
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any = None, **kwargs: Any) -> None:
+        call = self._runs.pop(run_id, None)
+        if call is not None:
+            call["latency_ms"] = round((time.perf_counter() - call["_started"]) * 1000, 1)
+            call["error"] = type(error).__name__
+
+    def to_turn(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the anonymized record of the finished turn.
+
+        Args:
+            response: The orchestrator's response for the turn
+
+        Returns:
+            dict: JSON-serializable turn record
+        """
+        calls = []
+        for call in self.call_log:
+            call = {key: value for key, value in call.items() if not key.startswith("_")}
+            for key in ("text", "tool_calls"):
+                if key in call:
+                    call[key] = anonymize(call[key])
+            calls.append(call)
+        turn = {
+            "v": FORMAT_VERSION,
+            "kind": self.kind,
+            "at": round(time.time()),
+            "phase": self.phase,
+            "next_phase": response.get("phase"),
+            "input": anonymize(self.user_message),
+            "output": anonymize(response.get("message") or ""),
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "llm_calls": self.calls,
+            "calls": calls
+        }
+        if self.prepared_analysis is not None:
+            turn["prepared_analysis"] = anonymize(self.prepared_analysis)
+        return turn
+
+
+class ConversationRecorder:
+    """
+    Appends anonymized turns of sampled conversations to a directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None, sample_rate: float = 1.0):
+        """
+        Initialize the recorder.
+
+        Args:
+            directory: Where recordings are written (None = recording off)
+            sample_rate: Share of conversations to record, 0.0 - 1.0
+        """
+        self.directory = Path(directory) if directory else None
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._turns = 0
+        self._bytes = 0
+        self._errors = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None and self.sample_rate > 0
+
+    def should_record(self, recording_id: str) -> bool:
+        """Whether a conversation falls in the sample (stable for its whole life)."""
+        if not self.enabled or not recording_id:
+            return False
+        bucket = int(hashlib.sha256(recording_id.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < self.sample_rate
+
+    def call_counter(self, recording_id: str, user_message: str, phase: str,
+                     kind: str = "turn") -> LLMCallCounter:
+        """
+        Create the call counter for a turn - a recording one if the conversation is sampled.
+
+        Args:
+            recording_id: The conversation's anonymous recording id
+            user_message: What the user said this turn
+            phase: Phase the turn started in
+            kind: "turn" for a user turn, "build" for work done off the request
+
+        Returns:
+            LLMCallCounter: Counter to attach to every model call in the turn
+        """
+        if self.should_record(recording_id):
+            return RecordingCallCounter(user_message, phase, kind)
+        return LLMCallCounter()
+
+    def record_turn(self, recording_id: str, counter: LLMCallCounter, response: Dict[str, Any]) -> None:
+        """
+        Append a finished turn (or background build) to the conversation's recording.
+
+        Does nothing unless the counter came from call_counter() for a
+        sampled conversation. Write errors are counted, never raised.
+
+        Args:
+            recording_id: The conversation's anonymous recording id
+            counter: The turn's call counter
+            response: The orchestrator's response for the turn
+        """
+        if not isinstance(counter, RecordingCallCounter):
+            return
+        data = (json.dumps(counter.to_turn(response), separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        try:
+            with self._lock:
+                with gzip.open(self.directory / f"{recording_id}.jsonl.gz", "ab") as f:
+                    f.write(data)
+                self._turns += 1
+                self._bytes += len(data)
+        except OSError as e:
+            print(f"[ConversationRecorder] Could not record turn: {e}")
+            with self._lock:
+                self._errors += 1
+
+    def record_prepared_analysis(self, counter: LLMCallCounter, source: str, analysis: Dict[str, Any]) -> None:
+        """
+        Note that a turn used a book analysis prepared off the request.
+
+        Does nothing unless the counter is recording the turn.
+
+        Args:
+            counter: The turn's call counter
+            source: "speculative" or "cache"
+            analysis: The prepared BookAnalysis, as a dict
+        """
+        if isinstance(counter, RecordingCallCounter):
+            counter.prepared_analysis = {"source": source, "analysis": analysis}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get recorder statistics.
+
+        Returns:
+            dict: Whether recording is on, the sample rate, turns recorded,
+                  uncompressed bytes written and write errors
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "turns_recorded": self._turns,
+                "bytes_written": self._bytes,
+                "errors": self._errors
+            }
+
+
+def load_recordings(path: str) -> List[Dict[str, Any]]:
+    """
+    Read recorded conversations.
+
+    Args:
+        path: A recording file (.jsonl or .jsonl.gz) or a directory of them
+
+    Returns:
+        list: {"id": ..., "turns": [...]} per conversation, sorted by id
+    """
+    root = Path(path)
+    files = sorted(root.glob("*.jsonl*")) if root.is_dir() else [root]
+    recordings = []
+    for file in files:
+        opener = gzip.open if file.suffix == ".gz" else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            turns = [json.loads(line) for line in f if line.strip()]
+        if turns:
+            recordings.append({"id": file.name.split(".")[0], "turns": turns})
+    return recordings
+
+
+# Singleton instance
+_recorder_instance = None
+
+
+def get_conversation_recorder() -> ConversationRecorder:
+    """
+    Get or create the Conversation Recorder singleton.
+
+    Configured with CONVERSATION_RECORD_DIR (unset = off) and
+    CONVERSATION_RECORD_SAMPLE (share of conversations, default 1.0).
+
+    Returns:
+        ConversationRecorder: The shared recorder
+    """
+    global _recorder_instance
+    if _recorder_instance is None:
+        _recorder_instance = ConversationRecorder(
+            directory=os.getenv("CONVERSATION_RECORD_DIR") or None,
+            sample_rate=float(os.getenv("CONVERSATION_RECORD_SAMPLE", "1.0"))
+        )
+    return _recorder_instance
@@ -0,0 +1,264 @@
+"""
+Game Store - Finished games as content-addressed files on disk.
+
+A finished game used to live as a string inside its session, so every
+session carried (and serialized) a copy and a worker restart lost it with
+an in-memory session store. Games are now written once to
+<dir>/<hash[:2]>/<hash>.html, where hash is the SHA-256 of the HTML, next
+to their precompressed variants (<hash>.html.gz, <hash>.html.br - see
+services.compression). Sessions keep only the hash, identical games are
+stored once, and the files are served straight from disk with send_file,
+which hands them to the server's sendfile() without copying them through
+Python.
+
+Each use of a game (storing it again, serving it) renews a lease kept as
+the file's modification time. collect() removes games whose lease is older
+than the retention period, which by default far outlives any session; a
+session whose game was collected anyway re-renders it from its design.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.compression import ENCODINGS, precompress
+
+# Content coding -> file suffix of the stored variant
+_SUFFIXES = {"identity": ".html", "gzip": ".html.gz", "br": ".html.br"}
+
+_HASH = re.compile(r"[0-9a-f]{64}")
+
+
+def is_game_hash(value: Any) -> bool:
+    """Whether a value is a well-formed game hash (safe to use in a path)."""
+    return isinstance(value, str) and bool(_HASH.fullmatch(value))
+
+
+class GameStore:
+    """
+    Content-addressed store of finished games and their compressed variants.
+    """
+
+    def __init__(self, directory: Optional[str] = None, retention_seconds: float = 7 * 24 * 3600,
+                 gc_interval: float = 3600):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Where games are kept (default: a directory in the
+                       system temp dir)
+            retention_seconds: Unused time after which a game is collected
+                               (0 = keep forever)
+            gc_interval: Seconds between collections, run as games are
+                         stored (0 = only when collect() is called)
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "game_maker_games")
+        self.retention_seconds = retention_seconds
+        self.gc_interval = gc_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._last_gc = time.time()
+        self._stores = 0
+        self._duplicates = 0
+        self._collected = 0
+        self._errors = 0
+
+    def put(self, html: str) -> str:
+        """
+        Store a game (once per distinct HTML) with its compressed variants.
+
+        Args:
+            html: The game's complete HTML
+
+        Returns:
+            str: The game's hash
+
+        Raises:
+            OSError: If the game could not be written
+        """
+        if self.gc_interval and time.time() - self._last_gc > self.gc_interval:
+            self.collect()
+
+        data = html.encode("utf-8")
+        game_hash = hashlib.sha256(data).hexdigest()
+        if self.exists(game_hash):
+            self.touch(game_hash, force=True)
+            with self._lock:
+                self._duplicates += 1
+            return game_hash
+
+        os.makedirs(os.path.dirname(self._path(game_hash)), exist_ok=True)
+        try:
+            # Variants first, so a game that exists always has them
+            for encoding, variant in precompress(data).items():
+                self._write(self._path(game_hash, encoding), variant)
+            self._write(self._path(game_hash), data)
+        except OSError:
+            with self._lock:
+                self._errors += 1
+            raise
+        with self._lock:
+            self._stores += 1
+        return game_hash
+
+    def exists(self, game_hash: str) -> bool:
+        """Whether a game is stored."""
+        return is_game_hash(game_hash) and os.path.exists(self._path(game_hash))
+
+    def path(self, game_hash: str, encoding: str = "identity") -> Optional[str]:
+        """
+        Get the file holding a game in one encoding.
+
+        Args:
+            game_hash: The game's hash
+            encoding: "identity" (plain HTML), "gzip" or "br"
+
+        Returns:
+            str: File path, or None if there is no such game or variant
+        """
+        if not is_game_hash(game_hash) or encoding not in _SUFFIXES:
+            return None
+        path = self._path(game_hash, encoding)
+        return path if os.path.exists(path) else None
+
+    def encodings(self, game_hash: str) -> List[str]:
+        """Compressed variants stored for a game, in the order we prefer to send them."""
+        return [encoding for encoding in ENCODINGS if self.path(game_hash, encoding)]
+
+    def size(self, game_hash: str) -> int:
+        """Size of a game's HTML in bytes (0 if it is not stored)."""
+        try:
+            return os.path.getsize(self._path(game_hash)) if is_game_hash(game_hash) else 0
+        except OSError:
+            return 0
+
+    def touch(self, game_hash: str, force: bool = False) -> None:
+        """
+        Renew a game's lease.
+
+        Leases are renewed at most once an hour unless forced, so serving a
+        game does not write to the disk on every request.
+
+        Args:
+            game_hash: The game's hash
+            force: Renew even if the lease was renewed recently
+        """
+        if not is_game_hash(game_hash):
+            return
+        path = self._path(game_hash)
+        try:
+            if force or time.time() - os.path.getmtime(path) > 3600:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def collect(self) -> int:
+        """
+        Remove every game whose lease has expired.
+
+        Returns:
+            int: Number of games removed
+        """
+        self._last_gc = time.time()
+        if not self.retention_seconds:
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for shard in self._shards():
+            for name in os.listdir(shard):
+                if not name.endswith(_SUFFIXES["identity"]):
+                    continue
+                game_hash = name[:-len(_SUFFIXES["identity"])]
+                try:
+                    if os.path.getmtime(self._path(game_hash)) > cutoff:
+                        continue
+                    os.remove(self._path(game_hash))
+                except OSError:
+                    continue
+                removed += 1
+                for encoding in ENCODINGS:
+                    try:
+                        os.remove(self._path(game_hash, encoding))
+                    except OSError:
+                        pass
+        with self._lock:
+            self._collected += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics for monitoring.
+
+        Returns:
+            dict: Games on disk and their bytes, stores, duplicates skipped,
+                  games collected and write errors
+        """
+        games = 0
+        total_bytes = 0
+        for shard in self._shards():
+            for name in os.listdir(shard):
+                if name.endswith(tuple(_SUFFIXES.values())):
+                    try:
+                        total_bytes += os.path.getsize(os.path.join(shard, name))
+                    except OSError:
+                        continue
+                    games += name.endswith(_SUFFIXES["identity"])
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "games": games,
+                "bytes": total_bytes,
+                "encodings": list(ENCODINGS),
+                "stores": self._stores,
+                "duplicates": self._duplicates,
+                "collected": self._collected,
+                "errors": self._errors
+            }
+
+    def _path(self, game_hash: str, encoding: str = "identity") -> str:
+        return os.path.join(self.directory, game_hash[:2], game_hash + _SUFFIXES[encoding])
+
+    def _shards(self) -> List[str]:
+        try:
+            return [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return []
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Write a file atomically, so readers never see part of it."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+
+# Singleton instance
+_game_store_instance = None
+
+
+def get_game_store() -> GameStore:
+    """
+    Get or create the Game Store singleton.
+
+    Configured with GAME_STORE_DIR, GAME_STORE_RETENTION_HOURS and
+    GAME_STORE_GC_MINUTES.
+
+    Returns:
+        GameStore: The shared store
+    """
+    global _game_store_instance
+    if _game_store_instance is None:
+        _game_store_instance = GameStore(
+            directory=os.getenv("GAME_STORE_DIR"),
+            retention_seconds=float(os.getenv("GAME_STORE_RETENTION_HOURS", "168")) * 3600,
+            gc_interval=float(os.getenv("GAME_STORE_GC_MINUTES", "60")) * 60
+        )
+    return _game_store_instance
@@ -0,0 +1,315 @@
+"""
+LLM Client - One pooled Claude client shared by every agent.
+
+Each agent used to build its own ChatAnthropic, and with it its own HTTP
+client whose idle connections expire after five seconds - so a child
+taking a few seconds to type meant a fresh TLS handshake on the next
+turn, and nothing limited how many calls a process made at once.
+
+The LLM pool owns a single keep-alive HTTP connection pool (one per event
+loop for async calls) that every chat model it hands out shares, and an
+in-flight limiter that caps concurrent Claude calls per process. Calls
+over the cap wait for a slot instead of piling onto the API, and how
+often they had to wait is reported as pool saturation in /api/metrics.
+
+Agents ask the pool for a model with their defaults; the model and
+temperature can be overridden per agent with LLM_MODEL_<AGENT> and
+LLM_TEMPERATURE_<AGENT> (e.g. LLM_MODEL_GAME_DESIGNER).
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import anthropic
+import httpx
+from langchain_anthropic import ChatAnthropic
+
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+
+
+class InFlightLimiter:
+    """Counting semaphore for sync and async callers, with saturation stats."""
+
+    def __init__(self, max_in_flight: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_in_flight: Calls allowed at once
+        """
+        self.max_in_flight = max_in_flight
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._peak = 0
+        self._acquired = 0
+        self._waited = 0
+        self._wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a slot for the duration of a sync call."""
+        started = time.perf_counter()
+        with self._condition:
+            waited = self._in_flight >= self.max_in_flight
+            self._condition.wait_for(lambda: self._in_flight < self.max_in_flight)
+            self._take(waited, started)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of an async call, waiting without blocking the loop."""
+        started = time.perf_counter()
+        waited = False
+        delay = 0.005
+        while True:
+            with self._condition:
+                if self._in_flight < self.max_in_flight:
+                    self._take(waited, started)
+                    break
+            waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics.
+
+        Returns:
+            dict: Limit, current and peak in-flight calls, calls that had to
+                  wait, mean wait and saturation (share of calls that waited)
+        """
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak,
+                "calls": self._acquired,
+                "waited": self._waited,
+                "mean_wait_ms": round(self._wait_seconds / self._waited * 1000, 1) if self._waited else 0.0,
+                "saturation": round(self._waited / self._acquired, 3) if self._acquired else 0.0
+            }
+
+    def _take(self, waited: bool, started: float) -> None:
+        """Record a slot being taken (caller holds the lock)."""
+        self._in_flight += 1
+        self._peak = max(self._peak, self._in_flight)
+        self._acquired += 1
+        if waited:
+            self._waited += 1
+            self._wait_seconds += time.perf_counter() - started
+
+    def _release(self) -> None:
+        """Give a slot back and wake one waiter."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+
+class PooledChatAnthropic(ChatAnthropic):
+    """
+    ChatAnthropic that sends its requests through the shared LLM pool.
+
+    Every request holds an in-flight slot until its response (or stream)
+    is finished.
+    """
+
+    @property
+    def _pool(self) -> "LLMClientPool":
+        return get_llm_pool()
+
+    @cached_property
+    def _client(self) -> anthropic.Client:
+        return self._pool.client(self._client_params)
+
+    @property
+    def _async_client(self) -> anthropic.AsyncClient:
+        return self._pool.async_client(self._client_params)
+
+    def _create(self, payload: dict) -> Any:
+        if payload.get("stream"):
+            # _stream() already holds the slot for the whole stream
+            return super()._create(payload)
+        with self._pool.limiter.slot():
+            return super()._create(payload)
+
+    async def _acreate(self, payload: dict) -> Any:
+        if payload.get("stream"):
+            return await super()._acreate(payload)
+        async with self._pool.limiter.aslot():
+            return await super()._acreate(payload)
+
+    def _stream(self, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        with self._pool.limiter.slot():
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        async with self._pool.limiter.aslot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+
+class LLMClientPool:
+    """
+    Process-wide keep-alive HTTP pool, in-flight limiter and chat model factory.
+    """
+
+    def __init__(self, max_in_flight: int = 16, max_connections: int = 32,
+                 max_keepalive_connections: int = 16, keepalive_seconds: float = 60.0):
+        """
+        Initialize the pool.
+
+        Args:
+            max_in_flight: Concurrent Claude calls allowed per process
+            max_connections: Open HTTP connections allowed per client
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_seconds: How long an idle connection is kept
+        """
+        self.limiter = InFlightLimiter(max_in_flight)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_seconds
+        )
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_clients: "weakref.WeakKeyDictionary[Any, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._models_created = 0
+
+    def chat_model(self, agent: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                   route: Optional[str] = None, **kwargs: Any) -> PooledChatAnthropic:
+        """
+        Create a chat model for an agent on the shared pool.
+
+        LLM_MODEL_<AGENT>_<ROUTE> overrides the model for one route of one
+        agent; LLM_MODEL_<AGENT> and LLM_MODEL apply to conversation calls.
+
+        Args:
+            agent: Agent name, e.g. "story_analyst" (selects the env overrides)
+            model: Default model for the agent
+            temperature: Default temperature for the agent
+            route: Model route the calls belong to (see services.model_router)
+            **kwargs: Other ChatAnthropic settings (max_tokens, streaming, ...)
+
+        Returns:
+            PooledChatAnthropic: The configured model
+        """
+        prefixes = [f"{agent}_{route}".upper()] if route else []
+        if route in (None, "conversation"):
+            prefixes.append(agent.upper())
+        model_vars = [f"LLM_MODEL_{prefix}" for prefix in prefixes]
+        if route in (None, "conversation"):
+            model_vars.append("LLM_MODEL")
+        model = next((os.getenv(name) for name in model_vars if os.getenv(name)), model)
+        temperature = float(next(
+            (os.getenv(f"LLM_TEMPERATURE_{prefix}") for prefix in prefixes
+             if os.getenv(f"LLM_TEMPERATURE_{prefix}")),
+            temperature
+        ))
+
+        # Tag calls with who made them, for callbacks (e.g. conversation recordings)
+        metadata = {"agent": agent, "route": route or "conversation", **kwargs.pop("metadata", {})}
+
+        with self._lock:
+            self._models_created += 1
+        return PooledChatAnthropic(
+            model=model,
+            anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+            temperature=temperature,
+            metadata=metadata,
+            **kwargs
+        )
+
+    def client(self, client_params: Dict[str, Any]) -> anthropic.Client:
+        """Anthropic client for the given settings, on the shared sync connection pool."""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = anthropic.DefaultHttpxClient(
+                    limits=self._limits,
+                    timeout=client_params.get("timeout", anthropic.DEFAULT_TIMEOUT)
+                )
+            http_client = self._http_client
+        return anthropic.Client(**client_params, http_client=http_client)
+
+    def async_client(self, client_params: Dict[str, Any]) -> anthropic.AsyncClient:
+        """Anthropic async client for the given settings, on this event loop's connection pool."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            http_client = self._async_http_clients.get(loop)
+            if http_client is None:
+                http_client = anthropic.DefaultAsyncHttpxClient(
+                    limits=self._limits,
+                    timeout=client_params.get("timeout", anthropic.DEFAULT_TIMEOUT)
+                )
+                self._async_http_clients[loop] = http_client
+        return anthropic.AsyncClient(**client_params, http_client=http_client)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics for monitoring.
+
+        Returns:
+            dict: In-flight limiter stats plus open and idle connections in
+                  the sync pool
+        """
+        with self._lock:
+            connections = _connections(self._http_client)
+            models_created = self._models_created
+            async_pools = len(self._async_http_clients)
+        return {
+            **self.limiter.stats(),
+            "models_created": models_created,
+            "async_pools": async_pools,
+            "keepalive_seconds": self._limits.keepalive_expiry,
+            "open_connections": len(connections) if connections is not None else None,
+            "idle_connections": sum(1 for c in connections if c.is_idle()) if connections is not None else None
+        }
+
+
+def _connections(http_client: Optional[httpx.Client]) -> Optional[list]:
+    """Connections in an httpx client's pool (None if not available)."""
+    if http_client is None:
+        return []
+    try:
+        return list(http_client._transport._pool.connections)
+    except AttributeError:
+        return None
+
+
+# Singleton instance
+_llm_pool_instance = None
+_llm_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> LLMClientPool:
+    """
+    Get or create the LLM Client Pool singleton.
+
+    Configured with LLM_MAX_IN_FLIGHT, LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS and LLM_KEEPALIVE_SECONDS.
+
+    Returns:
+        LLMClientPool: The shared pool
+    """
+    global _llm_pool_instance
+    if _llm_pool_instance is None:
+        with _llm_pool_lock:
+            if _llm_pool_instance is None:
+                _llm_pool_instance = LLMClientPool(
+                    max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "16")),
+                    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+                    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "16")),
+                    keepalive_seconds=float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+                )
+    return _llm_pool_instance
@@ -0,0 +1,161 @@
+"""
+LLM Metrics - Count the Claude calls and tokens each conversation turn costs.
+
+Every tool call inside AgentExecutor is another full model round-trip,
+so calls per turn is the number that tells us whether a turn was cheap.
+The orchestrator attaches an LLMCallCounter to every model call it makes
+during a turn and records the total here when the turn ends.
+
+The counter also reads each response's usage, including Anthropic prompt
+cache reads and writes, so cache hit rates can be checked per call and
+process-wide.
+"""
+import threading
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_USAGE_KEYS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_creation_tokens")
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Callback handler that counts model calls and token usage during one turn."""
+
+    # Count on the event loop for async calls instead of in a thread pool
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+        self.usage: List[Dict[str, Any]] = []
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, **kwargs: Any) -> None:
+        self.calls += 1
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, **kwargs: Any) -> None:
+        self.calls += 1
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        """Record token and prompt-cache usage for the finished call."""
+        usage = extract_usage(response)
+        if usage is not None:
+            self.usage.append(usage)
+            record_usage(usage)
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Sum the usage of every call in this turn.
+
+        Returns:
+            dict: Input, output, cache-read and cache-creation token totals
+        """
+        totals = {key: 0 for key in _USAGE_KEYS}
+        for usage in self.usage:
+            for key in _USAGE_KEYS:
+                totals[key] += usage[key]
+        return totals
+
+
+def extract_usage(response: Any):
+    """
+    Read token usage from an LLMResult.
+
+    Args:
+        response: LLMResult passed to on_llm_end
+
+    Returns:
+        dict: Token counts and whether the prompt cache was hit, or None if
+              the model did not report usage
+    """
+    try:
+        message = response.generations[0][0].message
+    except (AttributeError, IndexError):
+        return None
+
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if not usage_metadata:
+        return None
+
+    details = usage_metadata.get("input_token_details") or {}
+    cache_read = details.get("cache_read") or 0
+    cache_creation = details.get("cache_creation") or 0
+    return {
+        "input_tokens": usage_metadata.get("input_tokens", 0),
+        "output_tokens": usage_metadata.get("output_tokens", 0),
+        "cache_read_tokens": cache_read,
+        "cache_creation_tokens": cache_creation,
+        "cache_hit": cache_read > 0,
+    }
+
+
+_lock = threading.Lock()
+_turns = 0
+_llm_calls = 0
+_calls_per_turn: Dict[int, int] = {}
+_usage_totals = {key: 0 for key in _USAGE_KEYS}
+_cache_hits = 0
+_cache_misses = 0
+
+
+def record_turn(llm_calls: int) -> None:
+    """
+    Record the number of LLM calls one conversation turn made.
+
+    Args:
+        llm_calls: Model calls made while handling the turn
+    """
+    global _turns, _llm_calls
+    with _lock:
+        _turns += 1
+        _llm_calls += llm_calls
+        _calls_per_turn[llm_calls] = _calls_per_turn.get(llm_calls, 0) + 1
+
+
+def turn_stats() -> Dict[str, Any]:
+    """
+    Get process-wide per-turn LLM call statistics.
+
+    Returns:
+        dict: Turn count, total calls, mean calls per turn and a histogram
+              mapping calls-per-turn to the number of turns
+    """
+    with _lock:
+        return {
+            "turns": _turns,
+            "llm_calls": _llm_calls,
+            "mean_calls_per_turn": round(_llm_calls / _turns, 3) if _turns else 0.0,
+            "calls_per_turn": {str(k): v for k, v in sorted(_calls_per_turn.items())},
+        }
+
+
+def record_usage(usage: Dict[str, Any]) -> None:
+    """
+    Add one call's token usage to the process-wide totals.
+
+    Args:
+        usage: Usage dict from extract_usage()
+    """
+    global _cache_hits, _cache_misses
+    with _lock:
+        for key in _USAGE_KEYS:
+            _usage_totals[key] += usage[key]
+        if usage["cache_hit"]:
+            _cache_hits += 1
+        else:
+            _cache_misses += 1
+
+
+def usage_stats() -> Dict[str, Any]:
+    """
+    Get process-wide token usage and prompt-cache statistics.
+
+    Returns:
+        dict: Token totals, cache hits/misses and the cache hit rate
+    """
+    with _lock:
+        calls = _cache_hits + _cache_misses
+        return {
+            **_usage_totals,
+            "cache_hits": _cache_hits,
+            "cache_misses": _cache_misses,
+            "cache_hit_rate": round(_cache_hits / calls, 3) if calls else 0.0,
+        }
@@ -0,0 +1,193 @@
+"""
+Model Router - Pick the Claude model for each kind of call.
+
+Every call used to go to the same large model with max_tokens=4096,
+including mechanical steps whose answer is fixed by the input. Calls are
+now grouped into routes:
+
+    conversation    the agents' chat turns - keeps the strong model
+    extraction      structured BookAnalysis / GameDesign generation
+    classification  small yes/no-and-extract steps (e.g. which book the
+                    agent just named)
+
+Each route has its own model, max_tokens and (optionally) temperature,
+overridable with LLM_ROUTE_<ROUTE>_MODEL, LLM_ROUTE_<ROUTE>_MAX_TOKENS and
+LLM_ROUTE_<ROUTE>_TEMPERATURE. Every routed model carries a callback that
+records latency and token usage per route for /api/metrics, so the
+effect of moving a route to another model can be measured.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from services.llm_client import PooledChatAnthropic, get_llm_pool
+from services.llm_metrics import extract_usage
+
+FAST_MODEL = "claude-3-5-haiku-20241022"
+STRONG_MODEL = "claude-sonnet-4-20250514"
+
+# Default settings per route (temperature None = the agent's own)
+DEFAULT_ROUTES: Dict[str, Dict[str, Any]] = {
+    "conversation": {"model": STRONG_MODEL, "max_tokens": 1024, "temperature": None},
+    "extraction": {"model": FAST_MODEL, "max_tokens": 4096, "temperature": None},
+    "classification": {"model": FAST_MODEL, "max_tokens": 256, "temperature": 0.0},
+}
+
+# Latencies kept per route for percentiles
+LATENCY_WINDOW = 500
+
+
+class RouteMetrics(BaseCallbackHandler):
+    """Callback handler that records latency and tokens for one route."""
+
+    # Time calls on the event loop, not after a hop through a thread pool
+    run_inline = True
+
+    def __init__(self, route: str):
+        self.route = route
+        self._lock = threading.Lock()
+        self._started: Dict[Any, float] = {}
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._errors = 0
+        self._total_seconds = 0.0
+        self._input_tokens = 0
+        self._output_tokens = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: Any,
+                            **kwargs: Any) -> None:
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+        usage = extract_usage(response)
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            self._calls += 1
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                self._latencies.append(elapsed)
+                self._total_seconds += elapsed
+            if usage is not None:
+                self._input_tokens += usage["input_tokens"]
+                self._output_tokens += usage["output_tokens"]
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        with self._lock:
+            self._started.pop(run_id, None)
+            self._errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get this route's statistics.
+
+        Returns:
+            dict: Calls, errors, mean/p50/p95 latency and token totals
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "calls": self._calls,
+                "errors": self._errors,
+                "mean_latency_ms": round(self._total_seconds / self._calls * 1000, 1) if self._calls else 0.0,
+                "p50_latency_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else 0.0,
+                "p95_latency_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else 0.0,
+                "input_tokens": self._input_tokens,
+                "output_tokens": self._output_tokens
+            }
+
+
+class ModelRouter:
+    """
+    Hands out chat models configured for a route, with per-route accounting.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Settings per route (default: DEFAULT_ROUTES)
+        """
+        self.routes = {name: dict(settings) for name, settings in (routes or DEFAULT_ROUTES).items()}
+        self._metrics = {name: RouteMetrics(name) for name in self.routes}
+
+    def route_settings(self, route: str) -> Dict[str, Any]:
+        """
+        Get a route's model, max_tokens and temperature, with env overrides applied.
+
+        Args:
+            route: Route name, e.g. "extraction"
+
+        Returns:
+            dict: model, max_tokens and temperature (None = the agent's own)
+        """
+        settings = dict(self.routes[route])
+        prefix = f"LLM_ROUTE_{route.upper()}"
+        if os.getenv(f"{prefix}_MODEL"):
+            settings["model"] = os.getenv(f"{prefix}_MODEL")
+        if os.getenv(f"{prefix}_MAX_TOKENS"):
+            settings["max_tokens"] = int(os.getenv(f"{prefix}_MAX_TOKENS"))
+        if os.getenv(f"{prefix}_TEMPERATURE"):
+            settings["temperature"] = float(os.getenv(f"{prefix}_TEMPERATURE"))
+        return settings
+
+    def chat_model(self, route: str, agent: str, temperature: float = 0.7,
+                   **kwargs: Any) -> PooledChatAnthropic:
+        """
+        Create an agent's chat model for a route.
+
+        Args:
+            route: Route name ("conversation", "extraction" or "classification")
+            agent: Agent name (for the per-agent overrides in the LLM pool)
+            temperature: The agent's own temperature, used unless the route sets one
+            **kwargs: Other ChatAnthropic settings
+
+        Returns:
+            PooledChatAnthropic: Model on the shared pool that reports to this route
+        """
+        settings = self.route_settings(route)
+        if settings["temperature"] is not None:
+            temperature = settings["temperature"]
+        return get_llm_pool().chat_model(
+            agent,
+            model=settings["model"],
+            temperature=temperature,
+            route=route,
+            max_tokens=settings["max_tokens"],
+            callbacks=[self._metrics[route]],
+            **kwargs
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistics for every route.
+
+        Returns:
+            dict: For each route, its default model plus latency and token stats
+        """
+        return {
+            route: {"model": self.route_settings(route)["model"], **metrics.stats()}
+            for route, metrics in self._metrics.items()
+        }
+
+
+# Singleton instance
+_model_router_instance = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get or create the Model Router singleton.
+
+    Returns:
+        ModelRouter: The shared router
+    """
+    global _model_router_instance
+    if _model_router_instance is None:
+        _model_router_instance = ModelRouter()
+    return _model_router_instance
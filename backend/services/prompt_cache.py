@@ -0,0 +1,93 @@
+"""
+Prompt Cache - Anthropic prompt-caching breakpoints for agent prompts.
+
+Every turn (and every AgentExecutor iteration) resends the same system
+prompt, book context and conversation context - the rolling summary and
+recent messages from services.context_builder. Marking the end of each
+stable section with cache_control lets Anthropic serve that prefix from
+its prompt cache, which cuts both latency and input-token cost on every
+call after the first. Anthropic allows at most four breakpoints per
+request; agents use up to three:
+
+1. the system prompt
+2. the book-context block (Game Designer)
+3. the last message of the prior conversation history
+
+The rolling summary changes whenever older messages are folded into it,
+so it is not marked: it sits in the system message after the marked
+sections and is cached as part of the history breakpoint's prefix until
+the next fold. The same goes for other per-turn sections (e.g. the
+Story Analyst's candidate books).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+def cached_text_block(text: str) -> Dict[str, Any]:
+    """
+    Build a text content block that ends a cacheable prefix.
+
+    Args:
+        text: Block text
+
+    Returns:
+        dict: Anthropic text block with a cache_control breakpoint
+    """
+    return {"type": "text", "text": text, "cache_control": EPHEMERAL}
+
+
+def cached_system_message(*sections: Optional[str],
+                          volatile: Sequence[Optional[str]] = ()) -> SystemMessage:
+    """
+    Build a system message with a cache breakpoint after each stable section.
+
+    Args:
+        *sections: Stable text sections in order, each ending with a breakpoint
+        volatile: Sections that change between turns (e.g. the rolling summary),
+            appended after the stable ones without breakpoints
+
+    Returns:
+        SystemMessage: System message made of text blocks (None or empty
+                       sections are skipped)
+    """
+    blocks = [cached_text_block(text) for text in sections if text]
+    blocks += [{"type": "text", "text": text} for text in volatile if text]
+    return SystemMessage(content=blocks)
+
+
+def with_cached_history(history: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Mark the end of the prior conversation as a cache breakpoint.
+
+    Between folds into the rolling summary (see services.context_builder,
+    which folds in chunks so this holds for several turns in a row) the
+    history only grows at the end, so everything up to its last message
+    is a stable prefix for this turn and the next one. The input list is
+    not modified.
+
+    Args:
+        history: Prior conversation messages
+
+    Returns:
+        list: Copy of the history with cache_control on the final message
+    """
+    if not history:
+        return history
+
+    last = history[-1]
+    content = last.content
+    if isinstance(content, str):
+        if not content:
+            return history
+        blocks = [cached_text_block(content)]
+    else:
+        blocks = [dict(block) if isinstance(block, dict) else {"type": "text", "text": str(block)}
+                  for block in content]
+        if not blocks:
+            return history
+        blocks[-1]["cache_control"] = EPHEMERAL
+
+    return list(history[:-1]) + [last.model_copy(update={"content": blocks})]
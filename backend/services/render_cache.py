@@ -0,0 +1,221 @@
+"""
+Render Cache - Reuse rendered games for identical designs.
+
+Rendering is deterministic: the same GameDesign and the same templates
+always give byte-identical HTML, and the same design comes back often
+(build retries, refreshes, several sessions designing from one book).
+Rendered games are keyed by a hash of the canonical (sorted-key) JSON of
+the design plus the template version, so editing a template invalidates
+every entry without a flush.
+
+An entry is the game's title, runtime config and hash in the game store
+(services.game_store), which holds the HTML and its compressed variants.
+An in-process LRU answers repeat hits without touching the disk; behind
+it, each entry is a JSON file under the cache directory (shared by every
+worker on the host and kept across restarts).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from templates.phaser_templates import TEMPLATE_VERSION
+
+
+def render_key(game_design: Dict[str, Any]) -> str:
+    """
+    Build the cache key for a design.
+
+    Args:
+        game_design: GameDesign as a dict
+
+    Returns:
+        str: Hex SHA-256 of the canonical design JSON and the template version
+    """
+    canonical = json.dumps(game_design, sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{TEMPLATE_VERSION}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Two-tier cache of rendered games: in-process LRU over a directory of JSON files.
+    """
+
+    def __init__(self, directory: Optional[str] = None, memory_entries: int = 64,
+                 max_entries: int = 2000):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Where rendered games are kept (default: a directory in
+                       the system temp dir)
+            memory_entries: Games also kept in this process
+            max_entries: Games kept on disk before the least recently used
+                         are removed (0 = unlimited)
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "game_maker_renders")
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a rendered game.
+
+        Args:
+            key: Key from render_key()
+
+        Returns:
+            dict: game_title, config and hash, or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return entry
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Store a rendered game.
+
+        Write errors are counted, never raised - the game was rendered
+        either way.
+
+        Args:
+            key: Key from render_key()
+            entry: game_title, config and hash
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"[RenderCache] Could not store render: {e}")
+            with self._lock:
+                self._errors += 1
+        evicted = self._evict_disk()
+
+        with self._lock:
+            self._stores += 1
+            self._evictions += evicted
+            self._remember(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for monitoring.
+
+        Returns:
+            dict: Entries per tier, hits by tier, misses, hit rate,
+                  evictions and write errors
+        """
+        entries = len(self._entries())
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "directory": self.directory,
+                "entries": entries,
+                "memory_entries": len(self._memory),
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "disk_evictions": self._evictions,
+                "errors": self._errors
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _entries(self) -> list:
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict_disk(self) -> int:
+        """Remove the least recently used files over max_entries."""
+        if not self.max_entries:
+            return 0
+        names = self._entries()
+        if len(names) <= self.max_entries:
+            return 0
+
+        def last_used(name: str) -> float:
+            try:
+                return os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                return 0.0
+
+        evicted = 0
+        for name in sorted(names, key=last_used)[:len(names) - self.max_entries]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+                evicted += 1
+            except OSError:
+                pass
+        return evicted
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Keep a game in the in-process LRU (caller holds the lock)."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+# Singleton instance
+_render_cache_instance = None
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """
+    Get or create the Render Cache singleton.
+
+    Configured with RENDER_CACHE (true/false), RENDER_CACHE_DIR,
+    RENDER_CACHE_MEMORY_ENTRIES and RENDER_CACHE_MAX_ENTRIES.
+
+    Returns:
+        RenderCache: The shared cache, or None if caching is disabled
+    """
+    global _render_cache_instance
+    if os.getenv("RENDER_CACHE", "true").lower() != "true":
+        return None
+    if _render_cache_instance is None:
+        _render_cache_instance = RenderCache(
+            directory=os.getenv("RENDER_CACHE_DIR"),
+            memory_entries=int(os.getenv("RENDER_CACHE_MEMORY_ENTRIES", "64")),
+            max_entries=int(os.getenv("RENDER_CACHE_MAX_ENTRIES", "2000"))
+        )
+    return _render_cache_instance
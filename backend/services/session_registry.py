@@ -0,0 +1,183 @@
+"""
+Session Registry - A bounded, self-cleaning map of live orchestrators.
+
+Each orchestrator holds the full message history, the book analysis and
+the game design. Without limits a long-running worker grows until it is
+OOM-killed, so the registry:
+
+- expires sessions that have been idle longer than the TTL
+- evicts least-recently-used sessions when a byte budget is exceeded
+- runs a background sweeper so idle sessions are freed even with no traffic
+- keeps counters for monitoring (evictions, resident bytes, hits/misses)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class SessionRegistry:
+    """
+    LRU map of session ID -> orchestrator with idle TTL and a byte budget.
+
+    Sizes come from orchestrator.estimate_size(), measured each time a
+    session is stored, so the budget tracks history growth. Finished
+    games live in services.game_store; a session holds only the hash.
+    """
+
+    def __init__(self, ttl_seconds: float = 7200, max_bytes: int = 256 * 1024 * 1024,
+                 sweep_interval: float = 60):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl_seconds: Idle time after which a session expires
+            max_bytes: Resident byte budget across all sessions (0 = unlimited)
+            sweep_interval: Seconds between background expiry sweeps (0 = no sweeper)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+
+        # session_id -> [orchestrator, size_bytes, last_access]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._resident_bytes = 0
+
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired_evictions": 0,
+            "lru_evictions": 0,
+        }
+
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval > 0:
+            self._start_sweeper()
+
+    def get(self, session_id: str):
+        """
+        Get a live orchestrator and mark it as recently used.
+
+        Args:
+            session_id: The session identifier
+
+        Returns:
+            GameOrchestrator: The orchestrator, or None if unknown or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+            if self._is_expired(entry, now):
+                self._remove(session_id)
+                self._counters["expired_evictions"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            entry[2] = now
+            self._entries.move_to_end(session_id)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def put(self, session_id: str, orchestrator) -> None:
+        """
+        Store an orchestrator, re-measure its size and enforce the byte budget.
+
+        Args:
+            session_id: The session identifier
+            orchestrator: The GameOrchestrator to store
+        """
+        size = orchestrator.estimate_size()
+        with self._lock:
+            if session_id in self._entries:
+                self._resident_bytes -= self._entries[session_id][1]
+
+            self._entries[session_id] = [orchestrator, size, time.monotonic()]
+            self._entries.move_to_end(session_id)
+            self._resident_bytes += size
+
+            # Evict from the cold end, but never the session we just stored
+            while (self.max_bytes and self._resident_bytes > self.max_bytes
+                   and len(self._entries) > 1):
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self._counters["lru_evictions"] += 1
+
+    def remove(self, session_id: str) -> None:
+        """Remove a session if present."""
+        with self._lock:
+            self._remove(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and not self._is_expired(entry, time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def sweep(self) -> int:
+        """
+        Remove every expired session.
+
+        Returns:
+            int: Number of sessions removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Entries are in access order, so expired ones are at the front
+            expired = []
+            for session_id, entry in self._entries.items():
+                if not self._is_expired(entry, now):
+                    break
+                expired.append(session_id)
+
+            for session_id in expired:
+                self._remove(session_id)
+            self._counters["expired_evictions"] += len(expired)
+
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry counters for monitoring.
+
+        Returns:
+            dict: Session count, resident bytes, budget and eviction counters
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self._counters["expired_evictions"] + self._counters["lru_evictions"],
+                **self._counters,
+            }
+
+    def _is_expired(self, entry: list, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry[2] > self.ttl_seconds
+
+    def _remove(self, session_id: str) -> None:
+        """Remove an entry. Caller must hold the lock."""
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._resident_bytes -= entry[1]
+
+    def _start_sweeper(self) -> None:
+        """Start the daemon thread that expires idle sessions."""
+        def run():
+            while True:
+                time.sleep(self.sweep_interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"[SessionRegistry] Sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
@@ -0,0 +1,392 @@
+"""
+Session Store - Where GameOrchestrator state lives between requests.
+
+gunicorn runs several worker processes (and Render can run several
+instances), so a session started on one worker must be loadable on any
+other. This module provides one small interface with three backends:
+
+- memory: live objects in this process (single worker / development)
+- sqlite: a WAL-mode database file shared by every worker on the host
+- redis:  any server that speaks the Redis protocol (RESP), shared by
+          every worker on every instance
+
+The backend is selected with the SESSION_STORE environment variable and
+configured with SESSION_STORE_URL. Every backend expires sessions that
+have been idle longer than the session TTL.
+"""
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from services.session_registry import SessionRegistry
+
+
+class SessionStore:
+    """
+    Base class for session storage backends.
+
+    Backends store orchestrators by session ID. Shared backends serialize
+    them with GameOrchestrator.to_dict()/from_dict().
+    """
+
+    name = "base"
+
+    def get(self, session_id: str):
+        """
+        Load the orchestrator for a session.
+
+        Args:
+            session_id: The session identifier
+
+        Returns:
+            GameOrchestrator: The orchestrator, or None if the session is unknown
+        """
+        raise NotImplementedError
+
+    def save(self, session_id: str, orchestrator) -> None:
+        """
+        Persist the orchestrator for a session.
+
+        Args:
+            session_id: The session identifier
+            orchestrator: The GameOrchestrator to store
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session from the store."""
+        raise NotImplementedError
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics for monitoring.
+
+        Returns:
+            dict: Backend name and any backend-specific counters
+        """
+        return {"backend": self.name}
+
+    @staticmethod
+    def _serialize(orchestrator) -> str:
+        return json.dumps(orchestrator.to_dict(), separators=(",", ":"))
+
+    @staticmethod
+    def _deserialize(payload):
+        from agents.orchestrator import GameOrchestrator
+
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        return GameOrchestrator.from_dict(json.loads(payload))
+
+
+class InProcessSessionStore(SessionStore):
+    """
+    Keeps live orchestrators in a bounded SessionRegistry.
+
+    Only safe with a single worker. Idle sessions expire after the TTL and
+    least-recently-used sessions are evicted when the byte budget is hit.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: float = 7200, max_bytes: int = 256 * 1024 * 1024,
+                 sweep_interval: float = 60):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Idle time after which a session expires
+            max_bytes: Resident byte budget across all sessions (0 = unlimited)
+            sweep_interval: Seconds between background expiry sweeps
+        """
+        self._registry = SessionRegistry(
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            sweep_interval=sweep_interval
+        )
+
+    def get(self, session_id: str):
+        return self._registry.get(session_id)
+
+    def save(self, session_id: str, orchestrator) -> None:
+        self._registry.put(session_id, orchestrator)
+
+    def delete(self, session_id: str) -> None:
+        self._registry.remove(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._registry
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self._registry.stats()}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Stores serialized orchestrators in a SQLite database in WAL mode.
+
+    WAL lets readers in every gunicorn worker proceed while one worker
+    writes, which is all a single host needs to share sessions.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 7200,
+                 sweep_interval: float = 300):
+        """
+        Initialize the store.
+
+        Args:
+            path: Database file path (default: a file in the system temp dir)
+            ttl_seconds: Idle time after which a session expires
+            sweep_interval: Seconds between deletes of expired rows (0 = never)
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), "game_maker_sessions.db")
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = time.time()
+        self._expired_evictions = 0
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND updated_at > ?",
+            (session_id, self._cutoff())
+        ).fetchone()
+        return self._deserialize(row[0]) if row else None
+
+    def save(self, session_id: str, orchestrator) -> None:
+        # Piggyback expiry on writes - no extra thread needed per worker
+        if self.sweep_interval and time.time() - self._last_sweep > self.sweep_interval:
+            self.sweep()
+
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (session_id, self._serialize(orchestrator), time.time())
+        )
+        conn.commit()
+
+    def delete(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+
+    def __contains__(self, session_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ? AND updated_at > ?",
+            (session_id, self._cutoff())
+        ).fetchone()
+        return row is not None
+
+    def sweep(self) -> int:
+        """
+        Delete every expired session.
+
+        Returns:
+            int: Number of sessions removed
+        """
+        self._last_sweep = time.time()
+        conn = self._connection()
+        cursor = conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (self._cutoff(),))
+        conn.commit()
+        self._expired_evictions += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        count, resident_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+        ).fetchone()
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "sessions": count,
+            "resident_bytes": resident_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "expired_evictions": self._expired_evictions
+        }
+
+    def _cutoff(self) -> float:
+        """Oldest updated_at that is still live."""
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0
+
+
+class RedisProtocolError(Exception):
+    """Raised when a Redis-protocol server returns an error reply."""
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Stores serialized orchestrators in any Redis-protocol server.
+
+    Speaks RESP directly over a socket so it works against Redis, Valkey,
+    KeyDB or a local stand-in without adding a client library dependency.
+    """
+
+    name = "redis"
+    key_prefix = "gamemaker:session:"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", timeout: float = 5.0,
+                 ttl_seconds: float = 7200):
+        """
+        Initialize the store.
+
+        Args:
+            url: Server URL, e.g. redis://:password@host:6379/0
+            timeout: Socket timeout in seconds
+            ttl_seconds: Idle time after which the server expires a session
+        """
+        self.ttl_seconds = ttl_seconds
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _socket(self):
+        """Get this thread's connection, opening (and authenticating) it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", str(self.db))
+        return conn
+
+    def _command(self, *args: str):
+        """Send one command and read its reply, reconnecting once on a dropped socket."""
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode("utf-8") if isinstance(arg, str) else arg
+            payload.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+
+        for attempt in range(2):
+            sock, reader = self._socket()
+            try:
+                sock.sendall(b"".join(payload))
+                return self._read_reply(reader)
+            except (ConnectionError, socket.timeout, OSError):
+                self._local.conn = None
+                sock.close()
+                if attempt:
+                    raise
+
+    def _read_reply(self, reader):
+        """Parse a single RESP reply."""
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisProtocolError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count == -1:
+                return None
+            return [self._read_reply(reader) for _ in range(count)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    def get(self, session_id: str):
+        key = self.key_prefix + session_id
+        payload = self._command("GET", key)
+        if payload is None:
+            return None
+        if self.ttl_seconds:
+            # Reading counts as activity, so slide the idle deadline
+            self._command("EXPIRE", key, str(int(self.ttl_seconds)))
+        return self._deserialize(payload)
+
+    def save(self, session_id: str, orchestrator) -> None:
+        args = ["SET", self.key_prefix + session_id, self._serialize(orchestrator)]
+        if self.ttl_seconds:
+            args += ["EX", str(int(self.ttl_seconds))]
+        self._command(*args)
+
+    def delete(self, session_id: str) -> None:
+        self._command("DEL", self.key_prefix + session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._command("EXISTS", self.key_prefix + session_id) == 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "host": self.host, "port": self.port, "ttl_seconds": self.ttl_seconds}
+
+
+def create_session_store(backend: Optional[str] = None, url: Optional[str] = None,
+                         ttl_seconds: float = 7200) -> SessionStore:
+    """
+    Create the session store configured for this deployment.
+
+    Args:
+        backend: memory, sqlite or redis (default: SESSION_STORE env var, then memory)
+        url: Backend location - a file path for sqlite, a redis:// URL for redis
+             (default: SESSION_STORE_URL env var)
+        ttl_seconds: Idle time after which sessions expire
+
+    Returns:
+        SessionStore: The configured store
+    """
+    backend = (backend or os.getenv("SESSION_STORE", "memory")).lower()
+    url = url or os.getenv("SESSION_STORE_URL")
+
+    if backend == "memory":
+        max_mb = float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256"))
+        return InProcessSessionStore(
+            ttl_seconds=ttl_seconds,
+            max_bytes=int(max_mb * 1024 * 1024),
+            sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+        )
+    if backend == "sqlite":
+        return SQLiteSessionStore(url, ttl_seconds=ttl_seconds)
+    if backend == "redis":
+        return RedisSessionStore(url or "redis://localhost:6379/0", ttl_seconds=ttl_seconds)
+
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
@@ -0,0 +1,283 @@
+"""
+Speculative Analysis - Start the BookAnalysis as soon as a book is identified.
+
+create_book_analysis used to run only when the discussion ended, so the
+DISCUSSING -> DESIGNING transition sat behind a blocking LLM call. Now
+the orchestrator starts the analysis on a background executor the moment
+the book is identified, while the child is still chatting about it, and
+claims the finished result at the transition. It has seen only the
+identification turn; the discussion reaches the Game Designer's prompt
+directly, so by default the result is used as-is and the transition makes
+no LLM call (see ANALYSIS_CACHE_MODE).
+
+Speculations are shared per book (normalized title/author), so sessions
+discussing the same book wait on one call. Finished analyses also go
+into the cross-session analysis cache. Work nobody ends up using -
+cancelled before it ran, finished after every interested session gave
+up, or never claimed - is counted as wasted, with the tokens it cost.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional
+
+from schemas.book_schema import BookInfo
+from services.analysis_cache import book_key, get_analysis_cache
+from services.llm_metrics import LLMCallCounter
+
+
+class _Speculation:
+    """One in-flight or finished speculative analysis."""
+
+    def __init__(self, future: Future, counter: LLMCallCounter):
+        self.future = future
+        self.counter = counter
+        self.interested = 1
+        self.created_at = time.time()
+
+
+class SpeculativeAnalyzer:
+    """
+    Runs book analyses ahead of time on a small thread pool.
+
+    Sessions register interest with start(), take the result with claim()
+    and withdraw with cancel(). An analysis nobody is interested in any
+    more is cancelled if it has not started yet.
+    """
+
+    def __init__(self, max_workers: int = 4, max_age_seconds: float = 1800):
+        """
+        Initialize the analyzer.
+
+        Args:
+            max_workers: Analyses that may run at once
+            max_age_seconds: How long an unclaimed result is kept before it
+                is dropped and counted as wasted
+        """
+        self.max_age_seconds = max_age_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._speculations: Dict[str, _Speculation] = {}
+
+        self._started = 0
+        self._joined = 0
+        self._used = 0
+        self._cancelled = 0
+        self._failed = 0
+        self._wasted = 0
+        self._wasted_tokens = 0
+
+    def start(self, book_info: BookInfo, conversation_history: List[Any]) -> bool:
+        """
+        Start analyzing a book in the background (or join a running analysis).
+
+        Args:
+            book_info: The identified book
+            conversation_history: Messages so far (used as light context)
+
+        Returns:
+            bool: True if a speculation is now running for the book, False if
+                  the analysis cache already has it
+        """
+        cache = get_analysis_cache()
+        if cache and cache.get(book_info) is not None:
+            return False
+
+        key = book_key(book_info.title, book_info.author)
+        with self._lock:
+            self._sweep()
+            speculation = self._speculations.get(key)
+            if speculation is not None and not speculation.future.cancelled():
+                speculation.interested += 1
+                self._joined += 1
+                return True
+
+            counter = LLMCallCounter()
+            future = self._executor.submit(self._analyze, book_info, list(conversation_history), counter)
+            self._speculations[key] = _Speculation(future, counter)
+            self._started += 1
+
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return True
+
+    def claim(self, book_info: BookInfo, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        Take the speculative analysis for a book, waiting for it if still running.
+
+        Args:
+            book_info: The identified book
+            timeout: Longest time to wait for a running analysis
+
+        Returns:
+            dict: Analysis result (as returned by create_book_analysis), or
+                  None if there is no usable speculation
+        """
+        speculation = self._release(book_key(book_info.title, book_info.author))
+        if speculation is None:
+            return None
+
+        try:
+            result = speculation.future.result(timeout=timeout)
+        except (FutureTimeoutError, Exception):
+            return None
+        return self._use(result)
+
+    async def aclaim(self, book_info: BookInfo, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """Async version of claim() - waits without blocking the event loop."""
+        speculation = self._release(book_key(book_info.title, book_info.author))
+        if speculation is None:
+            return None
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(speculation.future)), timeout)
+        except (asyncio.TimeoutError, Exception):
+            return None
+        return self._use(result)
+
+    def cancel(self, book_info: BookInfo) -> None:
+        """
+        Withdraw a session's interest in a book's speculative analysis.
+
+        Args:
+            book_info: The book the session is no longer discussing
+        """
+        key = book_key(book_info.title, book_info.author)
+        with self._lock:
+            speculation = self._speculations.get(key)
+            if speculation is None:
+                return
+
+            speculation.interested -= 1
+            if speculation.interested > 0:
+                return
+
+            if speculation.future.cancel():
+                # Never started - nothing was spent
+                del self._speculations[key]
+                self._cancelled += 1
+            elif speculation.future.done():
+                del self._speculations[key]
+                self._count_wasted(speculation)
+            # Otherwise it is running; _finished() counts it as wasted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get speculation statistics for monitoring.
+
+        Returns:
+            dict: Started/joined/used/cancelled/failed/wasted counts, tokens
+                  spent on wasted analyses and analyses currently tracked
+        """
+        with self._lock:
+            self._sweep()
+            return {
+                "in_flight": sum(1 for s in self._speculations.values() if not s.future.done()),
+                "tracked": len(self._speculations),
+                "started": self._started,
+                "joined": self._joined,
+                "used": self._used,
+                "cancelled": self._cancelled,
+                "failed": self._failed,
+                "wasted": self._wasted,
+                "wasted_tokens": self._wasted_tokens
+            }
+
+    def _analyze(self, book_info: BookInfo, conversation_history: List[Any],
+                 counter: LLMCallCounter) -> Dict[str, Any]:
+        """Run the analysis (on an executor thread)."""
+        from agents.story_analyst import get_story_analyst
+
+        return get_story_analyst().create_book_analysis(
+            conversation_history,
+            book_info,
+            callbacks=[counter]
+        )
+
+    def _finished(self, key: str, future: Future) -> None:
+        """Share a finished analysis and account for it if nobody wants it."""
+        if future.cancelled():
+            return
+
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+
+        usable = bool(result and result.get("success") and not result.get("fallback"))
+        if usable:
+            cache = get_analysis_cache()
+            if cache:
+                from schemas.book_schema import BookAnalysis
+
+                analysis = BookAnalysis(**result["analysis"])
+                cache.put(analysis.book, analysis)
+
+        with self._lock:
+            if not usable:
+                self._failed += 1
+            speculation = self._speculations.get(key)
+            if speculation is not None and speculation.future is future and speculation.interested <= 0:
+                # Every interested session gave up while the call was running
+                del self._speculations[key]
+                self._count_wasted(speculation)
+
+    def _release(self, key: str) -> Optional[_Speculation]:
+        """Take one session's claim on a speculation, forgetting it once nobody else wants it."""
+        with self._lock:
+            speculation = self._speculations.get(key)
+            if speculation is None:
+                return None
+
+            speculation.interested -= 1
+            if speculation.interested <= 0:
+                del self._speculations[key]
+            return speculation
+
+    def _use(self, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Count a claimed result as used if it is a real analysis."""
+        if not result or not result.get("success") or result.get("fallback"):
+            return None
+        with self._lock:
+            self._used += 1
+        return {**result, "speculative": True}
+
+    def _sweep(self) -> None:
+        """Drop finished results nobody claimed in time (caller holds the lock)."""
+        cutoff = time.time() - self.max_age_seconds
+        for key, speculation in list(self._speculations.items()):
+            if speculation.created_at < cutoff and speculation.future.done():
+                del self._speculations[key]
+                if not speculation.future.cancelled():
+                    self._count_wasted(speculation)
+
+    def _count_wasted(self, speculation: _Speculation) -> None:
+        """Record an analysis that ran but was never used (caller holds the lock)."""
+        totals = speculation.counter.totals()
+        self._wasted += 1
+        self._wasted_tokens += totals["input_tokens"] + totals["output_tokens"]
+
+
+# Singleton instance
+_speculative_analyzer_instance = None
+
+
+def get_speculative_analyzer() -> Optional[SpeculativeAnalyzer]:
+    """
+    Get or create the Speculative Analyzer singleton.
+
+    Configured with SPECULATIVE_ANALYSIS (true/false) and
+    SPECULATIVE_WORKERS.
+
+    Returns:
+        SpeculativeAnalyzer: The shared analyzer, or None if speculation is disabled
+    """
+    global _speculative_analyzer_instance
+    if os.getenv("SPECULATIVE_ANALYSIS", "true").lower() != "true":
+        return None
+    if _speculative_analyzer_instance is None:
+        _speculative_analyzer_instance = SpeculativeAnalyzer(
+            max_workers=int(os.getenv("SPECULATIVE_WORKERS", "4"))
+        )
+    return _speculative_analyzer_instance
@@ -0,0 +1,59 @@
+"""
+Static Assets - Content-fingerprinted URLs for long-cached static files.
+
+Files under frontend/static are normally served at /static/<path> and must
+be revalidated on every load, since they can change with any deploy. Files
+that every game loads (the shared game runtime) are instead linked as
+/assets/<fingerprint>/<path>, where the fingerprint is a hash of the file's
+bytes. A new version gets a new URL, so each URL can be cached forever.
+"""
+import hashlib
+import os
+import threading
+from typing import Dict
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "static"))
+
+# Sent with an asset whose fingerprint matches its current content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_fingerprints: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def fingerprint(filename: str) -> str:
+    """
+    Get the content fingerprint of a static file (hashed once per process).
+
+    Args:
+        filename: Path relative to frontend/static, e.g. "js/game-runtime.js"
+
+    Returns:
+        str: First 12 hex characters of the file's SHA-256
+
+    Raises:
+        OSError: If the file does not exist
+    """
+    with _lock:
+        cached = _fingerprints.get(filename)
+    if cached is not None:
+        return cached
+
+    with open(os.path.join(STATIC_DIR, filename), "rb") as f:
+        value = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _lock:
+        _fingerprints[filename] = value
+    return value
+
+
+def asset_url(filename: str) -> str:
+    """
+    Get the fingerprinted URL of a static file.
+
+    Args:
+        filename: Path relative to frontend/static
+
+    Returns:
+        str: URL path, e.g. "/assets/3f2a9c01d4e5/js/game-runtime.js"
+    """
+    return f"/assets/{fingerprint(filename)}/{filename}"
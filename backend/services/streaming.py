@@ -0,0 +1,135 @@
+"""
+Streaming - Forward Claude tokens to the browser while a turn is running.
+
+The agents run inside AgentExecutor, which streams every model call
+internally. A LangChain callback handler taps those tokens, the
+orchestrator turn runs on a helper thread (or task, for the async path),
+and the request drains a queue and writes each item as a Server-Sent
+Event. The full orchestrator response (phase, completion flags, game
+data) is sent as the final event.
+"""
+import asyncio
+import json
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Callback handler that passes each streamed text delta to a function."""
+
+    def __init__(self, on_text: Callable[[str], None]):
+        """
+        Initialize the handler.
+
+        Args:
+            on_text: Called with each non-empty text delta
+        """
+        self.on_text = on_text
+
+    def on_llm_new_token(self, token: Any, **kwargs: Any) -> None:
+        """Extract text from a token (a string, or Claude content blocks when tools are bound)."""
+        if isinstance(token, list):
+            token = "".join(
+                block.get("text", "")
+                for block in token
+                if isinstance(block, dict) and block.get("type") == "text"
+            )
+        if token:
+            self.on_text(token)
+
+
+class AsyncTokenStreamHandler(TokenStreamHandler):
+    """
+    TokenStreamHandler for the async path.
+
+    Runs inline on the event loop so tokens are delivered in order without
+    a thread hop per token.
+    """
+
+    run_inline = True
+
+
+def stream_turn(orchestrator, user_message: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run one orchestrator turn, yielding tokens as they are produced.
+
+    Args:
+        orchestrator: The session's GameOrchestrator
+        user_message: What the user said/typed
+
+    Yields:
+        tuple: ("token", {"text": ...}) for each text delta, then exactly one
+               ("done", response) or ("error", {"error": ...})
+    """
+    events: "queue.Queue" = queue.Queue()
+    handler = TokenStreamHandler(lambda text: events.put(("token", {"text": text})))
+
+    def run():
+        try:
+            response = orchestrator.process_message(user_message, callbacks=[handler])
+            events.put(("done", response))
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="stream-turn", daemon=True).start()
+
+    while True:
+        item = events.get()
+        if item is None:
+            break
+        yield item
+
+
+async def astream_turn(orchestrator, user_message: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Async version of stream_turn() - runs the turn with aprocess_message().
+
+    Args:
+        orchestrator: The session's GameOrchestrator
+        user_message: What the user said/typed
+
+    Yields:
+        tuple: Same events as stream_turn()
+    """
+    events: "asyncio.Queue" = asyncio.Queue()
+    handler = AsyncTokenStreamHandler(lambda text: events.put_nowait(("token", {"text": text})))
+
+    async def run():
+        try:
+            response = await orchestrator.aprocess_message(user_message, callbacks=[handler])
+            events.put_nowait(("done", response))
+        except Exception as e:
+            events.put_nowait(("error", {"error": str(e)}))
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        # Client went away mid-stream - stop paying for the LLM call
+        if not task.done():
+            task.cancel()
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: The event in text/event-stream wire format
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
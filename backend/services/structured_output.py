@@ -0,0 +1,201 @@
+"""
+Structured Output - Get schema-valid objects from Claude with forced tool calls.
+
+The design and analysis prompts used to paste a JSON skeleton into the
+prompt and scrape the reply with regexes and json.loads, so any prose or
+a missing field threw the whole (paid-for) call away and fell back to a
+generic placeholder. Instead, the pydantic model is turned into a tool
+definition and Claude is made to call that tool, so the arguments arrive
+as parsed JSON that already follows the schema.
+
+If the arguments still fail pydantic validation, the errors are sent
+back as the tool result and Claude gets a bounded number of chances to
+repair its call. Every outcome (first-try success, repaired, failed) and
+the output tokens spent on rejected attempts are counted for /api/metrics.
+"""
+import copy
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, ValidationError
+
+DEFAULT_MAX_REPAIRS = int(os.getenv("STRUCTURED_OUTPUT_REPAIRS", "2"))
+
+
+class StructuredOutputError(Exception):
+    """Raised when the model never produced a valid object within the repair budget."""
+
+
+def _strip_examples(schema: Any) -> Any:
+    """Remove "example" entries (from json_schema_extra) that only cost prompt tokens."""
+    if isinstance(schema, dict):
+        return {key: _strip_examples(value) for key, value in schema.items() if key != "example"}
+    if isinstance(schema, list):
+        return [_strip_examples(value) for value in schema]
+    return schema
+
+
+class StructuredOutput:
+    """
+    Forced tool call that returns a validated pydantic object.
+
+    Fields listed in exclude are left out of the tool schema and filled in
+    by the caller (e.g. BookAnalysis.book, which we already know).
+    """
+
+    def __init__(self, schema: Type[BaseModel], description: Optional[str] = None,
+                 exclude: Iterable[str] = (), max_repairs: int = DEFAULT_MAX_REPAIRS):
+        """
+        Initialize the structured output.
+
+        Args:
+            schema: Pydantic model the output must validate against
+            description: Tool description (default: the model's docstring)
+            exclude: Top-level fields the model is not asked for
+            max_repairs: Extra calls allowed to fix invalid output
+        """
+        self.schema = schema
+        self.name = schema.__name__
+        self.max_repairs = max_repairs
+
+        parameters = copy.deepcopy(convert_to_openai_tool(schema)["function"]["parameters"])
+        parameters = _strip_examples(parameters)
+        for field in exclude:
+            parameters["properties"].pop(field, None)
+            if field in parameters.get("required", []):
+                parameters["required"].remove(field)
+
+        self.tool = {
+            "name": self.name,
+            "description": description or (schema.__doc__ or "").strip(),
+            "input_schema": parameters
+        }
+
+    def bind(self, llm: Any) -> Any:
+        """Bind the tool to a chat model and force Claude to call it."""
+        return llm.bind_tools([self.tool], tool_choice={"type": "tool", "name": self.name})
+
+    def invoke(self, llm: Any, messages: List[Any], callbacks: Optional[List[Any]] = None,
+               fixed: Optional[Dict[str, Any]] = None) -> BaseModel:
+        """
+        Call the model until it returns a valid object.
+
+        Args:
+            llm: Chat model (ChatAnthropic)
+            messages: Prompt messages
+            callbacks: Optional LangChain callback handlers (e.g. call counting)
+            fixed: Values for the excluded fields
+
+        Returns:
+            BaseModel: The validated object
+
+        Raises:
+            StructuredOutputError: If every attempt was invalid
+        """
+        bound = self.bind(llm)
+        messages = list(messages)
+        config = {"callbacks": callbacks} if callbacks else None
+
+        for attempt in range(self.max_repairs + 1):
+            response = bound.invoke(messages, config=config)
+            result = self._validate(response, fixed, attempt, messages)
+            if result is not None:
+                return result
+        raise self._give_up()
+
+    async def ainvoke(self, llm: Any, messages: List[Any], callbacks: Optional[List[Any]] = None,
+                      fixed: Optional[Dict[str, Any]] = None) -> BaseModel:
+        """Async version of invoke() - awaits the model with ainvoke."""
+        bound = self.bind(llm)
+        messages = list(messages)
+        config = {"callbacks": callbacks} if callbacks else None
+
+        for attempt in range(self.max_repairs + 1):
+            response = await bound.ainvoke(messages, config=config)
+            result = self._validate(response, fixed, attempt, messages)
+            if result is not None:
+                return result
+        raise self._give_up()
+
+    def _validate(self, response: AIMessage, fixed: Optional[Dict[str, Any]], attempt: int,
+                  messages: List[Any]) -> Optional[BaseModel]:
+        """
+        Validate one response, or queue a repair request onto messages.
+
+        Returns:
+            BaseModel: The validated object, or None if the attempt was rejected
+        """
+        tool_calls = [call for call in response.tool_calls if call["name"] == self.name]
+        if not tool_calls:
+            error = f"No {self.name} tool call in the response"
+            repair = HumanMessage(content=f"Please answer by calling the {self.name} tool.")
+        else:
+            call = tool_calls[0]
+            try:
+                result = self.schema(**{**call["args"], **(fixed or {})})
+            except ValidationError as e:
+                error = str(e)
+                repair = ToolMessage(
+                    content=f"The {self.name} input was invalid:\n{e}\n\n"
+                            f"Call {self.name} again with every field corrected.",
+                    tool_call_id=call["id"],
+                    status="error"
+                )
+            else:
+                _record(self.name, "repaired" if attempt else "first_try")
+                return result
+
+        print(f"[StructuredOutput] {self.name} attempt {attempt + 1} rejected: {error[:300]}")
+        _record(self.name, "rejected_attempts", wasted_tokens=_output_tokens(response))
+        messages.extend([response, repair])
+        return None
+
+    def _give_up(self) -> StructuredOutputError:
+        """Count a request that ran out of repairs."""
+        _record(self.name, "failed")
+        return StructuredOutputError(f"No valid {self.name} after {self.max_repairs + 1} attempts")
+
+
+def _output_tokens(response: AIMessage) -> int:
+    """Output tokens a response cost (0 if the model did not report usage)."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("output_tokens", 0)
+
+
+# Process-wide outcome counters per schema
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record(name: str, outcome: str, wasted_tokens: int = 0) -> None:
+    """Count one structured-output outcome for a schema."""
+    with _stats_lock:
+        stats = _stats.setdefault(name, {
+            "first_try": 0, "repaired": 0, "failed": 0,
+            "rejected_attempts": 0, "wasted_output_tokens": 0
+        })
+        stats[outcome] += 1
+        stats["wasted_output_tokens"] += wasted_tokens
+
+
+def structured_output_stats() -> Dict[str, Any]:
+    """
+    Get structured-output statistics per schema.
+
+    Returns:
+        dict: For each schema, requests that validated first try, after
+              repair, or never, the rejected attempts, the output tokens
+              they cost and the overall success rate
+    """
+    with _stats_lock:
+        result = {}
+        for name, stats in _stats.items():
+            requests = stats["first_try"] + stats["repaired"] + stats["failed"]
+            result[name] = {
+                **stats,
+                "success_rate": round((requests - stats["failed"]) / requests, 3) if requests else 1.0
+            }
+        return result
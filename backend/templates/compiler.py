@@ -0,0 +1,128 @@
+"""
+Template Compiler - Pre-compile the game page template for fast, safe rendering.
+
+The game templates are written in str.format syntax ({name} slots, {{ and
+}} for literal braces). Formatting them per game re-parsed the whole page
+every time and pasted kid-supplied names in unescaped, so a quote or a
+newline in a character's name broke the game.
+
+compile_template() parses a template once into its literal text plus a
+list of slots, each with the escaping context it sits in: HTML text, or a
+value serialized as JSON inside a <script> element (the game's config -
+see templates.phaser_templates). Rendering fills the slots with escaped
+values and joins the parts - a single str.join per document.
+"""
+import html
+import json
+import re
+from string import Formatter
+from typing import Any, Callable, Dict, List, Tuple
+
+# Escaping contexts
+HTML_TEXT = "html_text"    # HTML element text or attribute value
+JSON_SCRIPT = "json_script"  # a value serialized as JSON inside a <script> element
+
+_JSON_SCRIPT_ESCAPES = str.maketrans({
+    "<": "\\u003c",
+    ">": "\\u003e",
+    "&": "\\u0026",
+})
+
+# Text that needs no HTML escaping (most names) is used as-is
+_PLAIN_TEXT = re.compile(r"[A-Za-z0-9 .,!?:;()_+=-]*")
+
+
+def _escape_html(value: Any, name: str) -> str:
+    text = str(value)
+    if _PLAIN_TEXT.fullmatch(text):
+        return text
+    return html.escape(text, quote=True)
+
+
+def _escape_json_script(value: Any, name: str) -> str:
+    """Serialize a value as JSON that can't end the surrounding script element."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).translate(_JSON_SCRIPT_ESCAPES)
+
+
+ESCAPERS: Dict[str, Callable[[Any, str], str]] = {
+    HTML_TEXT: _escape_html,
+    JSON_SCRIPT: _escape_json_script,
+}
+
+
+class CompiledTemplate:
+    """
+    A template split into literal parts and escaped slots.
+
+    Attributes:
+        names: Slot names the template needs values for
+    """
+
+    def __init__(self, segments: List[Any]):
+        """
+        Build from a list of literal strings and (name, context) slots.
+
+        Use compile_template() rather than calling this directly.
+        """
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str, str, Callable[[Any, str], str]]] = []
+        for segment in segments:
+            if isinstance(segment, tuple):
+                name, context = segment
+                self._slots.append((len(self._parts), name, context, ESCAPERS[context]))
+                self._parts.append("")
+            else:
+                self._parts.append(segment)
+        self.names = sorted({name for _, name, _, _ in self._slots})
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """
+        Fill the slots with escaped values and join the parts.
+
+        Args:
+            values: Value for every slot name
+
+        Returns:
+            str: The rendered document
+
+        Raises:
+            KeyError: If a slot has no value
+        """
+        parts = self._parts.copy()
+        escaped: Dict[Tuple[str, str], str] = {}
+        for index, name, context, escape in self._slots:
+            text = escaped.get((name, context))
+            if text is None:
+                text = escaped[(name, context)] = escape(values[name], name)
+            parts[index] = text
+        return "".join(parts)
+
+
+def compile_template(source: str, contexts: Dict[str, str]) -> CompiledTemplate:
+    """
+    Compile a str.format-style template.
+
+    Args:
+        source: Template text with {name} slots and {{ }} literal braces
+        contexts: Escaping context (HTML_TEXT or JSON_SCRIPT) per slot name
+
+    Returns:
+        CompiledTemplate: Ready to render
+
+    Raises:
+        ValueError: If a slot has no known context or uses a format spec
+    """
+    segments: List[Any] = []
+    for literal, name, format_spec, conversion in Formatter().parse(source):
+        if literal:
+            if segments and isinstance(segments[-1], str):
+                segments[-1] += literal
+            else:
+                segments.append(literal)
+        if name is not None:
+            if format_spec or conversion:
+                raise ValueError(f"Template slot '{name}' uses a format spec or conversion, which is not supported")
+            if contexts.get(name) not in ESCAPERS:
+                raise ValueError(f"Template slot '{name}' has no escaping context")
+            segments.append((name, contexts[name]))
+    return CompiledTemplate(segments)
@@ -2,18 +2,87 @@
 Phaser.js Game Templates
 
 These templates are ported from the React Native mobile version.
-Each template is a complete playable game that can be customized
+Each game type is a complete playable game that can be customized
 based on the book's story elements.
+
+The game code for all three types lives in one shared runtime script
+(frontend/static/js/game-runtime.js), linked under a content fingerprint
+so browsers cache it across games. A generated game is the HTML wrapper
+plus a small JSON config (names, colors, counts, speeds) that the runtime
+reads. The wrapper is compiled once at import (see templates.compiler),
+so rendering a game is a single join with every value escaped for where
+it lands.
+
+Phaser itself is vendored into frontend/static/js/vendor by
+scripts.vendor_phaser and linked under a content fingerprint too, so it
+is cached forever and needs no third-party host. PHASER_BUILD picks the
+build: "arcade" (default - the games only use arcade physics, graphics
+and text, so Matter.js is left out), "full", or the file name of a custom
+build in the vendor directory. Until Phaser is vendored, games load it
+from the CDN.
 """
+import hashlib
+import json
+import math
+import os
+import re
+from typing import Any, Callable, Dict, Tuple
+
+from services.static_assets import STATIC_DIR, asset_url, fingerprint
+from templates.compiler import HTML_TEXT, JSON_SCRIPT, compile_template
+
+# Shared game code, relative to frontend/static
+RUNTIME_ASSET = 'js/game-runtime.js'
+
+PHASER_VERSION = '3.70.0'
+# Official builds in Phaser's dist directory
+PHASER_BUILDS = {
+    'arcade': 'phaser-arcade-physics.min.js',
+    'full': 'phaser.min.js'
+}
+PHASER_CDN = 'https://cdn.jsdelivr.net/npm/phaser@{version}/dist/{file}'
+
+
+def phaser_vendor_dir() -> str:
+    """Directory of the vendored Phaser builds, relative to frontend/static."""
+    return f'js/vendor/phaser-{PHASER_VERSION}'
+
+
+def phaser_url(build: str = None) -> str:
+    """
+    Get the URL games load Phaser from.
+    
+    Args:
+        build: "arcade", "full" or a custom build's file name
+               (default: PHASER_BUILD, then "arcade")
+    
+    Returns:
+        str: The vendored build's fingerprinted URL, or the CDN URL if the
+             build has not been vendored
+    """
+    build = build or os.getenv('PHASER_BUILD', 'arcade')
+    file_name = PHASER_BUILDS.get(build, build)
+    asset = f'{phaser_vendor_dir()}/{file_name}'
+    if os.path.isfile(os.path.join(STATIC_DIR, asset)):
+        return asset_url(asset)
+    
+    print(f"[PhaserTemplates] {asset} is not vendored (run python -m scripts.vendor_phaser) - using the CDN")
+    if build not in PHASER_BUILDS:
+        file_name = PHASER_BUILDS['arcade']
+    return PHASER_CDN.format(version=PHASER_VERSION, file=file_name)
+
 
-# HTML wrapper used by all game templates
+PHASER_URL = phaser_url()
+
+# HTML wrapper used by all game types
 HTML_WRAPPER = """<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
   <title>{game_title}</title>
-  <script src="https://cdn.jsdelivr.net/npm/phaser@3.70.0/dist/phaser.min.js"></script>
+  <link rel="preload" href="{phaser_url}" as="script">
+  <link rel="preload" href="{runtime_url}" as="script">
   <style>
     body {{
       margin: 0;
@@ -36,608 +105,119 @@ HTML_WRAPPER = """<!DOCTYPE html>
 </head>
 <body>
   <div id="game-container"></div>
-  <script>
-    {game_code}
-  </script>
+  <script type="application/json" id="game-config">{game_config}</script>
+  <script src="{phaser_url}"></script>
+  <script src="{runtime_url}"></script>
 </body>
 </html>
 """
 
-# Platformer Template - Jump and collect items
-PLATFORMER_TEMPLATE = """
-// Phaser 3 Platformer Game - {game_title}
-const config = {{
-  type: Phaser.AUTO,
-  width: 800,
-  height: 600,
-  parent: 'game-container',
-  physics: {{
-    default: 'arcade',
-    arcade: {{
-      gravity: {{ y: 300 }},
-      debug: false
-    }}
-  }},
-  scene: {{
-    preload: preload,
-    create: create,
-    update: update
-  }}
-}};
-
-const game = new Phaser.Game(config);
-
-let player;
-let platforms;
-let collectibles;
-let obstacles;
-let score = 0;
-let scoreText;
-let gameOver = false;
-let cursors;
-
-function preload() {{
-  // Using simple shapes - no assets needed for MVP
-}}
-
-function create() {{
-  // Create textures for game objects
-  const graphics = this.add.graphics();
-  
-  // Platform texture
-  graphics.fillStyle({platform_color}, 1);
-  graphics.fillRect(0, 0, 32, 32);
-  graphics.generateTexture('platform', 32, 32);
-  graphics.clear();
-  
-  // Player texture
-  graphics.fillStyle({player_color}, 1);
-  graphics.fillRect(0, 0, 32, 32);
-  graphics.generateTexture('player', 32, 32);
-  graphics.clear();
-  
-  // Collectible texture
-  graphics.fillStyle({collectible_color}, 1);
-  graphics.fillCircle(10, 10, 10);
-  graphics.generateTexture('collectible', 20, 20);
-  graphics.clear();
-  
-  // Obstacle texture
-  graphics.fillStyle({obstacle_color}, 1);
-  graphics.fillRect(0, 0, 30, 30);
-  graphics.generateTexture('obstacle', 30, 30);
-  graphics.destroy();
-  
-  // Background color
-  this.add.rectangle(400, 300, 800, 600, {bg_color});
-  
-  // Platforms
-  platforms = this.physics.add.staticGroup();
-  platforms.create(400, 568, 'platform').setDisplaySize(800, 32);
-  platforms.create(600, 400, 'platform').setDisplaySize(200, 32);
-  platforms.create(50, 250, 'platform').setDisplaySize(200, 32);
-  platforms.create(750, 220, 'platform').setDisplaySize(200, 32);
-  
-  // Player - {player_name}
-  player = this.physics.add.sprite(100, 450, 'player');
-  player.setSize(32, 32);
-  player.setBounce(0.2);
-  player.setCollideWorldBounds(true);
-  
-  // Collectibles - {collectible_name}
-  collectibles = this.physics.add.group();
-  for (let i = 0; i < {collectible_count}; i++) {{
-    const x = Phaser.Math.Between(50, 750);
-    const collectible = collectibles.create(x, 0, 'collectible');
-    collectible.setBounceY(Phaser.Math.FloatBetween(0.4, 0.8));
-  }}
-  
-  // Obstacles - {obstacle_name}
-  obstacles = this.physics.add.group();
-  for (let i = 0; i < {obstacle_count}; i++) {{
-    const x = Phaser.Math.Between(200, 700);
-    const obstacle = obstacles.create(x, 500, 'obstacle');
-    obstacle.setVelocityX(Phaser.Math.Between(-100, 100));
-    obstacle.setBounce(1);
-    obstacle.setCollideWorldBounds(true);
-  }}
-  
-  // UI
-  scoreText = this.add.text(16, 16, '{collectible_name}: 0 / {collectible_count}', {{ fontSize: '24px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  const instructions = this.add.text(400, 30, 'Arrow Keys to Move, UP to Jump', {{ fontSize: '16px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  instructions.setOrigin(0.5, 0);
-  
-  // Collisions
-  this.physics.add.collider(player, platforms);
-  this.physics.add.collider(collectibles, platforms);
-  this.physics.add.collider(obstacles, platforms);
-  this.physics.add.overlap(player, collectibles, collectItem, null, this);
-  this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
-  
-  // Controls
-  cursors = this.input.keyboard.createCursorKeys();
-}}
-
-function update() {{
-  if (gameOver) {{
-    return;
-  }}
-  
-  // Player movement
-  if (cursors.left.isDown) {{
-    player.setVelocityX(-160);
-  }} else if (cursors.right.isDown) {{
-    player.setVelocityX(160);
-  }} else {{
-    player.setVelocityX(0);
-  }}
-  
-  // Jump
-  if (cursors.up.isDown && player.body.touching.down) {{
-    player.setVelocityY(-330);
-  }}
-}}
-
-function collectItem(player, collectible) {{
-  collectible.disableBody(true, true);
-  score += 1;
-  scoreText.setText('{collectible_name}: ' + score + ' / {collectible_count}');
-  
-  if (collectibles.countActive(true) === 0) {{
-    showGameOver('🎉 You Win! 🎉\\n\\nYou collected all the {collectible_name}!', this);
-  }}
-}}
-
-function hitObstacle(player, obstacle) {{
-  this.physics.pause();
-  player.setTint(0xff0000);
-  gameOver = true;
-  showGameOver('Game Over!\\n\\nYou hit a {obstacle_name}!', this);
-}}
-
-function showGameOver(message, scene) {{
-  const bg = scene.add.rectangle(400, 300, 600, 300, 0x000000, 0.8);
-  
-  const text = scene.add.text(400, 260, message, {{ fontSize: '32px', fill: '#fff', align: 'center' }});
-  text.setOrigin(0.5);
-  
-  const playAgainBtn = scene.add.text(400, 360, '🔄 Play Again', {{ fontSize: '28px', fill: '#0f0', backgroundColor: '#003300', padding: {{ x: 20, y: 10 }} }});
-  playAgainBtn.setOrigin(0.5);
-  playAgainBtn.setInteractive();
-  playAgainBtn.on('pointerdown', () => {{
-    window.location.reload();
-  }});
-  
-  playAgainBtn.on('pointerover', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#00ff00', fill: '#000' }});
-  }});
-  playAgainBtn.on('pointerout', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#003300', fill: '#0f0' }});
-  }});
-}}
-"""
-
-# Top-Down Template - Explore and collect
-TOP_DOWN_TEMPLATE = """
-// Phaser 3 Top-Down Game - {game_title}
-const config = {{
-  type: Phaser.AUTO,
-  width: 800,
-  height: 600,
-  parent: 'game-container',
-  physics: {{
-    default: 'arcade',
-    arcade: {{
-      gravity: {{ y: 0 }},
-      debug: false
-    }}
-  }},
-  scene: {{
-    preload: preload,
-    create: create,
-    update: update
-  }}
-}};
-
-const game = new Phaser.Game(config);
-
-let player;
-let collectibles;
-let obstacles;
-let score = 0;
-let scoreText;
-let timeText;
-let gameTime = {game_time};
-let gameOver = false;
-
-function preload() {{
-  // Using simple shapes
-}}
-
-function create() {{
-  // Create textures for game objects
-  const graphics = this.add.graphics();
-  
-  // Player texture
-  graphics.fillStyle({player_color}, 1);
-  graphics.fillCircle(20, 20, 20);
-  graphics.generateTexture('player', 40, 40);
-  graphics.clear();
-  
-  // Collectible texture
-  graphics.fillStyle({collectible_color}, 1);
-  graphics.fillCircle(10, 10, 10);
-  graphics.generateTexture('collectible', 20, 20);
-  graphics.clear();
-  
-  // Obstacle texture
-  graphics.fillStyle({obstacle_color}, 1);
-  graphics.fillRect(0, 0, 30, 30);
-  graphics.generateTexture('obstacle', 30, 30);
-  graphics.destroy();
-  
-  // Background
-  this.add.rectangle(400, 300, 800, 600, {bg_color});
-  
-  // Player - {player_name}
-  player = this.physics.add.sprite(400, 300, 'player');
-  player.setCollideWorldBounds(true);
-  
-  // Collectibles - {collectible_name}
-  collectibles = this.physics.add.group();
-  for (let i = 0; i < {collectible_count}; i++) {{
-    const x = Phaser.Math.Between(50, 750);
-    const y = Phaser.Math.Between(50, 550);
-    collectibles.create(x, y, 'collectible');
-  }}
-  
-  // Obstacles - {obstacle_name}
-  obstacles = this.physics.add.group();
-  for (let i = 0; i < {obstacle_count}; i++) {{
-    const x = Phaser.Math.Between(100, 700);
-    const y = Phaser.Math.Between(100, 500);
-    const obstacle = obstacles.create(x, y, 'obstacle');
-    obstacle.setVelocity(Phaser.Math.Between(-50, 50), Phaser.Math.Between(-50, 50));
-    obstacle.setBounce(1);
-    obstacle.setCollideWorldBounds(true);
-  }}
-  
-  // UI
-  scoreText = this.add.text(16, 16, '{collectible_name}: 0', {{ fontSize: '24px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  timeText = this.add.text(16, 50, 'Time: ' + gameTime, {{ fontSize: '24px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  const instructions = this.add.text(400, 16, 'Arrow Keys to Move', {{ fontSize: '16px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  instructions.setOrigin(0.5, 0);
-  
-  // Collisions
-  this.physics.add.overlap(player, collectibles, collectItem, null, this);
-  this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
-  this.physics.add.collider(obstacles, obstacles);
-  
-  // Timer
-  this.time.addEvent({{
-    delay: 1000,
-    callback: updateTimer,
-    callbackScope: this,
-    loop: true
-  }});
-  
-  // Controls
-  cursors = this.input.keyboard.createCursorKeys();
-}}
-
-function update() {{
-  if (gameOver) {{
-    return;
-  }}
-  
-  // Player movement
-  player.setVelocity(0);
-  
-  if (cursors.left.isDown) {{
-    player.setVelocityX(-200);
-  }} else if (cursors.right.isDown) {{
-    player.setVelocityX(200);
-  }}
-  
-  if (cursors.up.isDown) {{
-    player.setVelocityY(-200);
-  }} else if (cursors.down.isDown) {{
-    player.setVelocityY(200);
-  }}
-}}
-
-function collectItem(player, collectible) {{
-  collectible.disableBody(true, true);
-  score += 1;
-  scoreText.setText('{collectible_name}: ' + score);
-  
-  if (collectibles.countActive(true) === 0) {{
-    showGameOver('🎉 You Win! 🎉\\n\\nYou collected all {collectible_count} {collectible_name}!', this);
-  }}
-}}
-
-function hitObstacle(player, obstacle) {{
-  score = Math.max(0, score - 1);
-  scoreText.setText('{collectible_name}: ' + score);
-  player.setTint(0xff0000);
-  this.time.delayedCall(200, () => player.clearTint());
-}}
-
-function updateTimer() {{
-  if (!gameOver) {{
-    gameTime--;
-    timeText.setText('Time: ' + gameTime);
-    
-    if (gameTime <= 0) {{
-      gameOver = true;
-      this.physics.pause();
-      showGameOver('⏰ Time Up!\\n\\nFinal Score: ' + score + ' {collectible_name}', this);
-    }}
-  }}
-}}
-
-function showGameOver(message, scene) {{
-  const bg = scene.add.rectangle(400, 300, 600, 300, 0x000000, 0.8);
-  
-  const text = scene.add.text(400, 260, message, {{ fontSize: '28px', fill: '#fff', align: 'center' }});
-  text.setOrigin(0.5);
-  
-  const playAgainBtn = scene.add.text(400, 360, '🔄 Play Again', {{ fontSize: '28px', fill: '#0f0', backgroundColor: '#003300', padding: {{ x: 20, y: 10 }} }});
-  playAgainBtn.setOrigin(0.5);
-  playAgainBtn.setInteractive();
-  playAgainBtn.on('pointerdown', () => {{
-    window.location.reload();
-  }});
-  
-  playAgainBtn.on('pointerover', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#00ff00', fill: '#000' }});
-  }});
-  playAgainBtn.on('pointerout', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#003300', fill: '#0f0' }});
-  }});
-}}
-
-let cursors;
-"""
-
-# Obstacle Avoider Template - Fast-paced dodging
-OBSTACLE_AVOIDER_TEMPLATE = """
-// Phaser 3 Obstacle Avoider - {game_title}
-const config = {{
-  type: Phaser.AUTO,
-  width: 800,
-  height: 600,
-  parent: 'game-container',
-  physics: {{
-    default: 'arcade',
-    arcade: {{
-      gravity: {{ y: 0 }},
-      debug: false
-    }}
-  }},
-  scene: {{
-    preload: preload,
-    create: create,
-    update: update
-  }}
-}};
-
-const game = new Phaser.Game(config);
-
-let player;
-let obstacles;
-let collectibles;
-let score = 0;
-let scoreText;
-let gameOver = false;
-let speed = {initial_speed};
-
-function preload() {{
-  // Using simple shapes
-}}
-
-function create() {{
-  // Create textures for game objects
-  const graphics = this.add.graphics();
-  
-  // Player texture
-  graphics.fillStyle({player_color}, 1);
-  graphics.fillCircle(20, 20, 20);
-  graphics.generateTexture('player', 40, 40);
-  graphics.clear();
-  
-  // Collectible texture
-  graphics.fillStyle({collectible_color}, 1);
-  graphics.fillCircle(12, 12, 12);
-  graphics.generateTexture('collectible', 25, 25);
-  graphics.clear();
-  
-  // Obstacle texture - will be created dynamically for different sizes
-  graphics.fillStyle({obstacle_color}, 1);
-  graphics.fillRect(0, 0, 30, 30);
-  graphics.generateTexture('obstacle', 30, 30);
-  graphics.destroy();
-  
-  // Background
-  this.add.rectangle(400, 300, 800, 600, {bg_color});
-  
-  // Player - {player_name}
-  player = this.physics.add.sprite(100, 300, 'player');
-  player.setCollideWorldBounds(true);
-  
-  // Obstacles group - {obstacle_name}
-  obstacles = this.physics.add.group();
-  
-  // Collectibles group - {collectible_name}
-  collectibles = this.physics.add.group();
-  
-  // Score
-  scoreText = this.add.text(16, 16, 'Score: 0', {{ fontSize: '32px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  const instructions = this.add.text(400, 16, 'UP/DOWN to Move', {{ fontSize: '16px', fill: '#fff', backgroundColor: '#000', padding: {{ x: 10, y: 5 }} }});
-  instructions.setOrigin(0.5, 0);
-  
-  // Spawn obstacles
-  this.time.addEvent({{
-    delay: 1500,
-    callback: spawnObstacle,
-    callbackScope: this,
-    loop: true
-  }});
-  
-  // Spawn collectibles occasionally
-  this.time.addEvent({{
-    delay: 3000,
-    callback: spawnCollectible,
-    callbackScope: this,
-    loop: true
-  }});
-  
-  // Update score
-  this.time.addEvent({{
-    delay: 100,
-    callback: () => {{
-      if (!gameOver) {{
-        score += 1;
-        scoreText.setText('Score: ' + score);
-        
-        // Increase difficulty
-        if (score % 200 === 0 && speed < 400) {{
-          speed += 20;
-        }}
-      }}
-    }},
-    callbackScope: this,
-    loop: true
-  }});
-  
-  // Collisions
-  this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
-  this.physics.add.overlap(player, collectibles, collectItem, null, this);
-  
-  // Controls
-  cursors = this.input.keyboard.createCursorKeys();
-}}
-
-function update() {{
-  if (gameOver) {{
-    return;
-  }}
-  
-  // Player movement
-  if (cursors.up.isDown) {{
-    player.setVelocityY(-300);
-  }} else if (cursors.down.isDown) {{
-    player.setVelocityY(300);
-  }} else {{
-    player.setVelocityY(0);
-  }}
-  
-  // Remove off-screen objects
-  obstacles.children.entries.forEach(obstacle => {{
-    if (obstacle.x < -50) {{
-      obstacle.destroy();
-    }}
-  }});
-  
-  collectibles.children.entries.forEach(collectible => {{
-    if (collectible.x < -50) {{
-      collectible.destroy();
-    }}
-  }});
-}}
-
-function spawnObstacle() {{
-  if (gameOver) return;
-  
-  const y = Phaser.Math.Between(50, 550);
-  const height = Phaser.Math.Between(30, 80);
-  const obstacle = obstacles.create(850, y, 'obstacle').setDisplaySize(30, height);
-  obstacle.setVelocityX(-speed);
-}}
-
-function spawnCollectible() {{
-  if (gameOver) return;
-  
-  const y = Phaser.Math.Between(100, 500);
-  const collectible = collectibles.create(850, y, 'collectible');
-  collectible.setVelocityX(-speed);
-}}
-
-function collectItem(player, collectible) {{
-  collectible.disableBody(true, true);
-  score += 50;
-  scoreText.setText('Score: ' + score);
-  
-  // Flash player green
-  player.setTint(0x00ff00);
-  this.time.delayedCall(200, () => player.clearTint());
-}}
-
-function hitObstacle() {{
-  gameOver = true;
-  this.physics.pause();
-  player.setTint(0xff0000);
-  
-  showGameOver('Game Over!\\n\\nYou hit a {obstacle_name}!\\n\\nFinal Score: ' + score, this);
-}}
-
-function showGameOver(message, scene) {{
-  const bg = scene.add.rectangle(400, 300, 600, 350, 0x000000, 0.8);
-  
-  const text = scene.add.text(400, 280, message, {{ fontSize: '28px', fill: '#fff', align: 'center' }});
-  text.setOrigin(0.5);
-  
-  const playAgainBtn = scene.add.text(400, 380, '🔄 Play Again', {{ fontSize: '28px', fill: '#0f0', backgroundColor: '#003300', padding: {{ x: 20, y: 10 }} }});
-  playAgainBtn.setOrigin(0.5);
-  playAgainBtn.setInteractive();
-  playAgainBtn.on('pointerdown', () => {{
-    window.location.reload();
-  }});
-  
-  playAgainBtn.on('pointerover', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#00ff00', fill: '#000' }});
-  }});
-  playAgainBtn.on('pointerout', () => {{
-    playAgainBtn.setStyle({{ backgroundColor: '#003300', fill: '#0f0' }});
-  }});
-}}
-
-let cursors;
-"""
-
-
-def get_template(game_type: str) -> str:
+_HEX_COLOR = re.compile(r"0x[0-9a-fA-F]{1,8}")
+
+
+def _text(value: Any, name: str) -> str:
+    return str(value)
+
+
+def _number(value: Any, name: str) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Game setting '{name}' needs a number, got {type(value).__name__}")
+    if not math.isfinite(value):
+        raise ValueError(f"Game setting '{name}' needs a finite number, got {value}")
+    return value
+
+
+def _color(value: Any, name: str) -> int:
+    """Colors are given as 0x hex strings (or ints) and sent as numbers."""
+    if type(value) is int:
+        return value
+    if isinstance(value, str) and _HEX_COLOR.fullmatch(value):
+        return int(value, 16)
+    raise ValueError(f"Game setting '{name}' needs a 0x color, got {value!r}")
+
+
+# Settings each game type reads from its config
+_STORY_FIELDS = {
+    'game_title': _text,
+    'player_name': _text,
+    'collectible_name': _text,
+    'obstacle_name': _text,
+    'bg_color': _color,
+    'player_color': _color,
+    'collectible_color': _color,
+    'obstacle_color': _color,
+}
+GAME_FIELDS: Dict[str, Dict[str, Callable[[Any, str], Any]]] = {
+    'platformer': {**_STORY_FIELDS, 'collectible_count': _number, 'obstacle_count': _number,
+                   'platform_color': _color},
+    'top-down': {**_STORY_FIELDS, 'collectible_count': _number, 'obstacle_count': _number,
+                 'game_time': _number},
+    'obstacle-avoider': {**_STORY_FIELDS, 'initial_speed': _number},
+}
+
+# Compiled at import
+COMPILED_WRAPPER = compile_template(HTML_WRAPPER, contexts={
+    'game_title': HTML_TEXT,
+    'runtime_url': HTML_TEXT,
+    'phaser_url': HTML_TEXT,
+    'game_config': JSON_SCRIPT
+})
+
+# Changes whenever the wrapper, Phaser, the runtime or a game's settings do, so
+# renders cached under an older version are never served (see
+# services.render_cache)
+TEMPLATE_VERSION = hashlib.sha256("\0".join([
+    HTML_WRAPPER,
+    PHASER_URL,
+    fingerprint(RUNTIME_ASSET),
+    json.dumps({game_type: sorted(fields) for game_type, fields in GAME_FIELDS.items()}, sort_keys=True)
+]).encode('utf-8')).hexdigest()[:12]
+
+
+def game_config(game_type: str, values: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Get the Phaser.js template for a specific game type.
+    Build the JSON config the game runtime reads.
     
     Args:
-        game_type: Type of game (platformer, top-down, obstacle-avoider)
+        game_type: Type of game (unknown types get the platformer)
+        values: Value for each of the game type's settings (game_title,
+                names, counts, colors)
     
     Returns:
-        str: The game template code
-    """
-    templates = {
-        'platformer': PLATFORMER_TEMPLATE,
-        'top-down': TOP_DOWN_TEMPLATE,
-        'obstacle-avoider': OBSTACLE_AVOIDER_TEMPLATE
-    }
+        dict: game_type plus each setting, with colors as numbers
     
-    return templates.get(game_type, PLATFORMER_TEMPLATE)
+    Raises:
+        KeyError: If a setting has no value
+        ValueError: If a count or color is not a number
+    """
+    if game_type not in GAME_FIELDS:
+        game_type = 'platformer'
+    config = {'game_type': game_type}
+    for name, convert in GAME_FIELDS[game_type].items():
+        config[name] = convert(values[name], name)
+    return config
 
 
-def generate_game_html(game_title: str, game_code: str) -> str:
+def render_game(game_type: str, values: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
     """
-    Generate complete HTML with embedded game code.
+    Render a game page for the shared runtime.
     
     Args:
-        game_title: Title of the game
-        game_code: Complete Phaser.js game code
+        game_type: Type of game (unknown types render the platformer)
+        values: Value for each of the game type's settings
     
     Returns:
-        str: Complete HTML document ready to play
+        tuple: (game config, complete HTML document ready to play)
+    
+    Raises:
+        KeyError: If a setting has no value
+        ValueError: If a count or color is not a number
     """
-    return HTML_WRAPPER.format(
-        game_title=game_title,
-        game_code=game_code
-    )
-
+    config = game_config(game_type, values)
+    html = COMPILED_WRAPPER.render({
+        'game_title': config['game_title'],
+        'runtime_url': asset_url(RUNTIME_ASSET),
+        'phaser_url': PHASER_URL,
+        'game_config': config
+    })
+    return config, html
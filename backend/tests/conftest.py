@@ -0,0 +1,19 @@
+"""
+Shared test setup - run from the backend directory with python -m pytest.
+
+Keeps every store the app writes to in a temporary directory, so tests
+never touch the working tree or /tmp caches from other runs.
+"""
+import os
+import sys
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="game_maker_tests_")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+os.environ.setdefault("SESSION_STORE", "memory")
+os.environ.setdefault("SESSION_FILE_DIR", os.path.join(_data_dir, "flask_session"))
+os.environ.setdefault("ANALYSIS_CACHE_PATH", os.path.join(_data_dir, "analyses.db"))
+os.environ.setdefault("RENDER_CACHE_DIR", os.path.join(_data_dir, "renders"))
+os.environ.setdefault("GAME_STORE_DIR", os.path.join(_data_dir, "games"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,122 @@
+"""Tests for the cross-session book analysis cache."""
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agents.orchestrator as orchestrator_module
+from agents.orchestrator import GameOrchestrator, Phase
+from schemas.book_schema import BookAnalysis, BookInfo
+from services.analysis_cache import AnalysisCache, book_key
+
+EXAMPLE = BookAnalysis.Config.json_schema_extra["example"]
+TACOS = BookInfo(title="Dragons Love Tacos", author="Adam Rubin")
+
+
+def _analysis(book=TACOS, **changes):
+    return BookAnalysis(**{**EXAMPLE, "book": book.dict(), **changes})
+
+
+class FinishingStoryAnalyst:
+    """Story Analyst stand-in that ends the discussion and records analysis requests."""
+
+    def __init__(self, setting):
+        self.setting = setting
+        self.analysis_calls = []
+
+    def process_message(self, user_message, chat_history, callbacks=None, history_summary=None,
+                        book_candidates=None):
+        return {"success": True, "message": "I have enough information - let's design your game!",
+                "book_identified": False, "is_complete": True}
+
+    def create_book_analysis(self, conversation_history, book_info, callbacks=None, history_summary=None,
+                             seed=None):
+        self.analysis_calls.append({"history": conversation_history, "seed": seed})
+        return {"success": True, "analysis": _analysis(book_info, setting=self.setting).dict()}
+
+
+class GreetingGameDesigner:
+    def get_initial_greeting(self, book_analysis):
+        return "Let's design your game!"
+
+
+def _discussing(monkeypatch, cache, setting):
+    monkeypatch.setattr(orchestrator_module, "get_analysis_cache", lambda: cache)
+    orchestrator = GameOrchestrator()
+    orchestrator.phase = Phase.DISCUSSING
+    orchestrator.book_info = TACOS
+    orchestrator.conversation_history = [HumanMessage(content="dragons love tacos"),
+                                         AIMessage(content="Is that 'Dragons Love Tacos' by Adam Rubin?"),
+                                         HumanMessage(content="Yes!"),
+                                         AIMessage(content="What was your favorite part?")]
+    orchestrator._story_analyst = FinishingStoryAnalyst(setting)
+    orchestrator._game_designer = GreetingGameDesigner()
+    return orchestrator
+
+
+def test_book_key_ignores_case_punctuation_and_articles():
+    assert book_key("The Very Hungry Caterpillar", "Eric Carle.") == book_key("very hungry caterpillar", "eric carle")
+    assert book_key("Dragons Love Tacos", "Adam Rubin") != book_key("Dragons Love Tacos 2", "Adam Rubin")
+
+
+def test_put_then_get_from_memory_and_disk(tmp_path):
+    path = str(tmp_path / "analyses.db")
+    cache = AnalysisCache(path)
+    cache.put(TACOS, _analysis())
+
+    assert cache.get(BookInfo(title="dragons love tacos!", author="ADAM RUBIN")).setting == EXAMPLE["setting"]
+    assert AnalysisCache(path).get(TACOS).setting == EXAMPLE["setting"]
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.get(BookInfo(title="Zog", author="Julia Donaldson")) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_analyses_are_dropped(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analyses.db"), ttl_seconds=0.05)
+    cache.put(TACOS, _analysis())
+    time.sleep(0.1)
+
+    assert cache.get(TACOS) is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_analyses_are_evicted(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analyses.db"), max_entries=2, memory_entries=0)
+    books = [BookInfo(title=title, author="Someone") for title in ("One", "Two", "Three")]
+    cache.put(books[0], _analysis(books[0]))
+    time.sleep(0.01)
+    cache.put(books[1], _analysis(books[1]))
+    time.sleep(0.01)
+    cache.get(books[0])
+    time.sleep(0.01)
+    cache.put(books[2], _analysis(books[2]))
+
+    assert cache.get(books[1]) is None
+    assert cache.get(books[0]) is not None and cache.get(books[2]) is not None
+    assert cache.stats()["lru_evictions"] == 1
+
+
+def test_transition_analysis_is_made_from_the_book_alone_and_shared(monkeypatch, tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analyses.db"))
+    orchestrator = _discussing(monkeypatch, cache, setting="Neutral")
+
+    response = orchestrator.process_message("The spicy salsa!")
+
+    assert response["phase"] == Phase.DESIGNING.value
+    assert orchestrator.story_analyst.analysis_calls == [{"history": [], "seed": None}]
+    assert cache.get(TACOS).setting == "Neutral"
+    assert "The spicy salsa!" in orchestrator.discussion
+
+
+def test_refined_analyses_are_never_cached(monkeypatch, tmp_path):
+    monkeypatch.setenv("ANALYSIS_CACHE_MODE", "refine")
+    cache = AnalysisCache(str(tmp_path / "analyses.db"))
+    cache.put(TACOS, _analysis(setting="Neutral"))
+    orchestrator = _discussing(monkeypatch, cache, setting="Tailored to this child")
+
+    orchestrator.process_message("The spicy salsa!")
+
+    call = orchestrator.story_analyst.analysis_calls[0]
+    assert call["seed"].setting == "Neutral" and call["history"]
+    assert orchestrator.book_analysis.setting == "Tailored to this child"
+    assert cache.get(TACOS).setting == "Neutral"
@@ -0,0 +1,79 @@
+"""Tests for the ASGI entry point."""
+import asyncio
+import threading
+import time
+
+import httpx
+
+import asgi
+from app import app as flask_app
+
+_release_slow = threading.Event()
+
+
+@flask_app.route('/test/slow')
+def slow_route():
+    """A Flask route that holds its thread until the test releases it."""
+    _release_slow.wait(timeout=5)
+    return 'done'
+
+
+def test_slow_flask_route_does_not_block_health():
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.ensure_future(client.get("/test/slow"))
+            await asyncio.sleep(0.2)
+
+            started = time.perf_counter()
+            health = await client.get("/api/health")
+            elapsed = time.perf_counter() - started
+
+            _release_slow.set()
+            return health, elapsed, await slow
+
+    health, elapsed, slow = asyncio.run(run())
+
+    assert health.status_code == 200
+    assert elapsed < 1
+    assert slow.text == 'done'
+
+
+def test_build_events_stream_natively(monkeypatch):
+    statuses = iter(['queued', 'running', 'running', 'done'])
+    monkeypatch.setattr(asgi, '_build_status', lambda job_id, session_id: {
+        'success': True, 'job_id': job_id, 'status': next(statuses)
+    })
+    monkeypatch.setattr(asgi, 'BUILD_POLL_SECONDS', 0.01)
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/build/job-1/events", params={"session_id": "s1"})
+
+    response = asyncio.run(run())
+
+    assert response.headers['content-type'] == 'text/event-stream'
+    events = [line for line in response.text.splitlines() if line.startswith('event:')]
+    assert events == ['event: status', 'event: status', 'event: done']
+    assert ': keep-alive' in response.text
+
+
+def test_async_message_falls_back_to_the_session_cookie(monkeypatch):
+    monkeypatch.setenv('SPECULATIVE_ANALYSIS', 'false')
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = await client.post("/api/start_session")
+            with_cookie = await client.post("/api/message", json={"message": "the very hungry caterpillar"})
+            client.cookies.clear()
+            without_cookie = await client.post("/api/message", json={"message": "the very hungry caterpillar"})
+            return started, with_cookie, without_cookie
+
+    started, with_cookie, without_cookie = asyncio.run(run())
+
+    assert started.status_code == 200
+    assert with_cookie.status_code == 200
+    assert "The Very Hungry Caterpillar" in with_cookie.json()['message']
+    assert without_cookie.status_code == 400
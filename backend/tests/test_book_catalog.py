@@ -0,0 +1,73 @@
+"""Tests for the bundled book catalog and how the orchestrator uses it."""
+from agents.orchestrator import GameOrchestrator, Phase
+from services.book_catalog import BookCatalog
+
+
+class RecordingStoryAnalyst:
+    """Story Analyst stand-in that records what it was asked."""
+
+    def __init__(self):
+        self.calls = []
+
+    def process_message(self, user_message, chat_history, callbacks=None, history_summary=None,
+                        book_candidates=None):
+        self.calls.append({"message": user_message, "book_candidates": book_candidates})
+        return {"success": True, "message": "Which one did you read?", "book_identified": False,
+                "is_complete": False}
+
+
+def test_titles_and_aliases_resolve_to_one_book():
+    catalog = BookCatalog()
+    assert catalog.identify("I read the taco dragon book").title == "Dragons Love Tacos"
+    assert catalog.identify("dragons love tacos").title == "Dragons Love Tacos"
+    assert catalog.identify("harry potter and the chamber of secrets").title == \
+        "Harry Potter and the Chamber of Secrets"
+    assert catalog.identify("Matilda by Roald Dahl").title == "Matilda"
+
+
+def test_unrelated_text_does_not_match():
+    catalog = BookCatalog()
+    assert catalog.lookup("a dog book") is None
+    assert catalog.lookup("") is None
+
+
+def test_series_and_authors_return_candidates():
+    catalog = BookCatalog()
+
+    series = catalog.lookup("I read harry potter")
+    assert "title" not in series
+    assert {book["title"] for book in series["candidates"]} == {
+        "Harry Potter and the Sorcerer's Stone",
+        "Harry Potter and the Chamber of Secrets",
+        "Harry Potter and the Prisoner of Azkaban",
+    }
+    assert {book["series"] for book in catalog.lookup("elephant and piggie")["candidates"]} == {"Elephant & Piggie"}
+    assert {book["author"] for book in catalog.lookup("mo willems books")["candidates"]} == {"Mo Willems"}
+    assert catalog.identify("harry potter") is None
+    assert catalog.stats()["ambiguous"] == 4
+
+
+def test_orchestrator_asks_which_book_for_a_series():
+    orchestrator = GameOrchestrator()
+    orchestrator._story_analyst = RecordingStoryAnalyst()
+
+    response = orchestrator.process_message("We read harry potter!")
+
+    assert orchestrator.phase == Phase.IDENTIFYING
+    assert orchestrator.book_info is None
+    assert response["message"] == "Which one did you read?"
+    candidates = orchestrator.story_analyst.calls[0]["book_candidates"]
+    assert "Harry Potter and the Chamber of Secrets" in [book.title for book in candidates]
+
+
+def test_orchestrator_confirms_a_single_match_without_the_story_analyst(monkeypatch):
+    monkeypatch.setenv("SPECULATIVE_ANALYSIS", "false")
+    orchestrator = GameOrchestrator()
+    orchestrator._story_analyst = RecordingStoryAnalyst()
+
+    response = orchestrator.process_message("the very hungry caterpillar")
+
+    assert orchestrator.phase == Phase.DISCUSSING
+    assert orchestrator.book_info.title == "The Very Hungry Caterpillar"
+    assert "Is that 'The Very Hungry Caterpillar' by Eric Carle?" in response["message"]
+    assert orchestrator.story_analyst.calls == []
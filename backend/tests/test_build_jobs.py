@@ -0,0 +1,102 @@
+"""Tests for the background game-build queue."""
+import threading
+
+import pytest
+
+from services.build_jobs import DONE, FAILED, QUEUED, RUNNING, BuildQueue, BuildQueueFull
+
+
+def _gated_build(result=None):
+    """Build callable that blocks until its gate opens."""
+    gate = threading.Event()
+
+    def build():
+        gate.wait(timeout=5)
+        return result or {"success": True, "game_id": "game-1"}
+    return build, gate
+
+
+def _wait_for(queue, job, status):
+    """Wait until a job reaches the given state."""
+    while job.status != status:
+        assert queue.wait(job.id, timeout=5) is not None
+    return job
+
+
+def test_job_moves_through_queued_running_done():
+    queue = BuildQueue(max_workers=1)
+    first_build, first_gate = _gated_build()
+    second_build, second_gate = _gated_build()
+    first = queue.submit("s1", first_build)
+    second = queue.submit("s2", second_build)
+
+    _wait_for(queue, first, RUNNING)
+    assert second.status == QUEUED
+    assert queue.queue_position(second.id) == 0
+    assert queue.queue_position(first.id) is None
+
+    first_gate.set()
+    second_gate.set()
+    _wait_for(queue, first, DONE)
+    queue._executor.shutdown(wait=True)
+
+    assert second.status == DONE and second.result["game_id"] == "game-1"
+    stats = queue.stats()
+    assert stats["completed"] == 2 and stats["queued"] == 0 and stats["running"] == 0
+
+
+def test_unsuccessful_or_raising_builds_fail():
+    queue = BuildQueue(max_workers=1)
+
+    def explode():
+        raise RuntimeError("template missing")
+    unsuccessful = queue.submit("s1", lambda: {"success": False, "error": "design invalid"})
+    raising = queue.submit("s2", explode)
+    queue._executor.shutdown(wait=True)
+
+    assert unsuccessful.status == FAILED and unsuccessful.error == "design invalid"
+    assert raising.status == FAILED and raising.error == "template missing"
+    assert queue.stats()["failed"] == 2
+
+
+def test_completion_handler_runs_before_the_job_is_done():
+    queue = BuildQueue(max_workers=1)
+    seen = []
+    job = queue.submit("s1", lambda: {"success": True}, on_finished=lambda j: seen.append(j.status))
+    queue._executor.shutdown(wait=True)
+
+    assert seen == [RUNNING]
+    assert job.status == DONE
+
+
+def test_failing_completion_handler_fails_the_job():
+    queue = BuildQueue(max_workers=1)
+
+    def save(job):
+        raise IOError("disk full")
+    job = queue.submit("s1", lambda: {"success": True}, on_finished=save)
+    queue._executor.shutdown(wait=True)
+
+    assert job.status == FAILED and job.error == "disk full"
+
+
+def test_submit_refuses_builds_past_max_pending():
+    queue = BuildQueue(max_workers=1, max_pending=1)
+    build, gate = _gated_build()
+    queue.submit("s1", build)
+
+    with pytest.raises(BuildQueueFull):
+        queue.submit("s2", build)
+    assert queue.stats()["rejected"] == 1
+    gate.set()
+
+
+def test_finished_jobs_are_forgotten_after_retention():
+    queue = BuildQueue(max_workers=1, retention_seconds=0)
+    job = queue.submit("s1", lambda: {"success": True})
+    queue.wait(job.id, timeout=5)
+    queue._executor.shutdown(wait=True)
+
+    queue._prune()
+    assert queue.get(job.id) is None
+    assert queue.wait(job.id, timeout=0) is None
@@ -0,0 +1,75 @@
+"""Tests for fitting conversation history into token budgets."""
+from langchain_core.messages import AIMessage, HumanMessage
+
+from services.context_builder import ContextBuilder, message_tokens
+
+
+def _conversation(turns, words=40):
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"User message {turn}. " + "word " * words))
+        messages.append(AIMessage(content=f"Agent reply {turn}. " + "word " * words))
+    return messages
+
+
+def _builder(budget=400):
+    return ContextBuilder(budgets={("agent", "conversation"): budget}, summary_line_chars=40)
+
+
+def test_short_history_is_sent_verbatim():
+    messages = _conversation(2)
+    context = _builder().build(messages, {}, "agent", "conversation")
+    assert context["summary"] is None
+    assert context["messages"] == messages
+
+
+def test_long_history_folds_into_a_summary_within_budget():
+    builder = _builder()
+    messages = _conversation(10)
+    context = builder.build(messages, {}, "agent", "conversation")
+
+    folded = len(messages) - len(context["messages"])
+    assert context["summary"].splitlines()[-1].startswith(f"- Agent: Agent reply {folded // 2 - 1}.")
+    assert context["messages"] == messages[-len(context["messages"]):]
+    assert isinstance(context["messages"][0], HumanMessage)
+    assert sum(message_tokens(m) for m in context["messages"]) <= 300
+    assert context["tokens"] <= 400
+
+
+def test_fold_point_stays_put_until_the_window_overflows():
+    builder = _builder()
+    state = {}
+    messages = _conversation(10)
+    first = builder.build(messages, state, "agent", "conversation")
+
+    # One more short exchange fits in the window: same prefix, same summary
+    messages += [HumanMessage(content="ok"), AIMessage(content="great")]
+    second = builder.build(messages, state, "agent", "conversation")
+
+    assert second["summary"] == first["summary"]
+    assert second["messages"][:len(first["messages"])] == first["messages"]
+
+
+def test_summary_lines_are_compressed_once_and_kept_in_state():
+    builder = _builder()
+    state = {}
+    messages = _conversation(10)
+    builder.build(messages, state, "agent", "conversation")
+    lines = list(state["lines"])
+
+    builder.build(messages + _conversation(3), state, "agent", "conversation")
+
+    assert state["lines"][:len(lines)] == lines
+    assert builder.stats()["folded_messages"] == len(state["lines"])
+
+
+def test_long_messages_are_cut_to_one_summary_line():
+    builder = ContextBuilder(budgets={("agent", "conversation"): 100}, summary_line_chars=60)
+    long_reply = AIMessage(content="The first sentence is here. The second one is very long " + "and long " * 20)
+    messages = [HumanMessage(content="hi " * 50), long_reply, HumanMessage(content="hi " * 50),
+                AIMessage(content="bye")]
+    state = {}
+    builder.build(messages, state, "agent", "conversation")
+
+    assert "- Agent: The first sentence is here." in state["lines"]
+    assert all(len(line) <= len("- Agent: ") + 61 for line in state["lines"])
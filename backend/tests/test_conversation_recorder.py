@@ -0,0 +1,31 @@
+"""Tests for conversation recording and replay."""
+from bench.replay import ReplayAnalysisCache
+from schemas.book_schema import BookAnalysis, BookInfo
+from services.conversation_recorder import ConversationRecorder, RecordingCallCounter, anonymize
+
+
+def test_anonymize_masks_self_introduced_names():
+    assert anonymize("I'm Emma and I love dragons") == "I'm [name] and I love dragons"
+    assert anonymize("Hi! I am Noah.") == "Hi! I am [name]."
+    assert anonymize("i’m Zoe") == "i’m [name]"
+    assert anonymize("My name is Ava, call me Avie") == "My name is [name], call me [name]"
+
+
+def test_anonymize_leaves_other_uses_of_i_am():
+    assert anonymize("I'm done talking about it") == "I'm done talking about it"
+    assert anonymize("I am 7 years old") == "I am 7 years old"
+
+
+def test_prepared_analysis_is_recorded_and_replayed():
+    analysis = BookAnalysis.Config.json_schema_extra["example"]
+    counter = RecordingCallCounter("Yes, it's that one", "discussing")
+    ConversationRecorder().record_prepared_analysis(counter, "speculative", analysis)
+    turn = counter.to_turn({"phase": "designing", "message": "Let's design!"})
+    assert turn["prepared_analysis"]["source"] == "speculative"
+
+    cache = ReplayAnalysisCache()
+    book = BookInfo(title="Dragons Love Tacos", author="Adam Rubin")
+    cache.start_turn(turn)
+    assert cache.get(book).setting == analysis["setting"]
+    cache.start_turn({"calls": []})
+    assert cache.get(book) is None
@@ -0,0 +1,88 @@
+"""Tests for serving stored games: encoding negotiation and conditional requests."""
+import gzip
+import uuid
+
+import app as app_module
+from agents.orchestrator import GameOrchestrator
+from services.compression import ENCODINGS
+from services.game_store import get_game_store
+from services.static_assets import IMMUTABLE_CACHE_CONTROL
+
+GAME_HTML = "<!DOCTYPE html><html><body>" + "Dragons love tacos! " * 200 + "</body></html>"
+
+
+def _client():
+    return app_module.app.test_client()
+
+
+def _stored_game():
+    return get_game_store().put(GAME_HTML + uuid.uuid4().hex)
+
+
+def test_game_by_hash_is_immutable_with_the_hash_as_etag():
+    game_hash = _stored_game()
+    response = _client().get(f"/g/{game_hash}", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.get_etag() == (game_hash, False)
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.get_data(as_text=True).startswith(GAME_HTML)
+
+
+def test_gzip_is_sent_precompressed_with_its_own_etag():
+    game_hash = _stored_game()
+    response = _client().get(f"/g/{game_hash}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.get_etag() == (f"{game_hash}-gzip", False)
+    assert gzip.decompress(response.get_data()).decode("utf-8").startswith(GAME_HTML)
+
+
+def test_preferred_encoding_follows_the_clients_quality_values():
+    game_hash = _stored_game()
+    client = _client()
+
+    best = client.get(f"/g/{game_hash}", headers={"Accept-Encoding": "gzip, br"})
+    assert best.headers["Content-Encoding"] == ENCODINGS[0]
+
+    refused = client.get(f"/g/{game_hash}", headers={"Accept-Encoding": "gzip;q=0, br;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_matching_etag_gets_a_304_per_encoding():
+    game_hash = _stored_game()
+    client = _client()
+
+    not_modified = client.get(f"/g/{game_hash}", headers={"Accept-Encoding": "gzip",
+                                                          "If-None-Match": f'"{game_hash}-gzip"'})
+    assert not_modified.status_code == 304 and not_modified.get_data() == b""
+
+    # The identity ETag names different bytes than the gzip variant
+    other_encoding = client.get(f"/g/{game_hash}", headers={"Accept-Encoding": "gzip",
+                                                           "If-None-Match": f'"{game_hash}"'})
+    assert other_encoding.status_code == 200
+
+
+def test_unknown_or_malformed_hashes_are_not_found():
+    client = _client()
+    assert client.get(f"/g/{'0' * 64}").status_code == 404
+    assert client.get("/g/..%2Fapp.py").status_code == 404
+
+
+def test_session_game_is_revalidated_on_every_load():
+    game_hash = _stored_game()
+    orchestrator = GameOrchestrator()
+    orchestrator.game_hash = game_hash
+    session_id = uuid.uuid4().hex
+    app_module.session_store.save(session_id, orchestrator)
+    client = _client()
+
+    response = client.get(f"/api/game/{session_id}", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(f"/api/game/{session_id}", headers={"Accept-Encoding": "identity",
+                                                          "If-None-Match": f'"{game_hash}"'})
+    assert again.status_code == 304
@@ -0,0 +1,101 @@
+"""Tests for the content-addressed game store and its lease-based collection."""
+import gzip
+import os
+import time
+
+import agents.code_generator as code_generator_module
+import agents.orchestrator as orchestrator_module
+from agents.orchestrator import GameOrchestrator
+from services.compression import ENCODINGS
+from services.game_store import GameStore, is_game_hash
+
+HTML = "<!DOCTYPE html><html><body>Dragons love tacos!</body></html>"
+
+
+def _age(store, game_hash, seconds):
+    """Pretend a game's lease was last renewed some seconds ago."""
+    then = time.time() - seconds
+    os.utime(store.path(game_hash), (then, then))
+
+
+def test_identical_games_are_stored_once_with_their_variants(tmp_path):
+    store = GameStore(str(tmp_path), gc_interval=0)
+    game_hash = store.put(HTML)
+
+    assert is_game_hash(game_hash)
+    assert store.put(HTML) == game_hash
+    assert store.encodings(game_hash) == list(ENCODINGS)
+    with open(store.path(game_hash, "gzip"), "rb") as f:
+        assert gzip.decompress(f.read()).decode("utf-8") == HTML
+    stats = store.stats()
+    assert (stats["games"], stats["stores"], stats["duplicates"]) == (1, 1, 1)
+
+
+def test_collect_removes_expired_games_and_their_variants(tmp_path):
+    store = GameStore(str(tmp_path), retention_seconds=60, gc_interval=0)
+    old = store.put(HTML)
+    fresh = store.put(HTML + "<!-- v2 -->")
+    _age(store, old, 120)
+
+    assert store.collect() == 1
+    assert not store.exists(old) and store.encodings(old) == []
+    assert store.exists(fresh)
+    assert store.stats()["collected"] == 1
+
+
+def test_storing_a_game_again_renews_its_lease(tmp_path):
+    store = GameStore(str(tmp_path), retention_seconds=60, gc_interval=0)
+    game_hash = store.put(HTML)
+    _age(store, game_hash, 120)
+
+    store.put(HTML)
+
+    assert store.collect() == 0 and store.exists(game_hash)
+
+
+def test_serving_renews_a_lease_at_most_hourly_unless_forced(tmp_path):
+    store = GameStore(str(tmp_path), gc_interval=0)
+    game_hash = store.put(HTML)
+    _age(store, game_hash, 60)
+    before = os.path.getmtime(store.path(game_hash))
+
+    store.touch(game_hash)
+    assert os.path.getmtime(store.path(game_hash)) == before
+
+    store.touch(game_hash, force=True)
+    assert os.path.getmtime(store.path(game_hash)) > before
+
+
+def test_zero_retention_keeps_games_forever(tmp_path):
+    store = GameStore(str(tmp_path), retention_seconds=0, gc_interval=0)
+    game_hash = store.put(HTML)
+    _age(store, game_hash, 10 * 365 * 24 * 3600)
+    assert store.collect() == 0
+
+
+def test_put_collects_once_the_gc_interval_has_passed(tmp_path):
+    store = GameStore(str(tmp_path), retention_seconds=60, gc_interval=30)
+    old = store.put(HTML)
+    _age(store, old, 120)
+    store._last_gc -= 60
+
+    store.put(HTML + "<!-- v2 -->")
+
+    assert not store.exists(old)
+
+
+def test_a_collected_game_is_re_rendered_under_the_same_hash(monkeypatch, tmp_path):
+    store = GameStore(str(tmp_path), retention_seconds=60, gc_interval=0)
+    monkeypatch.setattr(orchestrator_module, "get_game_store", lambda: store)
+    monkeypatch.setattr(code_generator_module, "get_game_store", lambda: store)
+    monkeypatch.setattr(code_generator_module, "get_render_cache", lambda: None)
+    orchestrator = GameOrchestrator()
+    orchestrator.game_design = {"game_title": "Taco Quest", "game_type": "platformer",
+                                "player_character": {"name": "Dragon"}}
+    assert orchestrator.restore_game()
+    game_hash = orchestrator.game_hash
+    _age(store, game_hash, 120)
+    store.collect()
+
+    assert orchestrator.restore_game()
+    assert orchestrator.game_hash == game_hash and store.exists(game_hash)
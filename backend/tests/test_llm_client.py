@@ -0,0 +1,43 @@
+"""Tests for the pooled Claude client."""
+import inspect
+
+from langchain_anthropic import ChatAnthropic
+
+from services.llm_client import PooledChatAnthropic, get_llm_pool
+
+# langchain-anthropic internals PooledChatAnthropic overrides
+HOOKS = ("_client", "_async_client", "_create", "_acreate", "_stream", "_astream")
+
+
+def test_chat_anthropic_still_has_the_overridden_hooks():
+    for name in HOOKS + ("_client_params",):
+        defined_in = [cls for cls in ChatAnthropic.__mro__ if name in vars(cls)]
+        assert defined_in, f"ChatAnthropic no longer defines {name}"
+
+    for name in ("_create", "_acreate"):
+        assert list(inspect.signature(getattr(ChatAnthropic, name)).parameters) == ["self", "payload"]
+    assert inspect.isgeneratorfunction(ChatAnthropic._stream)
+    assert inspect.isasyncgenfunction(ChatAnthropic._astream)
+
+
+def test_pooled_model_overrides_every_hook():
+    for name in HOOKS:
+        assert name in vars(PooledChatAnthropic), f"PooledChatAnthropic does not override {name}"
+
+
+def test_pooled_model_uses_the_shared_connection_pool():
+    first = PooledChatAnthropic(model="claude-3-5-haiku-20241022", anthropic_api_key="test-key")
+    second = PooledChatAnthropic(model="claude-sonnet-4-20250514", anthropic_api_key="test-key")
+    assert first._client._client is second._client._client
+
+
+def test_create_holds_an_in_flight_slot(monkeypatch):
+    limiter = get_llm_pool().limiter
+    seen = []
+    monkeypatch.setattr(ChatAnthropic, "_create", lambda self, payload: seen.append(limiter.stats()["in_flight"]))
+
+    model = PooledChatAnthropic(model="claude-3-5-haiku-20241022", anthropic_api_key="test-key")
+    before = limiter.stats()["in_flight"]
+    model._create({"messages": []})
+    assert seen == [before + 1]
+    assert limiter.stats()["in_flight"] == before
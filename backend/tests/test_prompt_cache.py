@@ -0,0 +1,33 @@
+"""Tests for prompt-cache breakpoints."""
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.game_designer import get_game_designer
+from schemas.book_schema import BookAnalysis
+from services.prompt_cache import cached_system_message
+
+
+def _breakpoints(inputs):
+    blocks = [block for message in inputs["system"] for block in message.content]
+    for message in inputs["chat_history"]:
+        if isinstance(message.content, list):
+            blocks += message.content
+    return [block for block in blocks if block.get("cache_control")]
+
+
+def test_volatile_sections_have_no_breakpoint():
+    message = cached_system_message("prompt", None, "book", volatile=["summary", None])
+    assert [block["text"] for block in message.content] == ["prompt", "book", "summary"]
+    assert [bool(block.get("cache_control")) for block in message.content] == [True, True, False]
+
+
+def test_game_designer_stays_within_three_breakpoints_with_a_summary():
+    analysis = BookAnalysis(**BookAnalysis.Config.json_schema_extra["example"])
+    history = [AIMessage(content="Which type of game?"), HumanMessage(content="A platformer")]
+
+    inputs = get_game_designer()._inputs("Collect tacos", history, analysis,
+                                         history_summary="User: I read Dragons Love Tacos",
+                                         discussion="User: The spicy salsa part!")
+
+    assert len(_breakpoints(inputs)) == 3
+    summary = inputs["system"][0].content[-1]
+    assert summary["text"].startswith("EARLIER IN THIS CONVERSATION") and "cache_control" not in summary
@@ -0,0 +1,91 @@
+"""Tests for reusing rendered games across identical designs."""
+import os
+import time
+
+import agents.code_generator as code_generator_module
+import services.render_cache as render_cache_module
+from agents.code_generator import CodeGeneratorAgent
+from services.game_store import GameStore
+from services.render_cache import RenderCache, render_key
+
+DESIGN = {
+    "game_title": "Taco Quest",
+    "game_type": "platformer",
+    "book_title": "Dragons Love Tacos",
+    "player_character": {"name": "Dragon"},
+    "collectibles": [{"name": "Taco"}],
+    "obstacles": [{"name": "Spicy Salsa"}],
+}
+
+
+def _entry(game_hash="a" * 64):
+    return {"game_title": "Taco Quest", "config": {"game_type": "platformer"}, "hash": game_hash}
+
+
+def test_key_ignores_key_order_but_not_content():
+    reordered = dict(reversed(list(DESIGN.items())))
+    assert render_key(reordered) == render_key(DESIGN)
+    assert render_key({**DESIGN, "game_title": "Taco Quest 2"}) != render_key(DESIGN)
+
+
+def test_template_changes_invalidate_every_key(monkeypatch):
+    before = render_key(DESIGN)
+    monkeypatch.setattr(render_cache_module, "TEMPLATE_VERSION", "edited")
+    assert render_key(DESIGN) != before
+
+
+def test_entries_are_shared_through_the_directory(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    cache.put("k1", _entry())
+
+    other_worker = RenderCache(str(tmp_path))
+    assert other_worker.get("k1") == _entry()
+    assert other_worker.get("k1") == _entry()
+    assert other_worker.get("k2") is None
+    stats = other_worker.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = RenderCache(str(tmp_path), memory_entries=0, max_entries=2)
+    for key in ("k1", "k2"):
+        cache.put(key, _entry())
+        os.utime(os.path.join(str(tmp_path), f"{key}.json"), (time.time() - 60, time.time() - 60))
+    cache.get("k1")  # k1 is now more recent than k2
+    cache.put("k3", _entry())
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None and cache.get("k3") is not None
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def _generator(monkeypatch, tmp_path):
+    store = GameStore(str(tmp_path / "games"), gc_interval=0)
+    cache = RenderCache(str(tmp_path / "renders"))
+    monkeypatch.setattr(code_generator_module, "get_game_store", lambda: store)
+    monkeypatch.setattr(code_generator_module, "get_render_cache", lambda: cache)
+    return CodeGeneratorAgent(), store, cache
+
+
+def test_identical_designs_are_rendered_once(monkeypatch, tmp_path):
+    generator, store, cache = _generator(monkeypatch, tmp_path)
+
+    first = generator.generate_game(DESIGN)
+    second = generator.generate_game(dict(DESIGN))
+
+    assert first["success"] and not first["cached"]
+    assert second["cached"] and second["hash"] == first["hash"]
+    assert cache.stats()["stores"] == 1
+    assert not generator.generate_game({**DESIGN, "game_title": "Salsa Panic"})["cached"]
+
+
+def test_a_render_whose_game_was_collected_is_rendered_again(monkeypatch, tmp_path):
+    generator, store, cache = _generator(monkeypatch, tmp_path)
+    first = generator.generate_game(DESIGN)
+    for encoding in ["identity"] + store.encodings(first["hash"]):
+        os.remove(store.path(first["hash"], encoding))
+
+    again = generator.generate_game(DESIGN)
+
+    assert again["success"] and not again["cached"]
+    assert store.exists(again["hash"])
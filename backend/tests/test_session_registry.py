@@ -0,0 +1,64 @@
+"""Tests for the bounded in-process session registry."""
+import time
+
+from services.session_registry import SessionRegistry
+
+
+class SizedSession:
+    """Orchestrator stand-in with a fixed estimated size."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def estimate_size(self):
+        return self.size
+
+
+def test_idle_sessions_expire():
+    registry = SessionRegistry(ttl_seconds=0.05, sweep_interval=0)
+    registry.put("s1", SizedSession(100))
+    time.sleep(0.1)
+
+    assert "s1" not in registry
+    assert registry.get("s1") is None
+    stats = registry.stats()
+    assert stats["expired_evictions"] == 1 and stats["resident_bytes"] == 0
+
+
+def test_sweep_removes_only_expired_sessions():
+    registry = SessionRegistry(ttl_seconds=0.1, sweep_interval=0)
+    registry.put("old", SizedSession(100))
+    time.sleep(0.15)
+    registry.put("new", SizedSession(100))
+
+    assert registry.sweep() == 1
+    assert "new" in registry and len(registry) == 1
+
+
+def test_byte_budget_evicts_least_recently_used():
+    registry = SessionRegistry(ttl_seconds=0, max_bytes=250, sweep_interval=0)
+    registry.put("a", SizedSession(100))
+    registry.put("b", SizedSession(100))
+    registry.get("a")  # a is now more recent than b
+    registry.put("c", SizedSession(100))
+
+    assert registry.get("b") is None
+    assert registry.get("a") is not None and registry.get("c") is not None
+    assert registry.stats()["lru_evictions"] == 1
+    assert registry.stats()["resident_bytes"] == 200
+
+
+def test_resaving_a_session_remeasures_it():
+    registry = SessionRegistry(ttl_seconds=0, max_bytes=0, sweep_interval=0)
+    session = SizedSession(100)
+    registry.put("s1", session)
+    session.size = 300
+    registry.put("s1", session)
+    assert registry.stats()["resident_bytes"] == 300
+
+
+def test_a_session_larger_than_the_budget_is_still_kept():
+    registry = SessionRegistry(ttl_seconds=0, max_bytes=50, sweep_interval=0)
+    registry.put("small", SizedSession(10))
+    registry.put("big", SizedSession(100))
+    assert "big" in registry and "small" not in registry
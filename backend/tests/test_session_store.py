@@ -0,0 +1,67 @@
+"""Tests for the session store backends."""
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.orchestrator import GameOrchestrator, Phase
+from schemas.book_schema import BookInfo
+from services.session_store import InProcessSessionStore, SQLiteSessionStore, create_session_store
+
+
+def _orchestrator():
+    orchestrator = GameOrchestrator()
+    orchestrator.phase = Phase.DISCUSSING
+    orchestrator.book_info = BookInfo(title="Dragons Love Tacos", author="Adam Rubin")
+    orchestrator.conversation_history = [HumanMessage(content="dragons love tacos"),
+                                         AIMessage(content="Is that 'Dragons Love Tacos' by Adam Rubin?")]
+    orchestrator.context_state = {"story": {"covered": {"conversation": 0}}}
+    return orchestrator
+
+
+def test_sqlite_store_round_trips_an_orchestrator(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    original = _orchestrator()
+    store.save("s1", original)
+
+    # A second store on the same file stands in for another worker
+    loaded = SQLiteSessionStore(str(tmp_path / "sessions.db")).get("s1")
+
+    assert loaded is not original
+    assert loaded.phase == Phase.DISCUSSING
+    assert loaded.book_info.title == "Dragons Love Tacos"
+    assert [m.content for m in loaded.conversation_history] == [m.content for m in original.conversation_history]
+    assert loaded.context_state == original.context_state
+    assert loaded.recording_id == original.recording_id
+    assert "s1" in store and "s2" not in store
+
+
+def test_sqlite_store_expires_idle_sessions(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=0.05, sweep_interval=0)
+    store.save("s1", _orchestrator())
+    time.sleep(0.1)
+
+    assert store.get("s1") is None
+    assert store.sweep() == 1
+    assert store.stats()["sessions"] == 0
+
+
+def test_sqlite_store_delete(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.save("s1", _orchestrator())
+    store.delete("s1")
+    assert store.get("s1") is None
+
+
+def test_memory_store_keeps_the_live_object():
+    store = InProcessSessionStore(sweep_interval=0)
+    orchestrator = _orchestrator()
+    store.save("s1", orchestrator)
+    assert store.get("s1") is orchestrator
+    assert store.stats()["backend"] == "memory"
+
+
+def test_create_session_store_rejects_unknown_backends():
+    assert isinstance(create_session_store("memory"), InProcessSessionStore)
+    with pytest.raises(ValueError):
+        create_session_store("memcached")
@@ -0,0 +1,148 @@
+"""Tests for speculative background book analysis."""
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agents.orchestrator as orchestrator_module
+import services.speculative as speculative_module
+from agents.orchestrator import GameOrchestrator, Phase
+from schemas.book_schema import BookAnalysis, BookInfo
+from services.analysis_cache import AnalysisCache
+from services.speculative import SpeculativeAnalyzer
+
+EXAMPLE = BookAnalysis.Config.json_schema_extra["example"]
+TACOS = BookInfo(title="Dragons Love Tacos", author="Adam Rubin")
+ZOG = BookInfo(title="Zog", author="Julia Donaldson")
+
+
+class GatedAnalyzer(SpeculativeAnalyzer):
+    """Analyzer whose analyses wait for the test to release them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+        self.running = threading.Event()
+        self.analyzed = []
+
+    def _analyze(self, book_info, conversation_history, counter):
+        self.running.set()
+        self.release.wait(timeout=5)
+        self.analyzed.append(book_info.title)
+        return {"success": True, "analysis": {**EXAMPLE, "book": book_info.dict()}}
+
+
+def _analyzer(monkeypatch, tmp_path, **kwargs):
+    cache = AnalysisCache(str(tmp_path / "analyses.db"))
+    monkeypatch.setattr(speculative_module, "get_analysis_cache", lambda: cache)
+    return GatedAnalyzer(**kwargs), cache
+
+
+def test_claim_waits_for_the_analysis_and_shares_it(monkeypatch, tmp_path):
+    analyzer, cache = _analyzer(monkeypatch, tmp_path)
+    assert analyzer.start(TACOS, [])
+    analyzer.release.set()
+
+    result = analyzer.claim(TACOS, timeout=5)
+
+    assert result["speculative"] and result["analysis"]["book"]["title"] == "Dragons Love Tacos"
+    analyzer._executor.shutdown(wait=True)  # The cache write runs in the done callback
+    assert cache.get(TACOS) is not None
+    assert analyzer.stats()["used"] == 1 and analyzer.stats()["tracked"] == 0
+
+
+def test_sessions_discussing_the_same_book_share_one_analysis(monkeypatch, tmp_path):
+    analyzer, _ = _analyzer(monkeypatch, tmp_path)
+    analyzer.start(TACOS, [])
+    analyzer.start(BookInfo(title="dragons love tacos", author="adam rubin"), [])
+    analyzer.release.set()
+
+    assert analyzer.claim(TACOS, timeout=5) is not None
+    assert analyzer.claim(TACOS, timeout=5) is not None
+    assert analyzer.analyzed == ["Dragons Love Tacos"]
+    assert analyzer.stats()["joined"] == 1
+
+
+def test_start_skips_books_already_cached(monkeypatch, tmp_path):
+    analyzer, cache = _analyzer(monkeypatch, tmp_path)
+    cache.put(TACOS, BookAnalysis(**{**EXAMPLE, "book": TACOS.dict()}))
+    assert not analyzer.start(TACOS, [])
+    assert analyzer.stats()["started"] == 0
+
+
+def test_cancel_before_it_runs_costs_nothing(monkeypatch, tmp_path):
+    analyzer, _ = _analyzer(monkeypatch, tmp_path, max_workers=1)
+    analyzer.start(TACOS, [])
+    assert analyzer.running.wait(timeout=5)
+    analyzer.start(ZOG, [])  # Queued behind the running analysis
+
+    analyzer.cancel(ZOG)
+    analyzer.release.set()
+    analyzer.claim(TACOS, timeout=5)
+
+    stats = analyzer.stats()
+    assert stats["cancelled"] == 1 and stats["wasted"] == 0
+    assert analyzer.analyzed == ["Dragons Love Tacos"]
+
+
+def test_cancel_while_running_counts_as_wasted(monkeypatch, tmp_path):
+    analyzer, cache = _analyzer(monkeypatch, tmp_path)
+    analyzer.start(TACOS, [])
+    assert analyzer.running.wait(timeout=5)
+
+    analyzer.cancel(TACOS)
+    analyzer.release.set()
+    analyzer._executor.shutdown(wait=True)
+
+    assert analyzer.stats()["wasted"] == 1
+    assert cache.get(TACOS) is not None  # Still shared with later sessions
+
+
+def test_claim_gives_up_after_the_timeout(monkeypatch, tmp_path):
+    analyzer, _ = _analyzer(monkeypatch, tmp_path)
+    analyzer.start(TACOS, [])
+    assert analyzer.claim(TACOS, timeout=0.05) is None
+    analyzer.release.set()
+
+
+class FinishingStoryAnalyst:
+    def __init__(self):
+        self.analysis_calls = 0
+
+    def process_message(self, user_message, chat_history, callbacks=None, history_summary=None,
+                        book_candidates=None):
+        return {"success": True, "message": "Let's design your game!", "book_identified": False,
+                "is_complete": True}
+
+    def create_book_analysis(self, *args, **kwargs):
+        self.analysis_calls += 1
+        return {"success": True, "analysis": {**EXAMPLE, "book": TACOS.dict()}}
+
+
+class GreetingGameDesigner:
+    def get_initial_greeting(self, book_analysis):
+        return "Which type of game?"
+
+
+def test_transition_uses_the_speculative_analysis_without_an_llm_call(monkeypatch, tmp_path):
+    analyzer, _ = _analyzer(monkeypatch, tmp_path)
+    monkeypatch.setattr(orchestrator_module, "get_speculative_analyzer", lambda: analyzer)
+    monkeypatch.setattr(orchestrator_module, "get_analysis_cache", lambda: None)
+    analyzer.release.set()
+
+    orchestrator = GameOrchestrator()
+    orchestrator._story_analyst = FinishingStoryAnalyst()
+    orchestrator._game_designer = GreetingGameDesigner()
+    orchestrator.phase = Phase.IDENTIFYING
+    orchestrator.conversation_history = [HumanMessage(content="dragons love tacos")]
+    orchestrator.book_info = TACOS
+    orchestrator.phase = Phase.DISCUSSING
+    orchestrator._start_speculative_analysis()
+    orchestrator.conversation_history.append(AIMessage(content="What was your favorite part?"))
+
+    response = orchestrator.process_message("When they ate the spicy salsa")
+
+    assert response["phase"] == Phase.DESIGNING.value
+    assert orchestrator.story_analyst.analysis_calls == 0
+    assert orchestrator.book_analysis.book.title == "Dragons Love Tacos"
+    assert "spicy salsa" in orchestrator.discussion
+    assert analyzer.stats()["used"] == 1
@@ -0,0 +1,14 @@
+"""Tests for the Story Analyst's book confirmation check."""
+from agents.story_analyst import BOOK_CONFIRMATION
+
+
+def test_confirmation_needs_a_quoted_title_followed_by_by():
+    assert BOOK_CONFIRMATION.search("Is that 'Where the Wild Things Are' by Maurice Sendak?")
+    assert BOOK_CONFIRMATION.search("Ooh! Is that “Dragons Love Tacos” by Adam Rubin?")
+    assert BOOK_CONFIRMATION.search("So it's \"Corduroy\" BY Don Freeman!")
+
+
+def test_by_inside_other_words_is_not_a_confirmation():
+    assert not BOOK_CONFIRMATION.search("Maybe it was about a baby bear?")
+    assert not BOOK_CONFIRMATION.search("Let's see - it's by a famous author, right?")
+    assert not BOOK_CONFIRMATION.search("Is that the one with the hungry caterpillar?")
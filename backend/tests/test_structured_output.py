@@ -0,0 +1,102 @@
+"""Tests for forced-tool-call structured output and its repair loop."""
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from pydantic import BaseModel
+
+from services.structured_output import StructuredOutput, StructuredOutputError, structured_output_stats
+
+
+class Level(BaseModel):
+    """A game level."""
+    book: str
+    name: str
+    enemies: List[str]
+
+
+class ScriptedLLM:
+    """Chat model stand-in that replies from a script and records what it was sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.bound = None
+
+    def bind_tools(self, tools, tool_choice=None):
+        self.bound = {"tools": tools, "tool_choice": tool_choice}
+        return self
+
+    def invoke(self, messages, config=None):
+        self.calls.append(list(messages))
+        return self.responses.pop(0)
+
+    async def ainvoke(self, messages, config=None):
+        return self.invoke(messages, config)
+
+
+def _call(args, call_id="call-1", output_tokens=0):
+    return AIMessage(content="", tool_calls=[{"name": "Level", "args": args, "id": call_id}],
+                     usage_metadata={"input_tokens": 10, "output_tokens": output_tokens,
+                                     "total_tokens": 10 + output_tokens})
+
+
+def _outcomes():
+    return structured_output_stats().get("Level", {"first_try": 0, "repaired": 0, "failed": 0,
+                                                   "rejected_attempts": 0, "wasted_output_tokens": 0})
+
+
+def test_tool_schema_leaves_out_excluded_fields_and_forces_the_call():
+    output = StructuredOutput(Level, exclude=["book"])
+    llm = ScriptedLLM(_call({"name": "Taco Cave", "enemies": ["salsa"]}))
+
+    level = output.invoke(llm, [HumanMessage(content="Design a level")], fixed={"book": "Dragons Love Tacos"})
+
+    assert level == Level(book="Dragons Love Tacos", name="Taco Cave", enemies=["salsa"])
+    schema = llm.bound["tools"][0]["input_schema"]
+    assert "book" not in schema["properties"] and "book" not in schema.get("required", [])
+    assert llm.bound["tool_choice"] == {"type": "tool", "name": "Level"}
+    assert output.tool["description"] == "A game level."
+
+
+def test_invalid_arguments_are_sent_back_for_repair():
+    before = _outcomes()
+    output = StructuredOutput(Level, exclude=["book"], max_repairs=1)
+    llm = ScriptedLLM(_call({"name": "Taco Cave"}, output_tokens=40),
+                      _call({"name": "Taco Cave", "enemies": ["salsa"]}, call_id="call-2"))
+
+    level = output.invoke(llm, [HumanMessage(content="Design a level")], fixed={"book": "Zog"})
+
+    assert level.enemies == ["salsa"]
+    repair = llm.calls[1][-1]
+    assert isinstance(repair, ToolMessage) and repair.tool_call_id == "call-1"
+    assert "enemies" in repair.content and repair.status == "error"
+    after = _outcomes()
+    assert after["repaired"] == before["repaired"] + 1
+    assert after["wasted_output_tokens"] == before["wasted_output_tokens"] + 40
+
+
+def test_a_reply_without_the_tool_call_is_asked_again():
+    output = StructuredOutput(Level, max_repairs=1)
+    llm = ScriptedLLM(AIMessage(content="Here is a level: Taco Cave"),
+                      _call({"book": "Zog", "name": "Taco Cave", "enemies": []}))
+
+    assert asyncio.run(output.ainvoke(llm, [HumanMessage(content="Design a level")])).name == "Taco Cave"
+    assert isinstance(llm.calls[1][-1], HumanMessage)
+    assert "Level tool" in llm.calls[1][-1].content
+
+
+def test_gives_up_after_the_repair_budget():
+    before = _outcomes()
+    output = StructuredOutput(Level, max_repairs=1)
+    llm = ScriptedLLM(_call({"name": "Taco Cave"}), _call({"name": "Taco Cave"}, call_id="call-2"))
+
+    with pytest.raises(StructuredOutputError):
+        output.invoke(llm, [HumanMessage(content="Design a level")])
+
+    after = _outcomes()
+    assert len(llm.calls) == 2
+    assert after["failed"] == before["failed"] + 1
+    assert after["rejected_attempts"] == before["rejected_attempts"] + 2
+    assert structured_output_stats()["Level"]["success_rate"] < 1.0
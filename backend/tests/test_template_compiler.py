@@ -0,0 +1,85 @@
+"""Tests for the compiled game page template and its escaping."""
+import html
+import json
+import re
+
+import pytest
+
+from templates.compiler import HTML_TEXT, JSON_SCRIPT, compile_template
+from templates.phaser_templates import render_game
+
+VALUES = {
+    'game_title': 'Taco Quest',
+    'player_name': 'Dragon',
+    'collectible_name': 'Taco',
+    'obstacle_name': 'Salsa',
+    'bg_color': '0x87CEEB',
+    'player_color': '0xFF0000',
+    'collectible_color': 0xFFD700,
+    'obstacle_color': '0x8B0000',
+    'platform_color': '0x228B22',
+    'collectible_count': 10,
+    'obstacle_count': 3,
+}
+
+
+def _rendered_config(page):
+    """The game config exactly as the browser's JSON.parse would read it."""
+    match = re.search(r'<script type="application/json" id="game-config">(.*?)</script>', page, re.S)
+    return json.loads(match.group(1))
+
+
+def test_names_with_quotes_braces_and_script_tags_round_trip():
+    names = {
+        'player_name': 'Pete "the" Cat\'s {friend}',
+        'collectible_name': '</script><script>alert(1)</script>',
+        'obstacle_name': 'Spicy & <b>hot</b>\nsalsa',
+    }
+    config, page = render_game('platformer', {**VALUES, **names})
+
+    assert page.count('</script>') == 3  # Only the template's own script elements
+    rendered = _rendered_config(page)
+    assert rendered == config
+    for name, value in names.items():
+        assert rendered[name] == value
+
+
+def test_title_is_html_escaped():
+    title = 'Tacos <3 & "Dragons"'
+    _, page = render_game('top-down', {**VALUES, 'game_title': title, 'game_time': 60})
+
+    assert f'<title>{html.escape(title, quote=True)}</title>' in page
+    assert _rendered_config(page)['game_title'] == title
+
+
+def test_colors_become_numbers_and_bad_settings_are_refused():
+    config, _ = render_game('platformer', VALUES)
+    assert config['bg_color'] == 0x87CEEB and config['collectible_color'] == 0xFFD700
+
+    with pytest.raises(ValueError):
+        render_game('platformer', {**VALUES, 'bg_color': 'red'})
+    with pytest.raises(ValueError):
+        render_game('platformer', {**VALUES, 'collectible_count': '10'})
+    with pytest.raises(KeyError):
+        render_game('platformer', {key: value for key, value in VALUES.items() if key != 'player_name'})
+
+
+def test_unknown_game_types_render_the_platformer():
+    config, _ = render_game('racing', VALUES)
+    assert config['game_type'] == 'platformer'
+
+
+def test_compiled_template_matches_format_for_plain_values():
+    source = '<h1>{title}</h1><p>{{not a slot}}</p><script>var c = {config};</script><i>{title}</i>'
+    template = compile_template(source, contexts={'title': HTML_TEXT, 'config': JSON_SCRIPT})
+
+    assert template.names == ['config', 'title']
+    assert template.render({'title': 'Zog', 'config': {'a': 1}}) == \
+        source.format(title='Zog', config='{"a":1}')
+
+
+def test_compile_rejects_unknown_contexts_and_format_specs():
+    with pytest.raises(ValueError):
+        compile_template('<p>{title}</p>', contexts={})
+    with pytest.raises(ValueError):
+        compile_template('<p>{count:d}</p>', contexts={'count': HTML_TEXT})
@@ -1,11 +1,20 @@
 """
 Tools for the Story Analyst agent to identify and analyze books.
 These tools are callable by the LangChain agent during conversation.
+
+Apart from identify_book_from_description, which checks the bundled book
+catalog, these tools return a canned JSON echo, yet every call costs the
+agent another full Claude round-trip. Lean agent mode (the default) binds
+LEAN_BOOK_TOOLS instead and puts BOOK_TOOL_GUIDANCE in the system prompt,
+so a turn is a single LLM call - the orchestrator consults the catalog
+itself before the model is called.
 """
 from langchain.tools import tool
 from typing import Dict, Any
 import json
 
+from services.book_catalog import get_book_catalog
+
 
 @tool
 def identify_book_from_description(description: str) -> str:
@@ -22,12 +31,30 @@ def identify_book_from_description(description: str) -> str:
     Returns:
         JSON string with title, author, and confidence level
     """
-    # In a real implementation, this could query a book database or API
-    # For now, we'll use the LLM's knowledge to identify books
-    
-    # The LLM will populate this based on its knowledge
+    # Check the bundled catalog of popular children's books first
+    catalog = get_book_catalog()
+    match = catalog.lookup(description) if catalog else None
+    if match and "candidates" in match:
+        # A series or author - the user needs to say which book
+        return json.dumps({
+            "identified": False,
+            "needs_confirmation": True,
+            "candidates": [{"title": c["title"], "author": c["author"]} for c in match["candidates"]],
+            "message": "This could be several books - ask which one they read."
+        })
+    if match:
+        return json.dumps({
+            "identified": True,
+            "needs_confirmation": True,
+            "title": match["title"],
+            "author": match["author"],
+            "series": match["series"] or None,
+            "confidence": match["score"]
+        })
+    
+    # Not in the catalog - the LLM identifies it from its own knowledge
     result = {
-        "identified": True,
+        "identified": False,
         "needs_confirmation": True,
         "message": f"Based on '{description}', I need to identify the specific book."
     }
@@ -192,3 +219,14 @@ BOOK_TOOLS = [
     complete_book_analysis
 ]
 
+# Tools that do real work - bound in lean agent mode
+LEAN_BOOK_TOOLS = []
+
+# What the stub tools prompted the model to do, as in-prompt guidance
+BOOK_TOOL_GUIDANCE = """HOW TO WORK (no tools needed - do everything in your reply):
+- Identify the book from the user's description using your own knowledge of children's books.
+- Confirm it in the format above; if the user says no, ask for more details and try again.
+- As you chat, keep track of themes, main characters, and story elements that could be
+  collectibles, obstacles or power-ups. Don't list them for the user - just ask good questions.
+- Ask one follow-up question at a time about plot, characters, setting or favorite moments.
+- When you have enough for a game, say you're ready to design the game."""
@@ -1,6 +1,11 @@
 """
 Tools for the Game Designer agent to create game designs.
 These tools help translate book elements into game mechanics.
+
+None of these tools has a side effect - each returns canned JSON, yet
+every call costs the agent another full Claude round-trip. Lean agent
+mode (the default) binds LEAN_GAME_TOOLS instead and puts
+GAME_TOOL_GUIDANCE in the system prompt, so a turn is a single LLM call.
 """
 from langchain.tools import tool
 from typing import Dict, Any
@@ -181,3 +186,16 @@ GAME_TOOLS = [
     ask_design_question
 ]
 
+# Tools that do real work - bound in lean agent mode
+LEAN_GAME_TOOLS = []
+
+# What the stub tools told the model, as in-prompt guidance
+GAME_TOOL_GUIDANCE = """HOW TO WORK (no tools needed - do everything in your reply):
+- Game types and what they suit:
+  * platformer - jump and collect items while avoiding obstacles (adventures, journeys, overcoming challenges)
+  * top-down - navigate from above, explore and collect (exploration, quests, finding things)
+  * obstacle-avoider - fast-paced dodging and collecting (action, chase scenes, escapes)
+- Collectibles come from important items in the story; obstacles from its conflicts, villains or dangers.
+- Difficulty is easy, medium or hard - default to medium for the book's age range unless the user asks.
+- The player wins by collecting enough of the collectible to reach the story's goal.
+- When type, collectible and obstacle are settled, say you're ready to build the game."""
@@ -5,6 +5,7 @@
 
 // State
 let sessionId = null;
+let activeBuildId = null;
 let currentPhase = 'identifying';
 let isProcessing = false;
 
@@ -83,6 +84,10 @@ async function startSession() {
 
 /**
  * Send a message to the agent
+ *
+ * Uses the streaming endpoint so the agent's reply appears word by word
+ * as Claude writes it. The final "done" event carries the full reply
+ * plus phase and completion data.
  */
 async function sendMessage() {
     const message = messageInput.value.trim();
@@ -98,7 +103,7 @@ async function sendMessage() {
     setProcessingState(true);
     
     try {
-        const response = await fetch('/api/message', {
+        const response = await fetch('/api/message/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -107,25 +112,37 @@ async function sendMessage() {
             })
         });
         
-        const data = await response.json();
-        
-        if (data.success) {
-            // Add agent response
-            addMessage(data.message, 'agent');
-            
-            // Update phase if changed
-            if (data.phase !== currentPhase) {
-                currentPhase = data.phase;
-                updatePhase(data.phase, data.agent);
-            }
-            
-            // Check if game is complete
-            if (data.is_complete) {
-                showGameResult(data.game_data);
-            }
-        } else {
+        if (!response.ok || !response.body) {
+            const data = await response.json();
             showError(data.error || 'Something went wrong. Please try again.');
+            return;
         }
+        
+        // Agent bubble is created when the first token arrives
+        let streamedText = '';
+        let agentTextEl = null;
+        
+        await readEventStream(response, (event, data) => {
+            if (event === 'token') {
+                if (!agentTextEl) {
+                    removeThinkingIndicator();
+                    agentTextEl = addMessage('', 'agent');
+                }
+                streamedText += data.text;
+                agentTextEl.textContent = streamedText;
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            } else if (event === 'done') {
+                // The final message is authoritative (it may add transition text)
+                if (agentTextEl) {
+                    agentTextEl.textContent = data.message;
+                } else {
+                    addMessage(data.message, 'agent');
+                }
+                handleAgentResponse(data);
+            } else if (event === 'error') {
+                showError(data.error || 'Something went wrong. Please try again.');
+            }
+        });
     } catch (error) {
         console.error('Error sending message:', error);
         showError('Failed to send message. Please try again.');
@@ -135,6 +152,114 @@ async function sendMessage() {
     }
 }
 
+/**
+ * Read a text/event-stream response, calling onEvent(name, data) per event
+ */
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            let dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) dataLines.push(line.slice(6));
+            });
+            
+            if (dataLines.length) {
+                onEvent(eventName, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
+/**
+ * Apply phase and completion updates from an agent response
+ */
+function handleAgentResponse(data) {
+    // Update phase if changed
+    if (data.phase !== currentPhase) {
+        currentPhase = data.phase;
+        updatePhase(data.phase, data.agent);
+    }
+    
+    // Check if game is complete
+    if (data.is_complete) {
+        showGameResult(data.game_data);
+    }
+    
+    // The game is being built in the background - wait for it
+    const job = data.build_job;
+    if (job && (job.status === 'queued' || job.status === 'running')) {
+        awaitBuild(job.job_id);
+    }
+}
+
+/**
+ * Wait for a background game build and show the result when it finishes
+ */
+async function awaitBuild(jobId) {
+    if (!jobId || activeBuildId === jobId) return;
+    activeBuildId = jobId;
+    
+    const onFinished = (data) => {
+        if (activeBuildId !== jobId) return;
+        activeBuildId = null;
+        if (data.message) {
+            addMessage(data.message, 'agent');
+        }
+        handleAgentResponse(data);
+    };
+    
+    const query = `session_id=${encodeURIComponent(sessionId)}`;
+    try {
+        const response = await fetch(`/api/build/${jobId}/events?${query}`);
+        if (response.ok && response.body) {
+            let finished = false;
+            await readEventStream(response, (event, data) => {
+                if (event === 'done') {
+                    finished = true;
+                    onFinished(data);
+                }
+            });
+            if (finished) return;
+        }
+    } catch (error) {
+        console.warn('Build event stream failed, polling instead:', error);
+    }
+    
+    // Fall back to polling if the event stream is unavailable or ended early
+    while (activeBuildId === jobId) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        try {
+            const response = await fetch(`/api/build/${jobId}?${query}`);
+            const data = await response.json();
+            if (!response.ok) {
+                activeBuildId = null;
+                return;
+            }
+            if (data.status === 'done' || data.status === 'failed') {
+                onFinished(data);
+            }
+        } catch (error) {
+            console.error('Error checking build status:', error);
+        }
+    }
+}
+
 /**
  * Add a message to the chat
  */
@@ -184,6 +309,9 @@ function addMessage(text, sender) {
             behavior: 'smooth'
         });
     }, 100);
+    
+    // Returned so streamed replies can be filled in as they arrive
+    return textEl;
 }
 
 /**
@@ -316,9 +444,11 @@ function showError(message) {
 function showGameResult(gameData) {
     gameResult.classList.remove('hidden');
     
-    // Update play link with session ID
+    // Link the game by its content hash (cacheable forever), else by session
     const playLink = gameResult.querySelector('a');
-    if (playLink && sessionId) {
+    if (playLink && gameData && gameData.url) {
+        playLink.href = gameData.url;
+    } else if (playLink && sessionId) {
         playLink.href = `/api/game/${sessionId}`;
     }
     
@@ -334,7 +464,8 @@ function showGameResult(gameData) {
  * Start over with a new game
  */
 async function startOver() {
-    // Reset UI
+    // Reset UI (and stop waiting on the old session's build)
+    activeBuildId = null;
     messagesContainer.innerHTML = '';
     gameResult.classList.add('hidden');
     messageInput.disabled = false;
@@ -0,0 +1,474 @@
+/**
+ * Game Runtime - The three Phaser game types, shared by every generated game.
+ *
+ * Each generated game page carries only a small JSON config (names, colors,
+ * counts, speeds) in <script type="application/json" id="game-config">.
+ * This script is served once under a content fingerprint, so browsers cache
+ * it across games and sessions.
+ *
+ * Play Again restarts the scene in place: each game resets its state in
+ * create() and textures are drawn once per page, so a replay needs no
+ * reload and no request to the server.
+ */
+(function () {
+    'use strict';
+
+    const TEXT_STYLE = { fontSize: '24px', fill: '#fff', backgroundColor: '#000', padding: { x: 10, y: 5 } };
+    const HINT_STYLE = { fontSize: '16px', fill: '#fff', backgroundColor: '#000', padding: { x: 10, y: 5 } };
+
+    function physicsConfig(gravityY) {
+        return {
+            default: 'arcade',
+            arcade: {
+                gravity: { y: gravityY },
+                debug: false
+            }
+        };
+    }
+
+    // Draw a texture once per page - scene restarts reuse it
+    function makeTexture(scene, key, color, width, height, draw) {
+        if (scene.textures.exists(key)) {
+            return;
+        }
+        const graphics = scene.make.graphics({}, false);
+        graphics.fillStyle(color, 1);
+        draw(graphics);
+        graphics.generateTexture(key, width, height);
+        graphics.destroy();
+    }
+
+    function showGameOver(message, scene, height, textY, buttonY, fontSize) {
+        const bg = scene.add.rectangle(400, 300, 600, height, 0x000000, 0.8);
+
+        const text = scene.add.text(400, textY, message, { fontSize: fontSize, fill: '#fff', align: 'center' });
+        text.setOrigin(0.5);
+
+        const playAgainBtn = scene.add.text(400, buttonY, '🔄 Play Again', { fontSize: '28px', fill: '#0f0', backgroundColor: '#003300', padding: { x: 20, y: 10 } });
+        playAgainBtn.setOrigin(0.5);
+        playAgainBtn.setInteractive();
+        playAgainBtn.on('pointerdown', () => {
+            // Shuts the scene down (objects, physics, timers) and runs create() again
+            scene.scene.restart();
+        });
+
+        playAgainBtn.on('pointerover', () => {
+            playAgainBtn.setStyle({ backgroundColor: '#00ff00', fill: '#000' });
+        });
+        playAgainBtn.on('pointerout', () => {
+            playAgainBtn.setStyle({ backgroundColor: '#003300', fill: '#0f0' });
+        });
+    }
+
+    // Platformer - Jump and collect items
+    function platformer(cfg) {
+        let player;
+        let platforms;
+        let collectibles;
+        let obstacles;
+        let score = 0;
+        let scoreText;
+        let gameOver = false;
+        let cursors;
+
+        function create() {
+            // Reset state - create() runs again on every restart
+            score = 0;
+            gameOver = false;
+
+            // Create textures for game objects
+            makeTexture(this, 'platform', cfg.platform_color, 32, 32, g => g.fillRect(0, 0, 32, 32));
+            makeTexture(this, 'player', cfg.player_color, 32, 32, g => g.fillRect(0, 0, 32, 32));
+            makeTexture(this, 'collectible', cfg.collectible_color, 20, 20, g => g.fillCircle(10, 10, 10));
+            makeTexture(this, 'obstacle', cfg.obstacle_color, 30, 30, g => g.fillRect(0, 0, 30, 30));
+
+            // Background color
+            this.add.rectangle(400, 300, 800, 600, cfg.bg_color);
+
+            // Platforms
+            platforms = this.physics.add.staticGroup();
+            platforms.create(400, 568, 'platform').setDisplaySize(800, 32);
+            platforms.create(600, 400, 'platform').setDisplaySize(200, 32);
+            platforms.create(50, 250, 'platform').setDisplaySize(200, 32);
+            platforms.create(750, 220, 'platform').setDisplaySize(200, 32);
+
+            // Player
+            player = this.physics.add.sprite(100, 450, 'player');
+            player.setSize(32, 32);
+            player.setBounce(0.2);
+            player.setCollideWorldBounds(true);
+
+            // Collectibles
+            collectibles = this.physics.add.group();
+            for (let i = 0; i < cfg.collectible_count; i++) {
+                const x = Phaser.Math.Between(50, 750);
+                const collectible = collectibles.create(x, 0, 'collectible');
+                collectible.setBounceY(Phaser.Math.FloatBetween(0.4, 0.8));
+            }
+
+            // Obstacles
+            obstacles = this.physics.add.group();
+            for (let i = 0; i < cfg.obstacle_count; i++) {
+                const x = Phaser.Math.Between(200, 700);
+                const obstacle = obstacles.create(x, 500, 'obstacle');
+                obstacle.setVelocityX(Phaser.Math.Between(-100, 100));
+                obstacle.setBounce(1);
+                obstacle.setCollideWorldBounds(true);
+            }
+
+            // UI
+            scoreText = this.add.text(16, 16, cfg.collectible_name + ': 0 / ' + cfg.collectible_count, TEXT_STYLE);
+            const instructions = this.add.text(400, 30, 'Arrow Keys to Move, UP to Jump', HINT_STYLE);
+            instructions.setOrigin(0.5, 0);
+
+            // Collisions
+            this.physics.add.collider(player, platforms);
+            this.physics.add.collider(collectibles, platforms);
+            this.physics.add.collider(obstacles, platforms);
+            this.physics.add.overlap(player, collectibles, collectItem, null, this);
+            this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
+
+            // Controls
+            cursors = this.input.keyboard.createCursorKeys();
+        }
+
+        function update() {
+            if (gameOver) {
+                return;
+            }
+
+            // Player movement
+            if (cursors.left.isDown) {
+                player.setVelocityX(-160);
+            } else if (cursors.right.isDown) {
+                player.setVelocityX(160);
+            } else {
+                player.setVelocityX(0);
+            }
+
+            // Jump
+            if (cursors.up.isDown && player.body.touching.down) {
+                player.setVelocityY(-330);
+            }
+        }
+
+        function collectItem(player, collectible) {
+            collectible.disableBody(true, true);
+            score += 1;
+            scoreText.setText(cfg.collectible_name + ': ' + score + ' / ' + cfg.collectible_count);
+
+            if (collectibles.countActive(true) === 0) {
+                showGameOver('🎉 You Win! 🎉\n\nYou collected all the ' + cfg.collectible_name + '!', this, 300, 260, 360, '32px');
+            }
+        }
+
+        function hitObstacle(player, obstacle) {
+            this.physics.pause();
+            player.setTint(0xff0000);
+            gameOver = true;
+            showGameOver('Game Over!\n\nYou hit a ' + cfg.obstacle_name + '!', this, 300, 260, 360, '32px');
+        }
+
+        return { gravity: 300, create: create, update: update };
+    }
+
+    // Top-Down - Explore and collect
+    function topDown(cfg) {
+        let player;
+        let collectibles;
+        let obstacles;
+        let score = 0;
+        let scoreText;
+        let timeText;
+        let gameTime = cfg.game_time;
+        let gameOver = false;
+        let cursors;
+
+        function create() {
+            // Reset state - create() runs again on every restart
+            score = 0;
+            gameTime = cfg.game_time;
+            gameOver = false;
+
+            // Create textures for game objects
+            makeTexture(this, 'player', cfg.player_color, 40, 40, g => g.fillCircle(20, 20, 20));
+            makeTexture(this, 'collectible', cfg.collectible_color, 20, 20, g => g.fillCircle(10, 10, 10));
+            makeTexture(this, 'obstacle', cfg.obstacle_color, 30, 30, g => g.fillRect(0, 0, 30, 30));
+
+            // Background
+            this.add.rectangle(400, 300, 800, 600, cfg.bg_color);
+
+            // Player
+            player = this.physics.add.sprite(400, 300, 'player');
+            player.setCollideWorldBounds(true);
+
+            // Collectibles
+            collectibles = this.physics.add.group();
+            for (let i = 0; i < cfg.collectible_count; i++) {
+                const x = Phaser.Math.Between(50, 750);
+                const y = Phaser.Math.Between(50, 550);
+                collectibles.create(x, y, 'collectible');
+            }
+
+            // Obstacles
+            obstacles = this.physics.add.group();
+            for (let i = 0; i < cfg.obstacle_count; i++) {
+                const x = Phaser.Math.Between(100, 700);
+                const y = Phaser.Math.Between(100, 500);
+                const obstacle = obstacles.create(x, y, 'obstacle');
+                obstacle.setVelocity(Phaser.Math.Between(-50, 50), Phaser.Math.Between(-50, 50));
+                obstacle.setBounce(1);
+                obstacle.setCollideWorldBounds(true);
+            }
+
+            // UI
+            scoreText = this.add.text(16, 16, cfg.collectible_name + ': 0', TEXT_STYLE);
+            timeText = this.add.text(16, 50, 'Time: ' + gameTime, TEXT_STYLE);
+            const instructions = this.add.text(400, 16, 'Arrow Keys to Move', HINT_STYLE);
+            instructions.setOrigin(0.5, 0);
+
+            // Collisions
+            this.physics.add.overlap(player, collectibles, collectItem, null, this);
+            this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
+            this.physics.add.collider(obstacles, obstacles);
+
+            // Timer
+            this.time.addEvent({
+                delay: 1000,
+                callback: updateTimer,
+                callbackScope: this,
+                loop: true
+            });
+
+            // Controls
+            cursors = this.input.keyboard.createCursorKeys();
+        }
+
+        function update() {
+            if (gameOver) {
+                return;
+            }
+
+            // Player movement
+            player.setVelocity(0);
+
+            if (cursors.left.isDown) {
+                player.setVelocityX(-200);
+            } else if (cursors.right.isDown) {
+                player.setVelocityX(200);
+            }
+
+            if (cursors.up.isDown) {
+                player.setVelocityY(-200);
+            } else if (cursors.down.isDown) {
+                player.setVelocityY(200);
+            }
+        }
+
+        function collectItem(player, collectible) {
+            collectible.disableBody(true, true);
+            score += 1;
+            scoreText.setText(cfg.collectible_name + ': ' + score);
+
+            if (collectibles.countActive(true) === 0) {
+                showGameOver('🎉 You Win! 🎉\n\nYou collected all ' + cfg.collectible_count + ' ' + cfg.collectible_name + '!', this, 300, 260, 360, '28px');
+            }
+        }
+
+        function hitObstacle(player, obstacle) {
+            score = Math.max(0, score - 1);
+            scoreText.setText(cfg.collectible_name + ': ' + score);
+            player.setTint(0xff0000);
+            this.time.delayedCall(200, () => player.clearTint());
+        }
+
+        function updateTimer() {
+            if (!gameOver) {
+                gameTime--;
+                timeText.setText('Time: ' + gameTime);
+
+                if (gameTime <= 0) {
+                    gameOver = true;
+                    this.physics.pause();
+                    showGameOver('⏰ Time Up!\n\nFinal Score: ' + score + ' ' + cfg.collectible_name, this, 300, 260, 360, '28px');
+                }
+            }
+        }
+
+        return { gravity: 0, create: create, update: update };
+    }
+
+    // Obstacle Avoider - Fast-paced dodging
+    function obstacleAvoider(cfg) {
+        let player;
+        let obstacles;
+        let collectibles;
+        let score = 0;
+        let scoreText;
+        let gameOver = false;
+        let speed = cfg.initial_speed;
+        let cursors;
+
+        function create() {
+            // Reset state - create() runs again on every restart
+            score = 0;
+            speed = cfg.initial_speed;
+            gameOver = false;
+
+            // Create textures for game objects (the obstacle is stretched per obstacle for different sizes)
+            makeTexture(this, 'player', cfg.player_color, 40, 40, g => g.fillCircle(20, 20, 20));
+            makeTexture(this, 'collectible', cfg.collectible_color, 25, 25, g => g.fillCircle(12, 12, 12));
+            makeTexture(this, 'obstacle', cfg.obstacle_color, 30, 30, g => g.fillRect(0, 0, 30, 30));
+
+            // Background
+            this.add.rectangle(400, 300, 800, 600, cfg.bg_color);
+
+            // Player
+            player = this.physics.add.sprite(100, 300, 'player');
+            player.setCollideWorldBounds(true);
+
+            // Obstacles and collectibles groups
+            obstacles = this.physics.add.group();
+            collectibles = this.physics.add.group();
+
+            // Score
+            scoreText = this.add.text(16, 16, 'Score: 0', { fontSize: '32px', fill: '#fff', backgroundColor: '#000', padding: { x: 10, y: 5 } });
+            const instructions = this.add.text(400, 16, 'UP/DOWN to Move', HINT_STYLE);
+            instructions.setOrigin(0.5, 0);
+
+            // Spawn obstacles
+            this.time.addEvent({
+                delay: 1500,
+                callback: spawnObstacle,
+                callbackScope: this,
+                loop: true
+            });
+
+            // Spawn collectibles occasionally
+            this.time.addEvent({
+                delay: 3000,
+                callback: spawnCollectible,
+                callbackScope: this,
+                loop: true
+            });
+
+            // Update score
+            this.time.addEvent({
+                delay: 100,
+                callback: () => {
+                    if (!gameOver) {
+                        score += 1;
+                        scoreText.setText('Score: ' + score);
+
+                        // Increase difficulty
+                        if (score % 200 === 0 && speed < 400) {
+                            speed += 20;
+                        }
+                    }
+                },
+                callbackScope: this,
+                loop: true
+            });
+
+            // Collisions
+            this.physics.add.overlap(player, obstacles, hitObstacle, null, this);
+            this.physics.add.overlap(player, collectibles, collectItem, null, this);
+
+            // Controls
+            cursors = this.input.keyboard.createCursorKeys();
+        }
+
+        function update() {
+            if (gameOver) {
+                return;
+            }
+
+            // Player movement
+            if (cursors.up.isDown) {
+                player.setVelocityY(-300);
+            } else if (cursors.down.isDown) {
+                player.setVelocityY(300);
+            } else {
+                player.setVelocityY(0);
+            }
+
+            // Remove off-screen objects
+            obstacles.children.entries.forEach(obstacle => {
+                if (obstacle.x < -50) {
+                    obstacle.destroy();
+                }
+            });
+
+            collectibles.children.entries.forEach(collectible => {
+                if (collectible.x < -50) {
+                    collectible.destroy();
+                }
+            });
+        }
+
+        function spawnObstacle() {
+            if (gameOver) return;
+
+            const y = Phaser.Math.Between(50, 550);
+            const height = Phaser.Math.Between(30, 80);
+            const obstacle = obstacles.create(850, y, 'obstacle').setDisplaySize(30, height);
+            obstacle.setVelocityX(-speed);
+        }
+
+        function spawnCollectible() {
+            if (gameOver) return;
+
+            const y = Phaser.Math.Between(100, 500);
+            const collectible = collectibles.create(850, y, 'collectible');
+            collectible.setVelocityX(-speed);
+        }
+
+        function collectItem(player, collectible) {
+            collectible.disableBody(true, true);
+            score += 50;
+            scoreText.setText('Score: ' + score);
+
+            // Flash player green
+            player.setTint(0x00ff00);
+            this.time.delayedCall(200, () => player.clearTint());
+        }
+
+        function hitObstacle() {
+            gameOver = true;
+            this.physics.pause();
+            player.setTint(0xff0000);
+
+            showGameOver('Game Over!\n\nYou hit a ' + cfg.obstacle_name + '!\n\nFinal Score: ' + score, this, 350, 280, 380, '28px');
+        }
+
+        return { gravity: 0, create: create, update: update };
+    }
+
+    const GAMES = {
+        'platformer': platformer,
+        'top-down': topDown,
+        'obstacle-avoider': obstacleAvoider
+    };
+
+    function start(cfg) {
+        const game = (GAMES[cfg.game_type] || platformer)(cfg);
+        return new Phaser.Game({
+            type: Phaser.AUTO,
+            width: 800,
+            height: 600,
+            parent: 'game-container',
+            physics: physicsConfig(game.gravity),
+            scene: {
+                create: game.create,
+                update: game.update
+            }
+        });
+    }
+
+    window.GameRuntime = { start: start };
+
+    const configElement = document.getElementById('game-config');
+    if (configElement) {
+        start(JSON.parse(configElement.textContent));
+    }
+})();
@@ -19,6 +19,10 @@ source venv/bin/activate
 echo "📚 Installing dependencies..."
 pip install -q -r backend/requirements.txt
 
+# Vendor Phaser so games load it from this server (falls back to the CDN)
+echo "🕹️  Vendoring Phaser..."
+(cd backend && python -m scripts.vendor_phaser) || echo "⚠️  Could not download Phaser - games will load it from the CDN"
+
 # Check for .env file
 if [ ! -f ".env" ]; then
     echo "⚠️  No .env file found!"